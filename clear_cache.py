@@ -27,8 +27,7 @@ if __name__ == "__main__":
 
     if confirm == 's':
         # Limpa o cache
-        news_fetcher.used_news['used_urls'] = []
-        news_fetcher._save_cache()
+        news_fetcher.clear_cache()
 
         logger.success("Cache limpo com sucesso!")
         print("\n✅ Todas as notícias foram desmarcadas.")
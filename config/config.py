@@ -23,6 +23,15 @@ CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
 CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-sonnet-4-20250514")
 CLAUDE_MAX_TOKENS = 4096
 CLAUDE_TEMPERATURE = 0.7
+# Etapa de seleção: modelo pequeno escolhe as notícias ("local" = só ranking local)
+CLAUDE_SELECTION_MODEL = os.getenv("CLAUDE_SELECTION_MODEL", "claude-3-5-haiku-20241022")
+CLAUDE_SELECTION_MAX_TOKENS = 200
+# Blocos de tags internas removidos das respostas (<tag>...</tag>), separados por vírgula
+CLAUDE_STRIP_TAGS = [
+    tag.strip() for tag in os.getenv(
+        "CLAUDE_STRIP_TAGS", "search,searchqualitycheck,searchqualityscore,thinking,analysis"
+    ).split(",") if tag.strip()
+]
 
 # ========== NEWSAPI ==========
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")
@@ -32,6 +41,11 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHANNEL_ID = os.getenv("TELEGRAM_CHANNEL_ID", "@gamefiradarbr")
 CHANNEL_NAME = os.getenv("CHANNEL_NAME", "GameFi RADAR BR👾🚀")
 
+# Canais espelhados (opcional): lista separada por vírgula no formato canal[|formatador]
+# Ex: TELEGRAM_CHANNELS=@gamefiradarbr,@gamefiradar_staging|staging
+# Vazio = apenas TELEGRAM_CHANNEL_ID
+TELEGRAM_CHANNELS = os.getenv("TELEGRAM_CHANNELS", "")
+
 # Ajustes do cliente HTTP do Telegram (pool e timeouts)
 def _to_int(value: str, default: int) -> int:
     try:
@@ -51,6 +65,10 @@ TELEGRAM_READ_TIMEOUT = _to_float(os.getenv("TELEGRAM_READ_TIMEOUT", "30"), 30.0
 TELEGRAM_CONNECT_TIMEOUT = _to_float(os.getenv("TELEGRAM_CONNECT_TIMEOUT", "10"), 10.0)
 TELEGRAM_RETRIES = _to_int(os.getenv("TELEGRAM_RETRIES", "3"), 3)
 TELEGRAM_RETRY_BACKOFF = _to_float(os.getenv("TELEGRAM_RETRY_BACKOFF", "2"), 2.0)
+# Conexões ociosas ficam abertas por este tempo (o aquecimento antes de cada horário depende disso)
+TELEGRAM_KEEPALIVE_EXPIRY = _to_float(os.getenv("TELEGRAM_KEEPALIVE_EXPIRY", "300"), 300.0)
+# Quantos minutos antes de cada horário agendado o pool de conexões é aquecido
+TELEGRAM_WARMUP_MINUTES = _to_int(os.getenv("TELEGRAM_WARMUP_MINUTES", "2"), 2)
 
 # ========== AGENDAMENTO ==========
 SCHEDULE_RESUMO_DIARIO = os.getenv("SCHEDULE_RESUMO_DIARIO", "09:00")
@@ -64,10 +82,86 @@ MODE = os.getenv("MODE", "test")  # test ou production
 # ========== LOGS ==========
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FILE = LOGS_DIR / os.getenv("LOG_FILE", "bot.log").split("/")[-1]
+# Rotação: por tamanho OU por tempo; segmentos antigos são comprimidos (.gz)
+LOG_MAX_BYTES = _to_int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)), 5 * 1024 * 1024)
+LOG_ROTATE_HOURS = _to_int(os.getenv("LOG_ROTATE_HOURS", "24"), 24)
+LOG_BACKUP_COUNT = _to_int(os.getenv("LOG_BACKUP_COUNT", "7"), 7)
+# Eventos estruturados (JSON lines) com job_id/estágio/duração - ver log_stats.py
+LOG_EVENTS = os.getenv("LOG_EVENTS", "true").lower() == "true"
+LOG_EVENTS_FILE = LOGS_DIR / "events.jsonl"
+
+# ========== MÉTRICAS ==========
+METRICS_FILE = DATA_DIR / "metrics.json"
+# Porta do endpoint Prometheus (/metrics em texto); 0 desativa
+METRICS_PORT = _to_int(os.getenv("METRICS_PORT", "0"), 0)
+
+# ========== CUSTO DO CLAUDE ==========
+USAGE_FILE = DATA_DIR / "usage.json"
+# Orçamento diário em USD (0 = sem limite). Ao chegar perto, menos notícias
+# candidatas vão no prompt; ao estourar, usa também o modelo mais barato.
+CLAUDE_DAILY_BUDGET_USD = _to_float(os.getenv("CLAUDE_DAILY_BUDGET_USD", "0"), 0.0)
+CLAUDE_BUDGET_MODEL = os.getenv("CLAUDE_BUDGET_MODEL", "claude-3-5-haiku-20241022")
+# Rascunhos gerados em paralelo por postagem; fica o de melhor pontuação local
+# (src/draft_scorer.py). Cada rascunho é uma chamada paga; 1 = chamada única.
+# Com o orçamento do dia apertado, volta a 1.
+CLAUDE_DRAFTS = _to_int(os.getenv("CLAUDE_DRAFTS", "1"), 1)
+
+# ========== CACHE DE RESPOSTAS DO CLAUDE ==========
+# Respostas guardadas pelo hash do pedido (modelo, prompts, temperatura).
+# auto = só em MODE=test; true = sempre (benchmarks de replay); false = nunca
+CLAUDE_CACHE = os.getenv("CLAUDE_CACHE", "auto").lower()
+CLAUDE_CACHE_ENABLED = CLAUDE_CACHE == "true" or (CLAUDE_CACHE == "auto" and MODE == "test")
+CLAUDE_CACHE_DIR = DATA_DIR / "claude_cache"
+CLAUDE_CACHE_MAX_ENTRIES = _to_int(os.getenv("CLAUDE_CACHE_MAX_ENTRIES", "200"), 200)
+CLAUDE_CACHE_TTL_HOURS = _to_float(os.getenv("CLAUDE_CACHE_TTL_HOURS", "24"), 24.0)
+
+# ========== PROMPT ==========
+# Tokens (estimados) do bloco de notícias enviado para a redação; as descrições
+# são cortadas, das menos para as mais relevantes, para caber
+PROMPT_NEWS_TOKEN_BUDGET = _to_int(os.getenv("PROMPT_NEWS_TOKEN_BUDGET", "1200"), 1200)
+# Máximo de caracteres por descrição (HTML removido)
+PROMPT_DESCRIPTION_CHARS = _to_int(os.getenv("PROMPT_DESCRIPTION_CHARS", "400"), 400)
+
+# ========== TEXTO COMPLETO DOS ARTIGOS ==========
+# Baixa a página da(s) notícia(s) escolhida(s) e manda um trecho do texto
+# principal para a redação (src/article_enricher.py). Desligado por padrão.
+ARTICLE_ENRICH_ENABLED = os.getenv("ARTICLE_ENRICH", "false").lower() == "true"
+# Quantas das notícias escolhidas (as mais relevantes) são baixadas
+ARTICLE_ENRICH_TOP_K = _to_int(os.getenv("ARTICLE_ENRICH_TOP_K", "1"), 1)
+# Downloads simultâneos
+ARTICLE_FETCH_CONCURRENCY = _to_int(os.getenv("ARTICLE_FETCH_CONCURRENCY", "4"), 4)
+# Tempo total por página (conexão + download) e tamanho máximo lido
+ARTICLE_FETCH_TIMEOUT_SECONDS = _to_float(os.getenv("ARTICLE_FETCH_TIMEOUT_SECONDS", "6"), 6.0)
+ARTICLE_FETCH_MAX_BYTES = _to_int(os.getenv("ARTICLE_FETCH_MAX_BYTES", str(1024 * 1024)), 1024 * 1024)
+# Máximo de caracteres do trecho que vai no prompt
+ARTICLE_EXCERPT_CHARS = _to_int(os.getenv("ARTICLE_EXCERPT_CHARS", "1500"), 1500)
+# Texto extraído guardado pela URL canônica (testes repetidos não baixam de novo)
+ARTICLE_CACHE_FILE = DATA_DIR / "article_cache.json"
+ARTICLE_CACHE_MAX_ENTRIES = _to_int(os.getenv("ARTICLE_CACHE_MAX_ENTRIES", "300"), 300)
+ARTICLE_CACHE_TTL_HOURS = _to_float(os.getenv("ARTICLE_CACHE_TTL_HOURS", "72"), 72.0)
+
+# ========== RESILIÊNCIA DO CLAUDE ==========
+# Timeout por requisição e tentativas (overload 529, rate limit 429, 5xx, rede)
+CLAUDE_TIMEOUT_SECONDS = _to_float(os.getenv("CLAUDE_TIMEOUT_SECONDS", "90"), 90.0)
+CLAUDE_MAX_ATTEMPTS = _to_int(os.getenv("CLAUDE_MAX_ATTEMPTS", "4"), 4)
+# Backoff exponencial com jitter: espera aleatória até min(máx, base * 2^tentativa)
+CLAUDE_BACKOFF_BASE_SECONDS = _to_float(os.getenv("CLAUDE_BACKOFF_BASE_SECONDS", "2"), 2.0)
+CLAUDE_BACKOFF_MAX_SECONDS = _to_float(os.getenv("CLAUDE_BACKOFF_MAX_SECONDS", "30"), 30.0)
+# Modelo alternativo após N falhas seguidas no modelo pedido (vazio desativa)
+CLAUDE_FALLBACK_MODEL = os.getenv("CLAUDE_FALLBACK_MODEL", "claude-3-5-haiku-20241022")
+CLAUDE_FALLBACK_AFTER = _to_int(os.getenv("CLAUDE_FALLBACK_AFTER", "2"), 2)
+# Circuit breaker: após N falhas seguidas, novas chamadas falham na hora durante o cooldown
+CLAUDE_BREAKER_THRESHOLD = _to_int(os.getenv("CLAUDE_BREAKER_THRESHOLD", "6"), 6)
+CLAUDE_BREAKER_COOLDOWN_SECONDS = _to_float(os.getenv("CLAUDE_BREAKER_COOLDOWN_SECONDS", "300"), 300.0)
 
 # ========== ARQUIVOS DE DADOS ==========
 POSTED_NEWS_FILE = DATA_DIR / "posted_news.json"
 CACHE_FILE = DATA_DIR / "news_cache.json"
+USED_NEWS_CACHE_FILE = DATA_DIR / "used_news_cache.json"
+OUTBOX_FILE = DATA_DIR / "outbox.json"
+
+# Itens do outbox mais antigos que isso não são mais entregues (evita postar conteúdo velho)
+OUTBOX_MAX_AGE_HOURS = _to_int(os.getenv("OUTBOX_MAX_AGE_HOURS", "12"), 12)
 
 # ========== TEMAS PARA BUSCA ==========
 TOPICS = [
@@ -120,6 +214,8 @@ def print_config():
     print(f"🔑 Claude API: {'✅ Configurada' if CLAUDE_API_KEY else '❌ Não configurada'}")
     print(f"📱 Telegram Bot: {'✅ Configurado' if TELEGRAM_BOT_TOKEN else '❌ Não configurado'}")
     print(f"📢 Canal: {TELEGRAM_CHANNEL_ID}")
+    if TELEGRAM_CHANNELS:
+        print(f"📢 Canais espelhados: {TELEGRAM_CHANNELS}")
     print(f"🕐 Resumo Diário: {SCHEDULE_RESUMO_DIARIO}")
     print(f"🕐 Notícia Relevante 1: {SCHEDULE_NOTICIA_RELEVANTE_1}")
     print(f"🕐 Notícia Relevante 2: {SCHEDULE_NOTICIA_RELEVANTE_2}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Percentis de latência por estágio a partir dos eventos estruturados
+
+Lê logs/events.jsonl (e os segmentos rotacionados .gz) e mostra, para cada
+estágio (job, fetch, claude, telegram...), quantidade, erros e p50/p90/p99/máx
+do duration_ms.
+
+Uso:
+    python log_stats.py                 # todos os eventos
+    python log_stats.py --days 7        # só os últimos 7 dias
+    python log_stats.py --job <job_id>  # estágios de um job específico
+"""
+
+import argparse
+import gzip
+import json
+import math
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config.config import LOG_EVENTS_FILE
+
+
+def iter_events(events_file: Path = LOG_EVENTS_FILE) -> Iterator[Dict]:
+    """Percorre os eventos do arquivo atual e dos segmentos rotacionados"""
+    files = sorted(events_file.parent.glob(f"{events_file.name}.*.gz"))
+    if events_file.exists():
+        files.append(events_file)
+
+    for path in files:
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por nearest-rank de uma lista já ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def stage_key(event: Dict) -> str:
+    """Agrupa por estágio, separando fonte (fetch) e tipo de job"""
+    detail = event.get("source") or event.get("job")
+    return f"{event['stage']}:{detail}" if detail else event["stage"]
+
+
+def compute_stats(events: Iterator[Dict], since: datetime = None, job_id: str = None) -> Dict[str, Dict]:
+    """
+    Calcula percentis de duração por estágio
+
+    Returns:
+        {estágio: {count, errors, error_classes, p50, p90, p99, max}}
+    """
+    durations = defaultdict(list)
+    errors = defaultdict(lambda: defaultdict(int))
+
+    for event in events:
+        if event.get("event") != "stage" or "duration_ms" not in event:
+            continue
+        if job_id and event.get("job_id") != job_id:
+            continue
+        if since and datetime.fromisoformat(event["ts"]) < since:
+            continue
+
+        key = stage_key(event)
+        durations[key].append(float(event["duration_ms"]))
+        if event.get("status") == "error":
+            errors[key][event.get("error") or "unknown"] += 1
+
+    stats = {}
+    for key, values in durations.items():
+        values.sort()
+        stats[key] = {
+            "count": len(values),
+            "errors": sum(errors[key].values()),
+            "error_classes": dict(errors[key]),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+        }
+    return stats
+
+
+def print_stats(stats: Dict[str, Dict]):
+    """Imprime a tabela de latências"""
+    if not stats:
+        print("Nenhum evento de estágio encontrado.")
+        return
+
+    print(f"{'estágio':<28} {'n':>5} {'erros':>6} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'máx ms':>10}")
+    print("-" * 84)
+    for key in sorted(stats):
+        s = stats[key]
+        print(f"{key:<28} {s['count']:>5} {s['errors']:>6} "
+              f"{s['p50']:>10.1f} {s['p90']:>10.1f} {s['p99']:>10.1f} {s['max']:>10.1f}")
+        if s["error_classes"]:
+            classes = ", ".join(f"{name}={n}" for name, n in sorted(s["error_classes"].items()))
+            print(f"{'':<28}   erros: {classes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Percentis de latência por estágio (logs/events.jsonl)")
+    parser.add_argument("--days", type=int, help="Considera apenas os últimos N dias")
+    parser.add_argument("--job", help="Filtra por job_id")
+    parser.add_argument("--file", type=Path, default=LOG_EVENTS_FILE, help="Arquivo de eventos")
+    args = parser.parse_args()
+
+    since = datetime.now() - timedelta(days=args.days) if args.days else None
+    print_stats(compute_stats(iter_events(args.file), since=since, job_id=args.job))
@@ -15,7 +15,10 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from config.config import validate_config, print_config, MODE
 from src.scheduler import scheduler
+from src.telegram_bot import telegram
+from utils.event_loop import shared_loop
 from utils.logger import logger
+from utils.metrics import metrics
 
 # Só importa admin_bot se for modo test
 if MODE == "test":
@@ -39,6 +42,15 @@ def run_admin_bot():
         pass
 
 
+def shutdown_clients():
+    """Fecha o pool do Telegram e o event loop compartilhado"""
+    try:
+        shared_loop.run(telegram.shutdown(), timeout=10)
+    except Exception:
+        pass
+    shared_loop.stop()
+
+
 def main():
     """Função principal do bot"""
     
@@ -55,6 +67,9 @@ def main():
     # Mostra configurações
     print_config()
     
+    # Endpoint Prometheus (se METRICS_PORT > 0)
+    metrics.start_http_server()
+    
     # Inicia os bots
     try:
         if MODE == "production":
@@ -88,7 +103,11 @@ def main():
 
     finally:
         scheduler.stop()
+        shutdown_clients()
+        metrics.stop_http_server()
+        metrics.flush()
         logger.info("👋 Sistema finalizado\n")
+        logger.shutdown()
 
 
 if __name__ == "__main__":
@@ -9,6 +9,7 @@ from telegram.constants import ParseMode
 import os
 
 from utils.logger import logger
+from utils.message_splitter import split_html_message
 from src.admin_commands import AdminCommands
 
 # Credenciais do bot administrativo
@@ -40,6 +41,7 @@ class AdminBot:
         self.app.add_handler(CommandHandler("status", self.cmd_status))
         self.app.add_handler(CommandHandler("stats", self.cmd_stats))
         self.app.add_handler(CommandHandler("logs", self.cmd_logs))
+        self.app.add_handler(CommandHandler("metrics", self.cmd_metrics))
         self.app.add_handler(CommandHandler("help", self.cmd_help))
         
         # Callback queries (botões)
@@ -146,13 +148,9 @@ class AdminBot:
         if action in actions:
             response = await actions[action]()
             
-            # Se resposta for muito longa, divide em mensagens
-            if len(response) > 4000:
-                chunks = [response[i:i+4000] for i in range(0, len(response), 4000)]
-                for chunk in chunks:
-                    await query.message.reply_text(chunk, parse_mode=ParseMode.HTML)
-            else:
-                await query.message.reply_text(response, parse_mode=ParseMode.HTML)
+            # Se resposta for muito longa, divide em mensagens (sem quebrar tags HTML)
+            for chunk in split_html_message(response):
+                await query.message.reply_text(chunk, parse_mode=ParseMode.HTML)
     
     async def cmd_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Comando /status"""
@@ -184,8 +182,21 @@ class AdminBot:
             await update.message.reply_text("🚫 Acesso negado.")
             return
         
-        response = await self.commands.get_logs()
-        await update.message.reply_text(response, parse_mode=ParseMode.HTML)
+        response = await self.commands.get_logs(context.args)
+        for chunk in split_html_message(response):
+            await update.message.reply_text(chunk, parse_mode=ParseMode.HTML)
+    
+    async def cmd_metrics(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Comando /metrics"""
+        user_id = update.effective_user.id
+        
+        if not self._check_admin(user_id):
+            await update.message.reply_text("🚫 Acesso negado.")
+            return
+        
+        response = await self.commands.get_metrics()
+        for chunk in split_html_message(response):
+            await update.message.reply_text(chunk, parse_mode=ParseMode.HTML)
     
     async def cmd_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Comando /help"""
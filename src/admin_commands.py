@@ -2,9 +2,11 @@
 Comandos administrativos para o painel de controle
 """
 
+import asyncio
 import os
 from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
 import pytz
 
 from config.config import (
@@ -16,15 +18,25 @@ from src.news_fetcher import news_fetcher
 from src.ai_processor import ai
 from src.telegram_bot import telegram
 from utils.logger import logger
+from utils.event_loop import shared_loop
+from utils.state import runtime_state
+from utils.telegram_html import markdown_to_html, escape_html
+from utils.log_tail import tail_lines, make_filter, LEVELS
+from utils.metrics import metrics
+from utils.usage import usage_tracker
 
 
 class AdminCommands:
     """Lógica dos comandos administrativos"""
     
     def __init__(self):
-        self.paused = False
         self.tz = pytz.timezone(TIMEZONE)
     
+    @property
+    def paused(self) -> bool:
+        """Pausa compartilhada com a thread do scheduler"""
+        return runtime_state.paused
+    
     async def get_status(self) -> str:
         """Retorna status atual do bot"""
         now = datetime.now(self.tz)
@@ -32,12 +44,14 @@ class AdminCommands:
         
         status_emoji = "✅" if not self.paused else "⏸️"
         modo_emoji = "🔴" if modo == "PRODUCTION" else "🟡"
+        telegram_ok = await shared_loop.run_async(telegram.health_check())
         
         response = f"""
 📊 <b>STATUS DO BOT</b>
 
 {status_emoji} Estado: {'PAUSADO' if self.paused else 'ATIVO'}
 {modo_emoji} Modo: {modo}
+📡 Telegram: {'✅ OK' if telegram_ok else '❌ Sem resposta'}
 🕐 Hora atual: {now.strftime('%d/%m/%Y %H:%M:%S')}
 
 ⏰ <b>Próximas Postagens:</b>
@@ -53,6 +67,31 @@ class AdminCommands:
         """Retorna estatísticas do bot"""
         stats = db.get_stats()
         cache_stats = news_fetcher.get_cache_stats()
+        usage_today = usage_tracker.totals(days=1)
+        usage_30 = usage_tracker.totals(days=30)
+        
+        def _usage(usage: dict) -> str:
+            by_job = ', '.join(f"{escape_html(job)} US$ {cost:.2f}"
+                               for job, cost in sorted(usage['by_job'].items()))
+            return (
+                f"• {usage['calls']} chamadas | US$ {usage['cost_usd']:.2f}\n"
+                f"• Tokens: {usage['input_tokens']:,} entrada / {usage['output_tokens']:,} saída\n"
+                f"• Cache: {usage['cache_read_input_tokens']:,} lidos / "
+                f"{usage['cache_creation_input_tokens']:,} gravados\n"
+                f"• Por tipo: {by_job or 'Nenhum'}"
+            )
+        
+        budget = usage_tracker.daily_budget
+        budget_line = (f"Orçamento diário: US$ {budget:.2f} ({usage_tracker.budget_state()})"
+                       if budget > 0 else "Orçamento diário: sem limite")
+        
+        def _window(window: dict) -> str:
+            sources = ', '.join(f"{escape_html(name)} ({count})" for name, count in window['top_sources'])
+            return (
+                f"• Total: {window['total_posts']} "
+                f"({window['resumos']} resumos, {window['noticias']} notícias)\n"
+                f"• Fontes: {sources or 'Nenhuma'}"
+            )
         
         response = f"""
 📈 <b>ESTATÍSTICAS</b>
@@ -66,26 +105,98 @@ class AdminCommands:
 • Primeiro post: {stats['first_post'] or 'Nenhum'}
 • Último post: {stats['last_post'] or 'Nenhum'}
 
+📅 <b>Últimos 7 dias:</b>
+{_window(stats['last_7_days'])}
+
+📆 <b>Últimos 30 dias:</b>
+{_window(stats['last_30_days'])}
+
 🗂️ <b>Cache de Notícias:</b>
 • Notícias usadas: {cache_stats['total_used']}
 • Última limpeza: {cache_stats['last_cleanup']}
+
+🤖 <b>Claude hoje:</b>
+{_usage(usage_today)}
+• {budget_line}
+
+🤖 <b>Claude 30 dias:</b>
+{_usage(usage_30)}
 """
         return response.strip()
     
-    async def get_logs(self) -> str:
-        """Retorna últimas 20 linhas do log"""
+    async def get_metrics(self) -> str:
+        """Retorna latências por estágio (p50/p95/p99) de todos os jobs"""
+        histograms = await asyncio.to_thread(metrics.snapshot)
+        
+        if not histograms:
+            return "⏱️ <b>MÉTRICAS</b>\n\nNenhum estágio medido ainda."
+        
+        def _fmt(ms: float) -> str:
+            return f"{ms / 1000:.1f}s" if ms >= 1000 else f"{ms:.0f}ms"
+        
+        lines = []
+        for key, histogram in sorted(histograms.items()):
+            stage, _, source = key.partition('|')
+            name = f"{stage} ({source})" if source else stage
+            errors = f" | ❌ {histogram.errors}" if histogram.errors else ""
+            lines.append(
+                f"<b>{escape_html(name)}</b> n={histogram.count}{errors}\n"
+                f"  p50 {_fmt(histogram.percentile(50))} · p95 {_fmt(histogram.percentile(95))} · "
+                f"p99 {_fmt(histogram.percentile(99))} · máx {_fmt(histogram.max_ms)}"
+            )
+        
+        since = metrics.since()
+        header = "⏱️ <b>MÉTRICAS POR ESTÁGIO</b>"
+        if since:
+            header += f"\n<i>desde {escape_html(since[:16].replace('T', ' '))}</i>"
+        
+        return header + "\n\n" + "\n".join(lines)
+    
+    async def get_logs(self, args: Optional[List[str]] = None) -> str:
+        """
+        Retorna as últimas linhas do log
+        
+        Args:
+            args: Argumentos do /logs, em qualquer ordem - quantidade (padrão 20,
+                  máx 100), nível mínimo (debug/info/warning/error/critical) e
+                  o resto como padrão de busca
+        """
+        count = 20
+        level = None
+        pattern_parts = []
+        
+        for arg in args or []:
+            if arg.isdigit():
+                count = max(1, min(int(arg), 100))
+            elif arg.lower() in LEVELS and level is None:
+                level = arg.lower()
+            else:
+                pattern_parts.append(arg)
+        pattern = ' '.join(pattern_parts) or None
+        
         try:
             if not LOG_FILE.exists():
                 return "📝 <b>LOGS</b>\n\nArquivo de log não encontrado."
             
-            with open(LOG_FILE, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                last_20 = lines[-20:] if len(lines) >= 20 else lines
+            # Leitura de trás para frente, fora do event loop do admin bot
+            lines = await asyncio.to_thread(tail_lines, LOG_FILE, count, make_filter(level, pattern))
+            
+            filters = []
+            if level:
+                filters.append(f"nível ≥ {level.upper()}")
+            if pattern:
+                filters.append(f"busca: {escape_html(pattern)}")
+            header = f"📝 <b>ÚLTIMAS {len(lines)} LINHAS DO LOG</b>"
+            if filters:
+                header += f"\n<i>{' | '.join(filters)}</i>"
+            
+            if not lines:
+                return f"{header}\n\nNenhuma linha encontrada."
             
-            log_text = ''.join(last_20)
+            log_text = escape_html('\n'.join(lines))
             
             response = f"""
-📝 <b>ÚLTIMAS 20 LINHAS DO LOG</b>
+{header}
 
 <code>{log_text}</code>
 """
@@ -101,7 +212,9 @@ class AdminCommands:
 <b>📊 Monitoramento:</b>
 /status - Status e próximas postagens
 /stats - Estatísticas completas
-/logs - Últimas 20 linhas do log
+/metrics - Latência por estágio (p50/p95/p99)
+/logs [N] [nível] [busca] - Últimas linhas do log
+  ex: /logs 50 error telegram
 
 <b>⚙️ Controle:</b>
 ⏸️ Pausar - Pausar postagens automáticas
@@ -130,13 +243,13 @@ Use /menu para acessar o painel com botões.
     
     async def pause_bot(self) -> str:
         """Pausa postagens automáticas"""
-        self.paused = True
+        runtime_state.pause()
         logger.warning("⏸️ Bot pausado via painel admin")
         return "⏸️ <b>Bot pausado!</b>\n\nPostagens automáticas foram desativadas temporariamente.\nUse 'Retomar' para reativar."
     
     async def resume_bot(self) -> str:
         """Retoma postagens automáticas"""
-        self.paused = False
+        runtime_state.resume()
         logger.info("▶️ Bot retomado via painel admin")
         return "▶️ <b>Bot retomado!</b>\n\nPostagens automáticas foram reativadas."
     
@@ -144,10 +257,10 @@ Use /menu para acessar o painel com botões.
         """Testa geração de resumo diário"""
         logger.info("🧪 Gerando resumo de teste via painel admin...")
         
-        content = ai.generate_resumo_diario()
+        content = await asyncio.to_thread(ai.generate_resumo_diario)
         
         if content:
-            return f"✅ <b>Resumo gerado com sucesso!</b>\n\n{content[:500]}...\n\n<i>(Não foi postado no canal)</i>"
+            return f"✅ <b>Resumo gerado com sucesso!</b>\n\n{markdown_to_html(content[:500])}...\n\n<i>(Não foi postado no canal)</i>"
         else:
             return "❌ Erro ao gerar resumo diário."
     
@@ -155,10 +268,10 @@ Use /menu para acessar o painel com botões.
         """Testa geração de notícia relevante"""
         logger.info("🧪 Gerando notícia de teste via painel admin...")
         
-        content = ai.generate_noticia_relevante()
+        post = await asyncio.to_thread(ai.generate_noticia_relevante)
         
-        if content:
-            return f"✅ <b>Notícia gerada com sucesso!</b>\n\n{content[:500]}...\n\n<i>(Não foi postada no canal)</i>"
+        if post:
+            return f"✅ <b>Notícia gerada com sucesso!</b>\n\n{markdown_to_html(post['content'][:500])}...\n\n<i>(Não foi postada no canal)</i>"
         else:
             return "❌ Erro ao gerar notícia relevante."
     
@@ -166,10 +279,10 @@ Use /menu para acessar o painel com botões.
         """Força postagem de resumo diário"""
         logger.info("📤 Postando resumo via painel admin...")
         
-        content = ai.generate_resumo_diario()
+        content = await asyncio.to_thread(ai.generate_resumo_diario)
         
         if content:
-            success = await telegram.post_resumo_diario(content)
+            success = await shared_loop.run_async(telegram.post_resumo_diario(content))
             if success:
                 return "✅ <b>Resumo postado com sucesso!</b>"
             else:
@@ -181,10 +294,12 @@ Use /menu para acessar o painel com botões.
         """Força postagem de notícia relevante"""
         logger.info("📤 Postando notícia via painel admin...")
         
-        content = ai.generate_noticia_relevante()
+        post = await asyncio.to_thread(ai.generate_noticia_relevante)
         
-        if content:
-            success = await telegram.post_noticia_relevante(content)
+        if post:
+            success = await shared_loop.run_async(
+                telegram.post_noticia_relevante(post['content'], title=post['title'])
+            )
             if success:
                 return "✅ <b>Notícia postada com sucesso!</b>"
             else:
@@ -195,9 +310,7 @@ Use /menu para acessar o painel com botões.
     async def clear_cache(self) -> str:
         """Limpa cache de notícias usadas"""
         try:
-            cache_file = Path("data/used_news_cache.json")
-            if cache_file.exists():
-                cache_file.unlink()
+            news_fetcher.clear_cache()
             
             logger.warning("🗑️ Cache de notícias limpo via painel admin")
             return "✅ <b>Cache limpo!</b>\n\nTodas as notícias podem ser usadas novamente."
@@ -207,9 +320,7 @@ Use /menu para acessar o painel com botões.
     async def clear_history(self) -> str:
         """Limpa histórico de postagens"""
         try:
-            history_file = Path("data/posted_news.json")
-            if history_file.exists():
-                history_file.unlink()
+            db.clear()
             
             logger.warning("🗑️ Histórico de postagens limpo via painel admin")
             return "✅ <b>Histórico limpo!</b>\n\nTodas as postagens anteriores foram removidas do registro."
@@ -3,18 +3,31 @@ Processador de IA usando Claude API para gerar conteúdo
 """
 
 import anthropic
-import re
-from typing import Optional
+import asyncio
+from typing import Dict, List, Optional
 
 from config.config import (
     CLAUDE_API_KEY,
     CLAUDE_MODEL,
     CLAUDE_MAX_TOKENS,
-    CLAUDE_TEMPERATURE
+    CLAUDE_TEMPERATURE,
+    CLAUDE_SELECTION_MODEL,
+    CLAUDE_SELECTION_MAX_TOKENS,
+    CLAUDE_DRAFTS
 )
 from config.prompts import get_prompt_resumo_diario, get_prompt_noticia_relevante
+from src.article_enricher import article_enricher
+from src.claude_client import ClaudeClient, CircuitOpenError
+from src.draft_scorer import pick_best
 from src.news_fetcher import news_fetcher
+from src.post_envelope import ENVELOPE_INSTRUCTIONS, parse_envelope, validate_envelope, render_noticia
+from src.story_ranker import local_rank, compact_candidates, parse_selection
+from utils.database import db
+from utils.event_loop import shared_loop
 from utils.logger import logger
+from utils.response_cache import response_cache
+from utils.response_cleaner import response_cleaner
+from utils.usage import usage_tracker, BUDGET_OK
 
 
 class AIProcessor:
@@ -24,7 +37,8 @@ class AIProcessor:
         if not CLAUDE_API_KEY:
             raise ValueError("CLAUDE_API_KEY não configurada!")
         
-        self.client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+        # Timeout, retentativas, modelo alternativo e circuit breaker
+        self.claude = ClaudeClient(CLAUDE_API_KEY)
         self.model = CLAUDE_MODEL
         logger.info(f"Claude API inicializada (modelo: {self.model})")
     
@@ -32,70 +46,219 @@ class AIProcessor:
         """
         Remove tags de busca e outras tags internas do Claude
         
+        Tags em CLAUDE_STRIP_TAGS; uma única passada (utils/response_cleaner.py).
+        
         Args:
             response: Resposta bruta do Claude
         
         Returns:
             Resposta limpa sem tags
         """
-        # Remove tags de busca
-        response = re.sub(r'<search>.*?</search>', '', response, flags=re.DOTALL)
-        response = re.sub(r'<searchqualitycheck>.*?</searchqualitycheck>', '', response, flags=re.DOTALL)
-        response = re.sub(r'<searchqualityscore>.*?</searchqualityscore>', '', response, flags=re.DOTALL)
-        
-        # Remove outras tags comuns
-        response = re.sub(r'<thinking>.*?</thinking>', '', response, flags=re.DOTALL)
-        response = re.sub(r'<analysis>.*?</analysis>', '', response, flags=re.DOTALL)
+        return response_cleaner.clean(response)
+    
+    def _request(self, prompt: str, system_prompt: str, max_tokens: int, temperature: float) -> Dict:
+        """Parâmetros de messages.create (menos o modelo)"""
+        return {
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": system_prompt if system_prompt else "Você é um especialista em GameFi e Web3 Gaming.",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        }
+    
+    def _finish(self, stage: Dict, message, model: str, job_type: str) -> str:
+        """Contabiliza o uso e limpa a resposta"""
+        # Tokens e custo entram no evento do estágio (modelo que de fato respondeu)
+        stage["model"] = model
+        stage.update(usage_tracker.record(model, job_type, message.usage))
         
-        # Remove múltiplas quebras de linha
-        response = re.sub(r'\n{3,}', '\n\n', response)
+        response = message.content[0].text
         
-        # Remove espaços extras
-        response = response.strip()
+        # Limpa a resposta removendo tags internas
+        response = self._clean_response(response)
         
+        stage["response_chars"] = len(response)
+        logger.success(
+            f"Claude respondeu ({len(response)} caracteres, "
+            f"{stage['input_tokens']}+{stage['output_tokens']} tokens, US$ {stage['cost_usd']:.4f})"
+        )
         return response
     
-    def _call_claude(self, prompt: str, system_prompt: str = "") -> Optional[str]:
+    def _cached(self, stage: Dict, cache_key: str) -> Optional[str]:
+        """Resposta do cache de respostas (só em teste/replay), sem custo"""
+        response = response_cache.get(cache_key)
+        if response is not None:
+            stage["cache"] = "hit"
+            stage["response_chars"] = len(response)
+            logger.info(f"♻️ Resposta do Claude reaproveitada do cache ({len(response)} caracteres)")
+        return response
+    
+    def _fail(self, stage: Dict, error: Exception):
+        """Registra a falha da chamada no estágio e no log"""
+        stage["error"] = type(error).__name__
+        if isinstance(error, CircuitOpenError):
+            logger.error(str(error))
+        elif isinstance(error, anthropic.APIError):
+            logger.error(f"Erro na API do Claude: {str(error)}")
+        else:
+            logger.error(f"Erro inesperado ao chamar Claude: {str(error)}")
+    
+    def _call_claude(self, prompt: str, system_prompt: str = "", job_type: str = "geral",
+                     model: Optional[str] = None, max_tokens: int = CLAUDE_MAX_TOKENS,
+                     temperature: float = CLAUDE_TEMPERATURE) -> Optional[str]:
         """
         Chama a API do Claude
         
         Args:
             prompt: Prompt principal
             system_prompt: Prompt de sistema (opcional)
+            job_type: Tipo de geração, para a contabilidade de tokens/custo
+            model: Modelo (padrão: CLAUDE_MODEL)
+            max_tokens: Limite de tokens da resposta
+            temperature: Temperatura
         
         Returns:
-            Resposta do Claude ou None em caso de erro
+            Resposta do Claude ou None em caso de erro (após as retentativas)
         """
-        try:
-            logger.processing(f"Chamando Claude API ({self.model})...")
-            
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=CLAUDE_MAX_TOKENS,
-                temperature=CLAUDE_TEMPERATURE,
-                system=system_prompt if system_prompt else "Você é um especialista em GameFi e Web3 Gaming.",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
+        # Orçamento diário estourado: modelo mais barato
+        model = usage_tracker.model_for(model or self.model)
+        
+        request = self._request(prompt, system_prompt, max_tokens, temperature)
+        
+        with logger.stage("claude", model=model, prompt_chars=len(prompt)) as stage:
+            cache_key = response_cache.key(model, request)
+            cached = self._cached(stage, cache_key)
+            if cached is not None:
+                return cached
+            try:
+                logger.processing(f"Chamando Claude API ({model})...")
+                message, answered_by = self.claude.create(model, **request)
+                response = self._finish(stage, message, answered_by, job_type)
+            except Exception as e:
+                self._fail(stage, e)
+                return None
+            response_cache.put(cache_key, response, answered_by)
+            return response
+    
+    async def _acall_claude(self, prompt: str, system_prompt: str, job_type: str, draft: int,
+                            model: Optional[str] = None) -> Optional[str]:
+        """Versão assíncrona de _call_claude para os rascunhos (roda no loop compartilhado)"""
+        model = model or self.model
+        request = self._request(prompt, system_prompt, CLAUDE_MAX_TOKENS, CLAUDE_TEMPERATURE)
+        with logger.stage("claude", model=model, prompt_chars=len(prompt), draft=draft) as stage:
+            cache_key = response_cache.key(model, request, variant=draft)
+            cached = await asyncio.to_thread(self._cached, stage, cache_key)
+            if cached is not None:
+                return cached
+            try:
+                message, answered_by = await self.claude.acreate(model, **request)
+                # A contabilização grava o arquivo de uso (lock + fsync): fora do loop
+                response = await asyncio.to_thread(self._finish, stage, message, answered_by, job_type)
+            except Exception as e:
+                self._fail(stage, e)
+                return None
+            await asyncio.to_thread(response_cache.put, cache_key, response, answered_by)
+            return response
+    
+    async def _drafts_async(self, prompt: str, system_prompt: str, job_type: str, count: int) -> List[Optional[str]]:
+        model = usage_tracker.model_for(self.model)
+        return await asyncio.gather(*(
+            self._acall_claude(prompt, system_prompt, job_type, draft=i + 1, model=model)
+            for i in range(count)
+        ))
+    
+    def _generate_drafts(self, prompt: str, system_prompt: str, job_type: str) -> List[str]:
+        """
+        Gera CLAUDE_DRAFTS rascunhos em paralelo (AsyncAnthropic no loop compartilhado)
+        
+        Com 1 rascunho, ou com o orçamento do dia apertado, faz a chamada
+        síncrona de sempre.
+        
+        Returns:
+            Rascunhos que vieram (sem as chamadas que falharam)
+        """
+        count = CLAUDE_DRAFTS if usage_tracker.budget_state() == BUDGET_OK else 1
+        if count <= 1:
+            response = self._call_claude(prompt, system_prompt, job_type=job_type)
+            return [response] if response else []
+        
+        logger.processing(f"Gerando {count} rascunhos em paralelo ({self.model})...")
+        responses = shared_loop.run(self._drafts_async(prompt, system_prompt, job_type, count))
+        drafts = [response for response in responses if response]
+        logger.info(f"✓ {len(drafts)}/{count} rascunho(s) recebidos")
+        return drafts
+    
+    def _best_draft(self, drafts: List[str], post_type: str, candidates: List[Dict]) -> Optional[int]:
+        """Índice do rascunho com melhor pontuação local (formato, tamanho, links, novidade)"""
+        if len(drafts) <= 1:
+            return 0 if drafts else None
+        recent_titles = [post.get('title', '') for post in db.get_recent_posts(days=7)]
+        best, scores = pick_best(drafts, post_type, [news['url'] for news in candidates], recent_titles)
+        for i, (total, parts) in enumerate(scores):
+            logger.debug(
+                "Rascunho %d: %.2f (%s)", i + 1, total,
+                ", ".join(f"{name}={value:.2f}" for name, value in parts.items())
             )
+        logger.info(f"✓ Rascunho {best + 1} escolhido (pontuação {scores[best][0]:.2f})")
+        return best
+    
+    def _select_stories(self, news_list: List[Dict], count: int, criteria: str, job_type: str,
+                        quotas: Optional[Dict[str, int]] = None) -> List[Dict]:
+        """
+        Etapa de seleção: escolhe as notícias que vão para a redação
+        
+        O modelo de seleção (CLAUDE_SELECTION_MODEL) recebe só a lista compacta
+        e responde os IDs em JSON. Se estiver desativado ("local"), falhar ou
+        responder algo inválido, vale o ranking local.
+        
+        Args:
+            news_list: Candidatas
+            count: Quantidade a escolher
+            criteria: Critérios de escolha (texto para o modelo)
+            job_type: Tipo de geração, para a contabilidade de tokens/custo
+            quotas: Mínimo por categoria para o ranking local
+        
+        Returns:
+            Notícias escolhidas, da mais para a menos relevante
+        """
+        if len(news_list) <= count:
+            return list(news_list)
+        
+        with logger.stage("select", source=CLAUDE_SELECTION_MODEL, candidates=len(news_list)) as stage:
+            chosen = []
+            if CLAUDE_SELECTION_MODEL != "local":
+                prompt = (
+                    f"Notícias candidatas (ID entre colchetes):\n\n{compact_candidates(news_list)}\n\n"
+                    f"Escolha exatamente {count} notícia(s). {criteria}\n"
+                    f'Responda APENAS com JSON no formato {{"ids": [ID, ...]}}, da mais para a menos relevante.'
+                )
+                response = self._call_claude(
+                    prompt,
+                    "Você seleciona notícias para um canal brasileiro de GameFi e Web3 Gaming. Responda só JSON.",
+                    job_type=f"{job_type}_selecao",
+                    model=CLAUDE_SELECTION_MODEL,
+                    max_tokens=CLAUDE_SELECTION_MAX_TOKENS,
+                    temperature=0
+                )
+                chosen = parse_selection(response, len(news_list), count)
+                if len(chosen) < count:
+                    logger.warning(f"Seleção do modelo incompleta ({len(chosen)}/{count}). Completando com ranking local.")
             
-            response = message.content[0].text
-            
-            # Limpa a resposta removendo tags internas
-            response = self._clean_response(response)
-            
-            logger.success(f"Claude respondeu ({len(response)} caracteres)")
-            return response
+            # Fallback / complemento: ranking local
+            for index in local_rank(news_list, count, quotas):
+                if len(chosen) >= count:
+                    break
+                if index not in chosen:
+                    chosen.append(index)
             
-        except anthropic.APIError as e:
-            logger.error(f"Erro na API do Claude: {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Erro inesperado ao chamar Claude: {str(e)}")
-            return None
+            stage["chosen"] = len(chosen)
+        
+        logger.info(f"✓ {len(chosen)} notícia(s) selecionada(s) de {len(news_list)} candidatas")
+        return [news_list[i] for i in chosen]
     
     def generate_resumo_diario(self) -> Optional[str]:
         """
@@ -107,27 +270,35 @@ class AIProcessor:
         logger.section("GERANDO RESUMO DIÁRIO")
 
         # Busca notícias reais via NewsAPI (filtra já usadas)
+        # Quantidade de candidatas (reduzida se o orçamento diário estiver no fim)
+        limit = usage_tracker.candidate_limit(10)
+
         logger.info("Buscando notícias atuais via NewsAPI...")
-        news_list = news_fetcher.fetch_recent_news(hours=72, max_results=10, filter_used=True)
+        with logger.stage("fetch", source="newsapi") as stage:
+            news_list = news_fetcher.fetch_recent_news(hours=72, max_results=limit, filter_used=True)
+            stage["news"] = len(news_list)
 
         # Se NewsAPI retornar poucas notícias, complementa com RSS GameFi + Crypto
-        if len(news_list) < 8:
+        if len(news_list) < limit - 2:
             logger.warning(f"NewsAPI retornou apenas {len(news_list)} notícias. Complementando com RSS feeds...")
             from src.rss_fetcher import rss_fetcher
 
             # Calcula quanto precisa de cada tipo
-            total_needed = 10 - len(news_list)
+            total_needed = limit - len(news_list)
             gamefi_needed = max(3, total_needed // 2)  # Mínimo 3 GameFi
             crypto_needed = total_needed - gamefi_needed  # Resto é crypto geral
 
-            rss_news = rss_fetcher.fetch_for_daily_summary(
-                gamefi_count=gamefi_needed,
-                crypto_count=crypto_needed
-            )
+            with logger.stage("fetch", source="rss") as stage:
+                rss_news = rss_fetcher.fetch_for_daily_summary(
+                    gamefi_count=gamefi_needed,
+                    crypto_count=crypto_needed
+                )
+                stage["news"] = len(rss_news)
 
-            # Combina e remove duplicatas E já usadas (limita a 10 total)
+            # Combina e remove duplicatas E já usadas (limita ao total de candidatas)
+            used = news_fetcher.used_urls()  # uma leitura do cache para o lote inteiro
             all_urls = {n['url'] for n in news_list}
-            max_to_add = 10 - len(news_list)
+            max_to_add = limit - len(news_list)
             added = 0
 
             for rss_item in rss_news:
@@ -135,7 +306,7 @@ class AIProcessor:
                     break
                 # Verifica se não é duplicada E se não foi usada
                 if (rss_item['url'] not in all_urls and
-                    not news_fetcher._is_used(rss_item['url'])):
+                    rss_item['url'] not in used):
                     news_list.append(rss_item)
                     all_urls.add(rss_item['url'])
                     added += 1
@@ -160,50 +331,74 @@ class AIProcessor:
             news_fetcher.mark_as_used(news_item['url'])
         logger.info(f"✓ {len(news_list)} notícias marcadas no cache")
 
-        # Formata notícias para o Claude
-        news_context = news_fetcher.format_news_for_ai(news_list)
+        # Etapa 1: seleção das 5 notícias (modelo pequeno ou ranking local)
+        selected = self._select_stories(
+            news_list, 5,
+            "Escolha 3 notícias sobre GAMEFI/Web3 Gaming (gamefi) e 2 sobre MERCADO CRYPTO GERAL (crypto), "
+            "priorizando as mais impactantes de cada categoria.",
+            job_type="resumo_diario",
+            quotas={'gamefi': 3, 'crypto': 2}
+        )
+
+        # Etapa 2: redação só com as notícias escolhidas
+        news_context = news_fetcher.format_news_for_ai(selected)
 
         # Monta o prompt com notícias reais
         base_prompt = get_prompt_resumo_diario()
-        full_prompt = f"{base_prompt}\n\n{news_context}\n\nAgora crie o resumo diário com as 5 notícias MAIS RELEVANTES da lista acima, seguindo EXATAMENTE o formato especificado.\n\n⚠️ IMPORTANTE SOBRE SELEÇÃO:\n- Escolha 3 notícias sobre GAMEFI/Web3 Gaming (marcadas com category: gamefi)\n- Escolha 2 notícias sobre MERCADO CRYPTO GERAL (marcadas com category: crypto)\n- Todas as notícias listadas são NOVAS (nunca foram usadas antes)\n- Priorize as mais impactantes de cada categoria"
+        full_prompt = f"{base_prompt}\n\n{news_context}\n\nAgora crie o resumo diário com as {len(selected)} notícias acima (já selecionadas, na ordem de relevância), seguindo EXATAMENTE o formato especificado.\n\n⚠️ IMPORTANTE:\n- Use TODAS as notícias listadas - elas já foram escolhidas\n- Todas as notícias listadas são NOVAS (nunca foram usadas antes)"
 
         system_prompt = """Você é um curador especializado em GameFi, Web3 Gaming e Crypto Gaming.
-Você receberá uma lista de notícias reais e atuais.
-Sua tarefa é selecionar as 5 MAIS RELEVANTES e criar um resumo formatado.
+Você receberá notícias reais e atuais já selecionadas.
+Sua tarefa é criar um resumo formatado com elas.
 SEMPRE use as notícias fornecidas - não invente informações.
 Siga EXATAMENTE o formato solicitado.
 IMPORTANTE: Retorne APENAS o resumo final formatado, sem tags ou análise."""
 
-        response = self._call_claude(full_prompt, system_prompt)
+        drafts = self._generate_drafts(full_prompt, system_prompt, job_type="resumo_diario")
+        best = self._best_draft(drafts, "resumo_diario", selected)
+        if best is None:
+            return None
+        response = drafts[best]
 
-        if response:
-            logger.success("Resumo diário gerado com sucesso!")
-            logger.debug(f"Preview: {response[:200]}...")
+        logger.success("Resumo diário gerado com sucesso!")
+        logger.debug("Preview: %s...", response[:200])
 
         return response
     
-    def generate_noticia_relevante(self) -> Optional[str]:
+    def generate_noticia_relevante(self) -> Optional[Dict]:
         """
         Gera uma postagem sobre uma notícia relevante
 
+        O Claude responde o envelope JSON de src/post_envelope.py, validado
+        contra a notícia enviada; a postagem final é montada localmente.
+
         Returns:
-            Texto formatado da notícia ou None em caso de erro
+            {'content': texto formatado, 'title': headline, 'url': fonte}
+            ou None em caso de erro (inclusive envelope inválido)
         """
         logger.section("GERANDO NOTÍCIA RELEVANTE")
 
         # Busca notícias do NewsAPI primeiro (filtra já usadas automaticamente)
+        # Quantidade de candidatas (reduzida se o orçamento diário estiver no fim)
+        limit = usage_tracker.candidate_limit(10)
+
         logger.info("Buscando notícias via NewsAPI...")
-        news_list = news_fetcher.fetch_recent_news(hours=72, max_results=10, filter_used=True)
+        with logger.stage("fetch", source="newsapi") as stage:
+            news_list = news_fetcher.fetch_recent_news(hours=72, max_results=limit, filter_used=True)
+            stage["news"] = len(news_list)
 
-        # Se NewsAPI retornar poucas notícias, complementa com RSS (máximo 10 no total)
-        if len(news_list) < 5:
+        # Se NewsAPI retornar poucas notícias, complementa com RSS (máximo `limit` no total)
+        if len(news_list) < min(5, limit):
             logger.warning(f"NewsAPI retornou apenas {len(news_list)} notícias. Complementando com RSS feeds...")
             from src.rss_fetcher import rss_fetcher
-            rss_news = rss_fetcher.fetch_all(hours=72)
+            with logger.stage("fetch", source="rss") as stage:
+                rss_news = rss_fetcher.fetch_all(hours=72)
+                stage["news"] = len(rss_news)
 
-            # Combina e remove duplicatas E já usadas (limita a 10 total)
+            # Combina e remove duplicatas E já usadas (limita ao total de candidatas)
+            used = news_fetcher.used_urls()  # uma leitura do cache para o lote inteiro
             all_urls = {n['url'] for n in news_list}
-            max_to_add = 10 - len(news_list)  # Limita total em 10
+            max_to_add = limit - len(news_list)
             added = 0
 
             for rss_item in rss_news:
@@ -211,12 +406,12 @@ IMPORTANTE: Retorne APENAS o resumo final formatado, sem tags ou análise."""
                     break
                 # Verifica se não é duplicada E se não foi usada
                 if (rss_item['url'] not in all_urls and
-                    not news_fetcher._is_used(rss_item['url'])):
+                    rss_item['url'] not in used):
                     news_list.append(rss_item)
                     all_urls.add(rss_item['url'])
                     added += 1
 
-            logger.info(f"Total após RSS (filtrando já usadas): {len(news_list)} notícias (máx 10)")
+            logger.info(f"Total após RSS (filtrando já usadas): {len(news_list)} notícias (máx {limit})")
 
         if not news_list:
             logger.error("Não foi possível buscar notícias novas. Todas já foram usadas.")
@@ -225,37 +420,70 @@ IMPORTANTE: Retorne APENAS o resumo final formatado, sem tags ou análise."""
         if len(news_list) < 3:
             logger.warning(f"⚠️ ATENÇÃO: Apenas {len(news_list)} notícia(s) nova(s) disponível(is)!")
 
-        # Formata notícias para o Claude
-        news_context = news_fetcher.format_news_for_ai(news_list, include_usage_info=True)
+        # Etapa 1: seleção da notícia mais relevante (modelo pequeno ou ranking local)
+        selected = self._select_stories(
+            news_list, 1,
+            "Escolha a mais impactante para o público GameFi brasileiro "
+            "(investimentos, lançamentos, parcerias, incidentes de segurança, regulação).",
+            job_type="noticia_relevante"
+        )
+
+        # Texto completo da página (opcional, ARTICLE_ENRICH): a análise não fica só no resumo do feed
+        enriched = article_enricher.enrich(selected)
+
+        # Etapa 2: redação só com a notícia escolhida
+        news_context = news_fetcher.format_news_for_ai(selected)
 
         # Monta o prompt com notícias reais
         base_prompt = get_prompt_noticia_relevante()
-        full_prompt = f"{base_prompt}\n\n{news_context}\n\nAgora escolha a notícia MAIS RELEVANTE da lista acima e crie uma análise detalhada seguindo EXATAMENTE o formato especificado. Use o URL real da notícia escolhida.\n\n⚠️ IMPORTANTE: Todas as notícias listadas são NOVAS (nunca foram usadas antes) - escolha a mais impactante para o público GameFi."
+        source_note = (
+            "Use os fatos do 'Trecho do artigo' (texto da própria matéria) e não acrescente dados que não estejam nele.\n\n"
+            if enriched else ""
+        )
+        full_prompt = (
+            f"{base_prompt}\n\n{news_context}\n\nAgora crie uma análise detalhada da notícia acima "
+            f"(já selecionada como a mais relevante) seguindo EXATAMENTE o formato especificado.\n\n"
+            f"{source_note}{ENVELOPE_INSTRUCTIONS}"
+        )
 
         system_prompt = """Você é um analista especializado em GameFi, Web3 Gaming e Crypto Gaming.
-Você receberá uma lista de notícias reais e atuais.
-Sua tarefa é escolher a MAIS RELEVANTE e criar uma análise detalhada.
-SEMPRE use as notícias fornecidas - não invente informações.
-SEMPRE inclua o URL real da notícia que você escolher.
+Você receberá uma notícia real e atual, já selecionada como a mais relevante.
+Sua tarefa é criar uma análise detalhada dela.
+SEMPRE use a notícia fornecida - não invente informações.
 Siga EXATAMENTE o formato estruturado solicitado.
-IMPORTANTE: Retorne APENAS o conteúdo final formatado, sem tags ou análise."""
-
-        response = self._call_claude(full_prompt, system_prompt)
+IMPORTANTE: Retorne APENAS o objeto JSON pedido, sem tags ou análise."""
+
+        drafts = self._generate_drafts(full_prompt, system_prompt, job_type="noticia_relevante")
+
+        # Valida o envelope de cada rascunho contra a notícia enviada (sem segunda chamada se falhar)
+        envelopes = []
+        for i, response in enumerate(drafts, 1):
+            envelope = parse_envelope(response)
+            if envelope is None:
+                logger.error(f"Rascunho {i}: resposta sem o envelope JSON esperado - descartado")
+                logger.debug("Resposta: %s", response[:300])
+                continue
+            envelope, errors = validate_envelope(envelope, selected)
+            if envelope is None:
+                logger.error(f"Rascunho {i}: envelope inválido - descartado: {'; '.join(errors)}")
+                continue
+            envelopes.append(envelope)
+
+        rendered = [render_noticia(envelope) for envelope in envelopes]
+        best = self._best_draft(rendered, "noticia_relevante", selected)
+        if best is None:
+            logger.error("Nenhum rascunho válido da notícia relevante - geração descartada")
+            return None
+        envelope, content = envelopes[best], rendered[best]
 
-        if response:
-            # Extrai URL da notícia usada e marca como usada
-            url_match = re.search(r'https?://[^\s\)]+', response)
-            if url_match:
-                used_url = url_match.group(0).rstrip('.,;)')
-                news_fetcher.mark_as_used(used_url)
-                logger.info(f"✓ Notícia marcada como usada: {used_url[:60]}...")
-            else:
-                logger.warning("URL não encontrado na resposta - não foi possível marcar como usada")
+        # Marca exatamente a notícia que o envelope declara ter usado
+        news_fetcher.mark_as_used(envelope['story']['url'])
+        logger.info(f"✓ Notícia marcada como usada: {envelope['url'][:60]}...")
 
-            logger.success("Notícia relevante gerada com sucesso!")
-            logger.debug(f"Preview: {response[:200]}...")
+        logger.success("Notícia relevante gerada com sucesso!")
+        logger.debug("Preview: %s...", content[:200])
 
-        return response
+        return {"content": content, "title": envelope['title'], "url": envelope['url']}
     
     def test_connection(self) -> bool:
         """
@@ -267,7 +495,8 @@ IMPORTANTE: Retorne APENAS o conteúdo final formatado, sem tags ou análise."""
         try:
             logger.processing("Testando conexão com Claude API...")
             
-            test_message = self.client.messages.create(
+            # Direto no SDK (sem retentativas): o teste deve falhar rápido
+            test_message = self.claude.client.messages.create(
                 model=self.model,
                 max_tokens=100,
                 messages=[
@@ -278,6 +507,8 @@ IMPORTANTE: Retorne APENAS o conteúdo final formatado, sem tags ou análise."""
                 ]
             )
             
+            usage_tracker.record(self.model, "test_connection", test_message.usage)
+            
             if test_message.content[0].text:
                 logger.success("Conexão com Claude API OK!")
                 return True
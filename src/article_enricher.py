@@ -0,0 +1,328 @@
+"""
+Texto completo das notícias escolhidas para a redação
+
+O feed só traz título e um resumo curto. Com ARTICLE_ENRICH=true, as
+páginas das notícias mais relevantes são baixadas em paralelo (limite de
+downloads simultâneos, de tempo total e de bytes por página), o texto
+principal é extraído (utils/html_text.extract_article) e um trecho entra no
+prompt como 'article_excerpt'.
+
+O texto extraído fica em data/article_cache.json pela URL canônica (a
+declarada pela página, ou a URL sem parâmetros de rastreamento); a URL
+pedida e a final (depois de redirects) viram apelidos dela. Páginas que não
+são artigo também ficam no cache (texto vazio) para não serem baixadas de
+novo. Falhas de rede não entram no cache e nunca interrompem a geração.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+
+from config.config import (
+    ARTICLE_ENRICH_ENABLED,
+    ARTICLE_ENRICH_TOP_K,
+    ARTICLE_FETCH_CONCURRENCY,
+    ARTICLE_FETCH_TIMEOUT_SECONDS,
+    ARTICLE_FETCH_MAX_BYTES,
+    ARTICLE_EXCERPT_CHARS,
+    ARTICLE_CACHE_FILE,
+    ARTICLE_CACHE_MAX_ENTRIES,
+    ARTICLE_CACHE_TTL_HOURS
+)
+from src.prompt_builder import truncate_words
+from utils.event_loop import shared_loop
+from utils.html_text import extract_article
+from utils.logger import logger
+from utils.state import JsonStateFile
+
+
+USER_AGENT = "Mozilla/5.0 (compatible; GameFiRadarBR/1.0; +https://t.me/gamefiradarbr)"
+
+# Parâmetros de rastreamento removidos na URL canônica
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src", "mc_cid", "mc_eid", "guccounter", "cmpid"}
+
+# Páginas que só redirecionam via JavaScript (nunca têm o texto)
+SKIP_HOSTS = {"news.google.com"}
+
+# Texto guardado no cache por artigo (o trecho do prompt sai daqui)
+CACHED_TEXT_CHARS = 10000
+
+
+def canonical_url(url: str) -> str:
+    """URL normalizada: esquema/host minúsculos, sem fragmento, barra final nem utm_*"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if (parts.scheme == "https" and host.endswith(":443")) or (parts.scheme == "http" and host.endswith(":80")):
+        host = host.rsplit(":", 1)[0]
+    query = urlencode([
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in TRACKING_PARAMS
+    ])
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), host, path, query, ""))
+
+
+class ArticleEnricher:
+    """Baixa, extrai e guarda o texto principal das notícias"""
+
+    def __init__(self, enabled: bool = ARTICLE_ENRICH_ENABLED, top_k: int = ARTICLE_ENRICH_TOP_K,
+                 concurrency: int = ARTICLE_FETCH_CONCURRENCY, timeout: float = ARTICLE_FETCH_TIMEOUT_SECONDS,
+                 max_bytes: int = ARTICLE_FETCH_MAX_BYTES, excerpt_chars: int = ARTICLE_EXCERPT_CHARS,
+                 cache_file=ARTICLE_CACHE_FILE, cache_max_entries: int = ARTICLE_CACHE_MAX_ENTRIES,
+                 cache_ttl_hours: float = ARTICLE_CACHE_TTL_HOURS):
+        self.enabled = enabled
+        self.top_k = max(1, top_k)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.excerpt_chars = excerpt_chars
+        self.cache_file = cache_file
+        self._cache: Optional[JsonStateFile] = None
+        self.cache_max_entries = max(1, cache_max_entries)
+        self.cache_ttl_seconds = cache_ttl_hours * 3600
+
+    @property
+    def cache(self) -> JsonStateFile:
+        """Cache em disco (aberto só no primeiro uso: desligado, nada é criado)"""
+        if self._cache is None:
+            self._cache = JsonStateFile(self.cache_file, self._empty_cache)
+        return self._cache
+
+    @staticmethod
+    def _empty_cache() -> Dict:
+        """Textos por URL canônica e apelidos (URL pedida/final -> canônica)"""
+        return {"articles": {}, "aliases": {}}
+
+    def _expired(self, entry: Dict, now: float) -> bool:
+        return self.cache_ttl_seconds > 0 and now - entry["fetched"] > self.cache_ttl_seconds
+
+    def _lookup(self, url: str) -> Optional[str]:
+        """Texto guardado para a URL (ou para a canônica dela); None se ausente ou vencido"""
+        key = canonical_url(url)
+        now = time.time()
+        with self.cache.update() as cache:
+            canonical = cache["aliases"].get(key, key)
+            entry = cache["articles"].get(canonical)
+            if entry is None or self._expired(entry, now):
+                return None
+            entry["used"] = now
+            return entry["text"]
+
+    def _store(self, url: str, final_url: str, declared: Optional[str], text: str):
+        """Guarda o texto pela URL canônica e despeja vencidos e menos usados"""
+        canonical = canonical_url(urljoin(final_url, declared) if declared else final_url)
+        now = time.time()
+        with self.cache.update() as cache:
+            articles, aliases = cache["articles"], cache["aliases"]
+            articles[canonical] = {"text": text[:CACHED_TEXT_CHARS], "fetched": now, "used": now}
+            for alias in {canonical_url(url), canonical_url(final_url)} - {canonical}:
+                aliases[alias] = canonical
+
+            dropped = {key for key, entry in articles.items() if self._expired(entry, now)}
+            excess = len(articles) - len(dropped) - self.cache_max_entries
+            if excess > 0:
+                alive = sorted((key for key in articles if key not in dropped), key=lambda k: articles[k]["used"])
+                dropped.update(alive[:excess])
+            for key in dropped:
+                del articles[key]
+            for alias in [alias for alias, target in aliases.items() if target not in articles]:
+                del aliases[alias]
+
+    def _download(self, url: str) -> Tuple[str, str]:
+        """HTML da página (até max_bytes, dentro do tempo total) e a URL final"""
+        deadline = time.monotonic() + self.timeout
+        with requests.get(url, headers={"User-Agent": USER_AGENT, "Accept": "text/html"},
+                          timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "").lower()
+            if "html" not in content_type:
+                raise ValueError(f"conteúdo não é HTML ({content_type or '?'})")
+
+            chunks, size = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break  # artigo grande: o começo da página basta
+                if time.monotonic() > deadline:
+                    raise requests.Timeout(f"download passou de {self.timeout:g}s")
+
+            # Sem charset no cabeçalho o requests assume latin-1; as páginas são utf-8
+            encoding = response.encoding if "charset" in content_type else "utf-8"
+            raw = b"".join(chunks)[:self.max_bytes]
+            try:
+                return raw.decode(encoding or "utf-8", errors="replace"), response.url
+            except LookupError:
+                return raw.decode("utf-8", errors="replace"), response.url
+
+    def fetch(self, url: str) -> Optional[str]:
+        """
+        Texto principal de uma notícia (cache primeiro)
+
+        Returns:
+            Texto ("" se a página não é um artigo) ou None se o download falhou
+        """
+        host = urlsplit(url).netloc.lower()
+        with logger.stage("article_fetch", source=host or "?") as stage:
+            cached = self._lookup(url)
+            if cached is not None:
+                stage["cache"] = "hit"
+                stage["chars"] = len(cached)
+                return cached
+
+            try:
+                page, final_url = self._download(url)
+            except (requests.RequestException, ValueError) as e:
+                stage["error"] = type(e).__name__
+                logger.warning(f"Não foi possível baixar o artigo ({host}): {str(e)[:120]}")
+                return None
+
+            text, declared = extract_article(page)
+            stage["bytes"] = len(page)
+            stage["chars"] = len(text)
+            self._store(url, final_url, declared, text)
+            if not text:
+                logger.debug("Página sem texto de artigo: %s", url)
+            return text
+
+    async def _fetch_all(self, urls: List[str]) -> List[Optional[str]]:
+        """Downloads em paralelo (até `concurrency` ao mesmo tempo), na ordem pedida"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_one(url: str) -> Optional[str]:
+            async with semaphore:
+                try:
+                    # Margem para a extração; o download em si já respeita o tempo total
+                    return await asyncio.wait_for(asyncio.to_thread(self.fetch, url), self.timeout + 2)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Artigo demorou demais, seguindo sem ele: {url[:60]}...")
+                    return None
+
+        return await asyncio.gather(*(fetch_one(url) for url in urls))
+
+    def enrich(self, news_list: List[Dict], top_k: Optional[int] = None) -> int:
+        """
+        Adiciona 'article_excerpt' às notícias mais relevantes
+
+        Args:
+            news_list: Notícias escolhidas, da mais para a menos relevante (alteradas no lugar)
+            top_k: Quantas baixar (padrão ARTICLE_ENRICH_TOP_K)
+
+        Returns:
+            Quantas notícias ganharam trecho do artigo (0 se desligado)
+        """
+        if not self.enabled or not news_list:
+            return 0
+
+        targets = [
+            news for news in news_list[:top_k or self.top_k]
+            if news.get('url') and urlsplit(news['url']).netloc.lower() not in SKIP_HOSTS
+        ]
+        if not targets:
+            return 0
+
+        with logger.stage("enrich", source="articles") as stage:
+            texts = shared_loop.run(self._fetch_all([news['url'] for news in targets]))
+            enriched = 0
+            for news, text in zip(targets, texts):
+                if text:
+                    news['article_excerpt'] = truncate_words(" ".join(text.split()), self.excerpt_chars)
+                    enriched += 1
+            stage["articles"] = enriched
+            stage["requested"] = len(targets)
+
+        logger.info(f"📰 Texto completo obtido para {enriched}/{len(targets)} notícia(s)")
+        return enriched
+
+
+# Instância global do enriquecimento de artigos
+article_enricher = ArticleEnricher()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import threading
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+    from pathlib import Path
+
+    assert canonical_url("HTTPS://Site.com:443/a/b/?utm_source=x&id=3#top") == "https://site.com/a/b?id=3"
+    assert canonical_url("https://site.com") == "https://site.com/"
+
+    paragraph = "<p>Sky Mavis announced a $10 million fund for Axie Infinity: Origins, with grants, tournaments and onboarding.</p>"
+    article = (
+        '<html><head><link rel="canonical" href="/artigo"></head><body><nav><p>Home, News, Markets, Gaming</p></nav>'
+        f'<article><div class="content">{paragraph * 30}</div></article></body></html>'
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "artigo").write_text(article, encoding="utf-8")
+        (root / "vazio").write_text("<html><body><p>Accept cookies.</p></body></html>", encoding="utf-8")
+        (root / "grande").write_text(article.replace(paragraph * 30, paragraph * 3000), encoding="utf-8")
+
+        class Handler(SimpleHTTPRequestHandler):
+            """Serve os fixtures como HTML, com atraso (simula a latência de sites reais)"""
+            def guess_type(self, path):
+                return "text/html; charset=utf-8"
+
+            def do_GET(self):
+                time.sleep(0.3)
+                super().do_GET()
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                pass  # cliente fechou antes do fim (limite de bytes/tempo), de propósito
+
+        server = Server(("127.0.0.1", 0), partial(Handler, directory=tmp))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        enricher = ArticleEnricher(enabled=True, top_k=4, concurrency=4, timeout=3, max_bytes=64 * 1024,
+                                   excerpt_chars=500, cache_file=root / "cache.json")
+        news = [
+            {'url': f"{base}/artigo?utm_source=rss"},
+            {'url': f"{base}/vazio"},
+            {'url': f"{base}/nao-existe"},
+            {'url': f"{base}/grande"},
+        ]
+
+        # Concorrência: 4 páginas com 0,3s de latência cada em ~1 latência
+        start = time.perf_counter()
+        assert enricher.enrich(news) == 2
+        cold = time.perf_counter() - start
+        assert cold < 0.9, cold
+        assert len(news[0]['article_excerpt']) <= 500 and news[0]['article_excerpt'].startswith("Sky Mavis")
+        assert 'article_excerpt' not in news[1] and 'article_excerpt' not in news[2]
+        # Limite de bytes: a página grande foi cortada, mas o começo do artigo veio
+        assert news[3]['article_excerpt'].startswith("Sky Mavis")
+
+        # Cache pela URL canônica: outra URL (sem utm, com a canônica declarada) não baixa de novo
+        with enricher.cache.read() as cache:
+            assert f"{base}/artigo" in cache["articles"] and cache["articles"][f"{base}/vazio"]["text"] == ""
+            assert f"{base}/nao-existe" not in cache["articles"]
+        start = time.perf_counter()
+        again = [{'url': f"{base}/artigo/"}, {'url': f"{base}/vazio"}]
+        assert enricher.enrich(again) == 1
+        warm = time.perf_counter() - start
+        assert warm < 0.2, warm
+
+        # Tempo total: servidor lento demais vira "sem trecho", sem travar a geração
+        slow = ArticleEnricher(enabled=True, timeout=0.1, cache_file=root / "slow.json")
+        assert slow.enrich([{'url': f"{base}/artigo"}]) == 0
+
+        # Desligado e Google News (redirect por JavaScript): nada é baixado
+        assert ArticleEnricher(enabled=False, cache_file=root / "off.json").enrich(news) == 0
+        assert not list(root.glob("off.json*"))
+        assert enricher.enrich([{'url': "https://news.google.com/rss/articles/abc"}]) == 0
+
+        server.shutdown()
+        shared_loop.stop()
+
+    print(f"✅ Enriquecimento de artigos OK | 4 páginas: {cold * 1000:.0f}ms | cache: {warm * 1000:.0f}ms")
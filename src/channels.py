@@ -0,0 +1,95 @@
+"""
+Registro de canais do Telegram para espelhar cada postagem gerada
+
+O conteúdo é gerado uma única vez pelo Claude e cada canal aplica seu
+próprio formatador antes do envio (ex: aviso de staging).
+"""
+
+from typing import Callable, Dict, List
+
+from config.config import TELEGRAM_CHANNEL_ID, TELEGRAM_CHANNELS
+from utils.logger import logger
+
+
+def _format_default(content: str) -> str:
+    """Formatador padrão: conteúdo sem alterações"""
+    return content
+
+
+def _format_staging(content: str) -> str:
+    """Formatador de staging: marca a postagem como teste"""
+    return f"🧪 **[STAGING]**\n\n{content}"
+
+
+class Channel:
+    """Canal de destino com seu formatador"""
+
+    def __init__(self, chat_id: str, formatter: str = "default"):
+        self.chat_id = chat_id
+        self.formatter = formatter
+
+    def __repr__(self) -> str:
+        return f"Channel({self.chat_id}, {self.formatter})"
+
+
+class ChannelRegistry:
+    """Gerencia os canais de destino e os formatadores por canal"""
+
+    def __init__(self):
+        self.formatters: Dict[str, Callable[[str], str]] = {
+            "default": _format_default,
+            "staging": _format_staging,
+        }
+        self.channels: List[Channel] = []
+
+    def register_formatter(self, name: str, formatter: Callable[[str], str]):
+        """
+        Registra um formatador por canal
+
+        Args:
+            name: Nome usado em TELEGRAM_CHANNELS (canal|nome)
+            formatter: Função que recebe o conteúdo gerado e retorna o texto do canal
+        """
+        self.formatters[name] = formatter
+
+    def add_channel(self, chat_id: str, formatter: str = "default"):
+        """Adiciona um canal de destino (ignora repetidos)"""
+        if any(channel.chat_id == chat_id for channel in self.channels):
+            return
+        if formatter not in self.formatters:
+            logger.warning(f"Formatador '{formatter}' desconhecido para {chat_id}. Usando 'default'.")
+            formatter = "default"
+        self.channels.append(Channel(chat_id, formatter))
+
+    def load_from_config(self, channels_spec: str = TELEGRAM_CHANNELS):
+        """
+        Carrega canais da configuração
+
+        Args:
+            channels_spec: Lista 'canal[|formatador]' separada por vírgula
+        """
+        self.channels = []
+
+        for entry in channels_spec.split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            chat_id, _, formatter = entry.partition('|')
+            self.add_channel(chat_id.strip(), formatter.strip() or "default")
+
+        if not self.channels:
+            self.add_channel(TELEGRAM_CHANNEL_ID)
+
+    def format_for(self, channel: Channel, content: str) -> str:
+        """Aplica o formatador do canal ao conteúdo gerado"""
+        return self.formatters[channel.formatter](content)
+
+    @property
+    def primary(self) -> Channel:
+        """Canal principal (o primeiro configurado)"""
+        return self.channels[0]
+
+
+# Instância global do registro de canais
+channel_registry = ChannelRegistry()
+channel_registry.load_from_config()
@@ -0,0 +1,347 @@
+"""
+Cliente resiliente da API do Claude
+
+Envolve anthropic.Anthropic e anthropic.AsyncAnthropic (com as
+retentativas do SDK desligadas) e cuida de:
+- timeout explícito por requisição
+- nova tentativa com backoff exponencial e jitter em overload (529),
+  rate limit (429), erros 5xx e falhas de rede/timeout, respeitando o
+  retry-after quando a API manda
+- troca para um modelo alternativo após N falhas seguidas no modelo pedido
+- circuit breaker: com a API fora do ar, as chamadas falham na hora em vez
+  de esperar timeouts e backoffs a cada job
+
+Cada tentativa é um estágio 'claude_attempt' (fonte = modelo), então
+aparece nas métricas e no log de eventos.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+import anthropic
+
+from config.config import (
+    CLAUDE_TIMEOUT_SECONDS,
+    CLAUDE_MAX_ATTEMPTS,
+    CLAUDE_BACKOFF_BASE_SECONDS,
+    CLAUDE_BACKOFF_MAX_SECONDS,
+    CLAUDE_FALLBACK_MODEL,
+    CLAUDE_FALLBACK_AFTER,
+    CLAUDE_BREAKER_THRESHOLD,
+    CLAUDE_BREAKER_COOLDOWN_SECONDS
+)
+from utils.logger import logger
+
+
+# Status HTTP que valem nova tentativa (além de erros de rede/timeout)
+RETRYABLE_STATUS = {408, 409, 429}
+
+# Estados do circuit breaker
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """API do Claude considerada fora do ar: chamada recusada sem tentar"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Erro transitório (overload, rate limit, 5xx, rede)?"""
+    if isinstance(error, anthropic.APIConnectionError):  # inclui APITimeoutError
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por contagem de falhas seguidas
+
+    closed: chamadas normais. Após `threshold` falhas seguidas abre por
+    `cooldown` segundos (open), recusando tudo. Passado o cooldown deixa uma
+    chamada de teste (half_open): sucesso fecha, falha reabre.
+    """
+
+    def __init__(self, threshold: int = CLAUDE_BREAKER_THRESHOLD,
+                 cooldown: float = CLAUDE_BREAKER_COOLDOWN_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = BREAKER_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            self._state = state
+            logger.event("claude_breaker", state=state, failures=self._failures)
+
+    def allow(self) -> bool:
+        """Pode tentar agora? (em half_open, só uma tentativa por vez)"""
+        if self.threshold <= 0:
+            return True
+        with self._lock:
+            if self._state == BREAKER_OPEN:
+                if self._clock() - self._opened_at < self.cooldown:
+                    return False
+                self._set_state(BREAKER_HALF_OPEN)
+            if self._state == BREAKER_HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self._set_state(BREAKER_CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == BREAKER_HALF_OPEN or (
+                    self.threshold > 0 and self._failures >= self.threshold):
+                if self._state != BREAKER_OPEN:
+                    logger.warning(
+                        f"🔌 Circuit breaker do Claude aberto após {self._failures} falha(s) seguida(s) "
+                        f"- chamadas recusadas por {self.cooldown:.0f}s"
+                    )
+                self._opened_at = self._clock()
+                self._set_state(BREAKER_OPEN)
+
+    def release(self):
+        """Libera a vaga de teste sem contar sucesso nem falha (erro não transitório)"""
+        with self._lock:
+            self._trial_running = False
+
+
+class ClaudeClient:
+    """Chamadas ao Claude com timeout, retentativas, fallback de modelo e circuit breaker"""
+
+    def __init__(self, api_key: str,
+                 timeout: float = CLAUDE_TIMEOUT_SECONDS,
+                 max_attempts: int = CLAUDE_MAX_ATTEMPTS,
+                 backoff_base: float = CLAUDE_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = CLAUDE_BACKOFF_MAX_SECONDS,
+                 fallback_model: str = CLAUDE_FALLBACK_MODEL,
+                 fallback_after: int = CLAUDE_FALLBACK_AFTER,
+                 breaker: Optional[CircuitBreaker] = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 async_sleep: Callable[[float], Awaitable] = asyncio.sleep):
+        # Retentativas ficam aqui, não no SDK (max_retries=0)
+        self.client = anthropic.Anthropic(api_key=api_key, timeout=timeout, max_retries=0)
+        self.async_client = anthropic.AsyncAnthropic(api_key=api_key, timeout=timeout, max_retries=0)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.fallback_model = fallback_model
+        self.fallback_after = fallback_after
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+
+    def _delay(self, attempt: int, error: Exception) -> float:
+        """Backoff exponencial com jitter total; retry-after da API vale como mínimo"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        return min(delay, self.backoff_max)
+
+    def _before_attempt(self, model: str, model_failures: int) -> Tuple[str, int]:
+        """Checa o breaker e decide o modelo da próxima tentativa"""
+        if not self.breaker.allow():
+            raise CircuitOpenError("API do Claude indisponível (circuit breaker aberto)")
+
+        # Falhas seguidas demais no modelo pedido: usa o alternativo
+        if (self.fallback_model and model != self.fallback_model
+                and self.fallback_after > 0 and model_failures >= self.fallback_after):
+            logger.warning(f"🔁 {model_failures} falha(s) em {model}: usando {self.fallback_model}")
+            return self.fallback_model, 0
+        return model, model_failures
+
+    @contextmanager
+    def _attempt(self, model: str, attempt: int) -> Iterator[Dict]:
+        """Estágio 'claude_attempt' de uma tentativa (com o status HTTP em caso de erro)"""
+        with logger.stage("claude_attempt", source=model, attempt=attempt + 1) as stage:
+            try:
+                yield stage
+            except anthropic.APIStatusError as e:
+                stage["status_code"] = e.status_code
+                raise
+
+    def _retry_delay(self, error: anthropic.APIError, attempt: int) -> float:
+        """
+        Registra a falha e devolve a espera até a próxima tentativa
+
+        Levanta o próprio erro se ele não for transitório ou se as
+        tentativas acabaram.
+        """
+        if not is_retryable(error):
+            self.breaker.release()
+            raise error
+        self.breaker.record_failure()
+        if attempt == self.max_attempts - 1:
+            raise error
+        delay = self._delay(attempt, error)
+        logger.warning(
+            f"Claude falhou ({type(error).__name__}) na tentativa {attempt + 1}/{self.max_attempts} "
+            f"- nova tentativa em {delay:.1f}s"
+        )
+        return delay
+
+    def create(self, model: str, **kwargs) -> Tuple[object, str]:
+        """
+        Chama messages.create com retentativas
+
+        Args:
+            model: Modelo pedido
+            **kwargs: Demais parâmetros de messages.create
+
+        Returns:
+            (mensagem, modelo que respondeu)
+
+        Raises:
+            CircuitOpenError: breaker aberto
+            anthropic.APIError: erro não transitório ou tentativas esgotadas
+        """
+        model_failures = 0
+        for attempt in range(self.max_attempts):
+            model, model_failures = self._before_attempt(model, model_failures)
+            try:
+                with self._attempt(model, attempt):
+                    message = self.client.messages.create(model=model, **kwargs)
+            except anthropic.APIError as e:
+                model_failures += 1
+                self._sleep(self._retry_delay(e, attempt))
+                continue
+
+            self.breaker.record_success()
+            return message, model
+
+        raise RuntimeError("inalcançável")  # o laço sempre retorna ou levanta
+
+    async def acreate(self, model: str, **kwargs) -> Tuple[object, str]:
+        """
+        Versão assíncrona de create (AsyncAnthropic)
+
+        Deve rodar sempre no event loop compartilhado (utils.event_loop),
+        onde fica o pool de conexões do cliente assíncrono.
+        """
+        model_failures = 0
+        for attempt in range(self.max_attempts):
+            model, model_failures = self._before_attempt(model, model_failures)
+            try:
+                with self._attempt(model, attempt):
+                    message = await self.async_client.messages.create(model=model, **kwargs)
+            except anthropic.APIError as e:
+                model_failures += 1
+                await self._async_sleep(self._retry_delay(e, attempt))
+                continue
+
+            self.breaker.record_success()
+            return message, model
+
+        raise RuntimeError("inalcançável")
+
+
+if __name__ == "__main__":
+    import httpx
+    from types import SimpleNamespace
+
+    def status_error(status: int, retry_after: Optional[str] = None) -> anthropic.APIStatusError:
+        request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+        headers = {"retry-after": retry_after} if retry_after else {}
+        response = httpx.Response(status, request=request, headers=headers)
+        error_class = {429: anthropic.RateLimitError, 400: anthropic.BadRequestError}.get(
+            status, anthropic.InternalServerError)
+        return error_class("erro simulado", response=response, body=None)
+
+    class FakeMessages:
+        def __init__(self, outcomes):
+            self.outcomes = list(outcomes)
+            self.models = []
+
+        def create(self, model, **kwargs):
+            self.models.append(model)
+            outcome = self.outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return SimpleNamespace(text=outcome)
+
+    def make_client(outcomes, **kwargs):
+        sleeps = []
+        client = ClaudeClient("x", sleep=sleeps.append, fallback_model="haiku", **kwargs)
+        client.client = SimpleNamespace(messages=FakeMessages(outcomes))
+        return client, sleeps
+
+    # 529 seguido de sucesso: uma nova tentativa, no mesmo modelo
+    client, sleeps = make_client([status_error(529), "ok"], max_attempts=3, fallback_after=2)
+    message, model = client.create("sonnet", max_tokens=10)
+    assert message.text == "ok" and model == "sonnet" and len(sleeps) == 1
+
+    # Duas falhas no modelo pedido: a terceira tentativa vai para o alternativo
+    client, sleeps = make_client([status_error(529), status_error(429, "7"), "ok"], max_attempts=4, fallback_after=2)
+    message, model = client.create("sonnet")
+    assert model == "haiku" and client.client.messages.models == ["sonnet", "sonnet", "haiku"]
+    assert sleeps[1] >= 7, sleeps  # retry-after respeitado
+
+    # Erro não transitório: sem nova tentativa
+    client, sleeps = make_client([status_error(400)])
+    try:
+        client.create("sonnet")
+        raise AssertionError("deveria falhar")
+    except anthropic.BadRequestError:
+        assert not sleeps
+
+    # Breaker: abre após 3 falhas, recusa sem chamar, testa após o cooldown
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=3, cooldown=60, clock=lambda: now[0])
+    client, sleeps = make_client([status_error(503)] * 3 + ["ok"], max_attempts=5, breaker=breaker)
+    try:
+        client.create("sonnet")
+        raise AssertionError("deveria abrir o breaker")
+    except CircuitOpenError:
+        pass
+    assert breaker.state == BREAKER_OPEN and len(client.client.messages.models) == 3
+    now[0] = 61
+    assert client.create("sonnet")[0].text == "ok" and breaker.state == BREAKER_CLOSED
+
+    # Caminho assíncrono: mesma política de retentativa
+    class FakeAsyncMessages(FakeMessages):
+        async def create(self, model, **kwargs):
+            return FakeMessages.create(self, model, **kwargs)
+
+    async def no_sleep(delay):
+        pass
+
+    client = ClaudeClient("x", async_sleep=no_sleep, fallback_model="haiku", fallback_after=1)
+    client.async_client = SimpleNamespace(messages=FakeAsyncMessages([status_error(529), "ok"]))
+    message, model = asyncio.run(client.acreate("sonnet"))
+    assert message.text == "ok" and model == "haiku"
+
+    # Jitter sempre dentro de [0, teto do backoff]
+    client, _ = make_client([])
+    for attempt in range(10):
+        assert 0 <= client._delay(attempt, Exception()) <= min(client.backoff_max, client.backoff_base * 2 ** attempt)
+
+    print("✅ Cliente resiliente do Claude OK")
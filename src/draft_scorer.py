@@ -0,0 +1,155 @@
+"""
+Pontuação local de rascunhos (best-of-N)
+
+Quando CLAUDE_DRAFTS > 1, a redação gera vários rascunhos em paralelo e
+fica com o melhor segundo critérios baratos, sem outra chamada ao modelo:
+- formato: estrutura pedida no prompt de cada tipo de postagem
+- tamanho: dentro da faixa alvo
+- links: todos entre as notícias candidatas
+- novidade: headlines diferentes das postagens recentes
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Faixa de tamanho alvo por tipo de postagem (caracteres, já com a seção de fontes)
+LENGTH_TARGETS = {
+    "resumo_diario": (600, 1600),
+    "noticia_relevante": (500, 900),
+}
+
+# Pesos de cada critério (pontuação máxima = soma)
+WEIGHTS = {"format": 4.0, "length": 2.0, "urls": 3.0, "novelty": 2.0}
+
+_URL_RE = re.compile(r'https?://[^\s)\]>"]+')
+_BOLD_RE = re.compile(r'\*\*(.+?)\*\*')
+_BULLET_RE = re.compile(r'^\s*[-•]\s+\S', re.MULTILINE)
+_WORD_RE = re.compile(r'\w{3,}')
+
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def format_score(text: str, post_type: str) -> float:
+    """Fração (0-1) dos itens de formato presentes"""
+    bold = _BOLD_RE.findall(text)
+    if post_type == "resumo_diario":
+        # Cinco itens "EMOJI **Título.** texto", um por parágrafo
+        items = [line for line in text.splitlines() if line.strip() and _BOLD_RE.search(line)]
+        checks = [
+            4 <= len(items) <= 6,
+            len(items) >= 5,
+            not text.lstrip().startswith("**"),   # começa pela introdução
+            "👇" in text,
+        ]
+    else:
+        checks = [
+            text.lstrip().startswith("**"),        # headline em negrito
+            len(bold) >= 3,                        # headline + seções
+            bool(_BULLET_RE.search(text)),         # bullets com os fatos
+            "📎" in text and "Fontes" in text,
+            text.rstrip().splitlines()[-1].startswith("http") if text.strip() else False,
+        ]
+    return sum(checks) / len(checks)
+
+
+def length_score(text: str, post_type: str) -> float:
+    """1 dentro da faixa alvo, caindo linearmente até 0 a 50% de distância"""
+    low, high = LENGTH_TARGETS.get(post_type, (0, 4096))
+    size = len(text)
+    if low <= size <= high:
+        return 1.0
+    distance = (low - size) / low if size < low else (size - high) / high
+    return max(0.0, 1.0 - 2 * distance)
+
+
+def url_score(text: str, candidate_urls: Iterable[str]) -> float:
+    """1 se todos os links são de candidatas (ou não há links); 0 se algum é estranho"""
+    allowed = {url.rstrip('.,;:!?') for url in candidate_urls}
+    found = [url.rstrip('.,;:!?') for url in _URL_RE.findall(text)]
+    return 0.0 if any(url not in allowed for url in found) else 1.0
+
+
+def novelty_score(text: str, recent_titles: Iterable[str]) -> float:
+    """1 - maior semelhança entre as headlines do rascunho e as postagens recentes"""
+    headlines = [_words(h) for h in _BOLD_RE.findall(text)] or [_words(text[:200])]
+    recent = [_words(t) for t in recent_titles if t]
+    if not recent:
+        return 1.0
+    return 1.0 - max(_jaccard(h, r) for h in headlines for r in recent)
+
+
+def score_draft(text: str, post_type: str, candidate_urls: Iterable[str] = (),
+                recent_titles: Iterable[str] = ()) -> Tuple[float, Dict[str, float]]:
+    """
+    Pontua um rascunho
+
+    Returns:
+        (pontuação total, pontuação de cada critério de 0 a 1)
+    """
+    parts = {
+        "format": format_score(text, post_type),
+        "length": length_score(text, post_type),
+        "urls": url_score(text, candidate_urls),
+        "novelty": novelty_score(text, recent_titles),
+    }
+    total = sum(WEIGHTS[name] * value for name, value in parts.items())
+    return round(total, 3), parts
+
+
+def pick_best(drafts: List[str], post_type: str, candidate_urls: Iterable[str] = (),
+              recent_titles: Iterable[str] = ()) -> Tuple[Optional[int], List[Tuple[float, Dict]]]:
+    """
+    Escolhe o melhor rascunho
+
+    Returns:
+        (índice do melhor ou None se não houver rascunhos, pontuações na ordem dos rascunhos).
+        Empate fica com o primeiro.
+    """
+    candidate_urls = list(candidate_urls)
+    recent_titles = list(recent_titles)
+    scores = [score_draft(d, post_type, candidate_urls, recent_titles) for d in drafts]
+    if not scores:
+        return None, scores
+    best = max(range(len(scores)), key=lambda i: (scores[i][0], -i))
+    return best, scores
+
+
+if __name__ == "__main__":
+    urls = ["https://decrypt.co/axie-origins"]
+    good = (
+        "**🚀 Axie levanta US$ 10 milhões para Origins**\n\n"
+        "A Sky Mavis anunciou nova rodada para expandir o Origins, com foco em novos jogadores.\n\n"
+        "**📊 Os fatos:**\n- Rodada de US$ 10 milhões liderada pela Animoca\n"
+        "- 2 milhões de jogadores ativos\n- Lançamento mobile no 1º trimestre\n\n"
+        "**💡 O que significa:**\nO play-to-earn volta a atrair capital quando mostra retenção real.\n\n"
+        "**Será que a nova fase do Axie vai durar?**\n\n"
+        "📎 **Fontes:**\nhttps://decrypt.co/axie-origins"
+    )
+    no_format = "Axie levanta US$ 10 milhões. Veja https://decrypt.co/axie-origins"
+    fake_link = good.replace("https://decrypt.co/axie-origins", "https://inventado.io/x")
+
+    best, scores = pick_best([no_format, fake_link, good], "noticia_relevante", urls)
+    assert best == 2, scores
+    assert scores[1][1]["urls"] == 0.0 and scores[2][1]["format"] == 1.0
+
+    # Headline repetida de uma postagem recente perde para uma nova
+    repeated = score_draft(good, "noticia_relevante", urls, ["Axie levanta US$ 10 milhões para Origins"])
+    fresh = score_draft(good, "noticia_relevante", urls, ["Illuvium lança mainnet"])
+    assert repeated[1]["novelty"] < fresh[1]["novelty"] == 1.0
+
+    resumo = "Bom dia!\nSegunda de mercado agitado e trazemos aqui o que você precisa saber hoje 👇\n\n" + "\n\n".join(
+        f"💰 **Projeto {i} recebe US$ {i} milhões.** Rodada liderada por fundos de gaming para expandir o jogo."
+        for i in range(1, 6)
+    )
+    assert format_score(resumo, "resumo_diario") == 1.0
+    assert length_score("x" * 10, "resumo_diario") == 0.0
+    assert pick_best([], "resumo_diario") == (None, [])
+    print("✅ Pontuação de rascunhos OK")
@@ -3,13 +3,15 @@ Busca notícias reais via NewsAPI com sistema anti-duplicação
 """
 
 import requests
-import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from pathlib import Path
+from typing import List, Dict, Optional, Set
 import os
 
+from config.config import USED_NEWS_CACHE_FILE, PROMPT_NEWS_TOKEN_BUDGET
+from src.prompt_builder import build_news_block, estimate_tokens
+from utils.html_text import html_to_text
 from utils.logger import logger
+from utils.state import JsonStateFile
 
 
 class NewsFetcher:
@@ -22,12 +24,9 @@ class NewsFetcher:
         
         self.base_url = "https://newsapi.org/v2/everything"
         
-        # Arquivo de cache
-        self.cache_file = Path("data/used_news_cache.json")
-        self.cache_file.parent.mkdir(exist_ok=True)
-        
-        # Carrega cache
-        self.used_news = self._load_cache()
+        # Cache de notícias usadas (compartilhado entre scheduler e admin bot)
+        self.cache_file = USED_NEWS_CACHE_FILE
+        self.cache = JsonStateFile(self.cache_file, self._empty_cache)
         
         # Keywords GameFi específicas
         self.keywords = [
@@ -54,38 +53,31 @@ class NewsFetcher:
         
         logger.info("NewsAPI inicializado com cache anti-duplicação")
     
-    def _load_cache(self) -> Dict:
-        """Carrega cache de notícias já usadas"""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {"used_urls": [], "last_cleanup": None}
+    @staticmethod
+    def _empty_cache() -> Dict:
+        """Estrutura vazia do cache de notícias usadas"""
         return {"used_urls": [], "last_cleanup": None}
     
-    def _save_cache(self):
-        """Salva cache de notícias usadas"""
-        with open(self.cache_file, 'w', encoding='utf-8') as f:
-            json.dump(self.used_news, f, indent=2)
-    
     def _clean_old_cache(self):
         """Remove URLs com mais de 30 dias do cache"""
         # Implementação simplificada - limpa tudo a cada 30 dias
-        last_cleanup = self.used_news.get('last_cleanup')
+        with self.cache.update() as cache:
+            last_cleanup = cache.get('last_cleanup')
 
-        if last_cleanup:
-            last_date = datetime.fromisoformat(last_cleanup)
-            days_since = (datetime.now() - last_date).days
+            if last_cleanup:
+                last_date = datetime.fromisoformat(last_cleanup)
+                days_since = (datetime.now() - last_date).days
 
-            if days_since >= 30:
-                self.used_news['used_urls'] = []
-                self.used_news['last_cleanup'] = datetime.now().isoformat()
-                self._save_cache()
-                logger.info("Cache de notícias limpado (30 dias)")
-        else:
-            self.used_news['last_cleanup'] = datetime.now().isoformat()
-            self._save_cache()
+                if days_since >= 30:
+                    cache['used_urls'] = []
+                    cache['last_cleanup'] = datetime.now().isoformat()
+                    logger.info("Cache de notícias limpado (30 dias)")
+            else:
+                cache['last_cleanup'] = datetime.now().isoformat()
+    
+    def clear_cache(self):
+        """Desmarca todas as notícias usadas (memória e arquivo juntos)"""
+        self.cache.reset()
     
     def mark_as_used(self, url: str):
         """
@@ -94,14 +86,26 @@ class NewsFetcher:
         Args:
             url: URL da notícia
         """
-        if url not in self.used_news['used_urls']:
-            self.used_news['used_urls'].append(url)
-            self._save_cache()
-            logger.debug(f"Notícia marcada como usada: {url[:50]}...")
+        with self.cache.update() as cache:
+            if url in cache['used_urls']:
+                return
+            cache['used_urls'].append(url)
+        logger.debug("Notícia marcada como usada: %.50s...", url)
+    
+    def used_urls(self) -> Set[str]:
+        """
+        Conjunto das URLs já usadas (uma leitura do arquivo)
+
+        Laços que filtram várias notícias consultam esta cópia em vez de
+        travar e ler o cache uma vez por notícia.
+        """
+        with self.cache.read() as cache:
+            return set(cache['used_urls'])
     
-    def _is_used(self, url: str) -> bool:
-        """Verifica se notícia já foi usada"""
-        return url in self.used_news['used_urls']
+    def _used_count(self) -> int:
+        """Quantidade de notícias marcadas como usadas"""
+        with self.cache.read() as cache:
+            return len(cache['used_urls'])
     
     def _build_query(self) -> str:
         """Constrói query de busca otimizada"""
@@ -152,7 +156,8 @@ class NewsFetcher:
             
             articles = data.get('articles', [])
             
-            # Processa artigos
+            # Processa artigos (URLs usadas lidas uma vez para o lote inteiro)
+            used = self.used_urls() if filter_used else set()
             news_list = []
             for article in articles:
                 # Filtra artigos sem conteúdo útil
@@ -171,17 +176,17 @@ class NewsFetcher:
                     'signin?'
                 ]
                 if any(pattern in url for pattern in invalid_patterns):
-                    logger.debug(f"URL inválida/redirect detectada, pulando: {url[:50]}...")
+                    logger.debug("URL inválida/redirect detectada, pulando: %.50s...", url)
                     continue
 
                 # Filtra notícias já usadas
-                if filter_used and self._is_used(url):
-                    logger.debug(f"Notícia já usada, pulando: {article.get('title', '')[:50]}...")
+                if url in used:
+                    logger.debug("Notícia já usada, pulando: %.50s...", article.get('title', ''))
                     continue
                 
                 news_item = {
-                    'title': article.get('title', ''),
-                    'description': article.get('description', ''),
+                    'title': html_to_text(article.get('title'), strip_boilerplate=False),
+                    'description': html_to_text(article.get('description')),
                     'url': url,
                     'published_at': article.get('publishedAt', ''),
                     'source': article.get('source', {}).get('name', 'Unknown')
@@ -200,43 +205,38 @@ class NewsFetcher:
             logger.error(f"Erro ao buscar notícias: {str(e)}")
             return []
     
-    def format_news_for_ai(self, news_list: List[Dict], include_usage_info: bool = False) -> str:
+    def format_news_for_ai(self, news_list: List[Dict], include_usage_info: bool = False,
+                           token_budget: int = PROMPT_NEWS_TOKEN_BUDGET) -> str:
         """
         Formata notícias para enviar ao Claude
         
         Args:
-            news_list: Lista de notícias
+            news_list: Lista de notícias, da mais para a menos relevante
             include_usage_info: Se True, adiciona informação sobre notícias já usadas
+            token_budget: Tokens estimados para o bloco (ver src/prompt_builder.py)
         
         Returns:
-            String formatada com todas as notícias
+            String formatada com as notícias que cabem no orçamento
         """
         if not news_list:
             return "Nenhuma notícia encontrada."
         
-        formatted = "NOTÍCIAS DISPONÍVEIS (TODAS SÃO NOVAS - NUNCA FORAM USADAS):\n\n"
-        
+        header = ["NOTÍCIAS DISPONÍVEIS (TODAS SÃO NOVAS - NUNCA FORAM USADAS):\n\n"]
         if include_usage_info:
-            formatted += f"ℹ️ IMPORTANTE: Você já usou {len(self.used_news['used_urls'])} notícias recentemente.\n"
-            formatted += "As notícias abaixo são TODAS NOVAS - escolha livremente.\n\n"
-        
-        for i, news in enumerate(news_list, 1):
-            category = news.get('category', 'gamefi')  # Default gamefi se não tiver
-            formatted += f"{i}. **{news['title']}**\n"
-            formatted += f"   Categoria: {category.upper()}\n"
-            formatted += f"   Fonte: {news['source']}\n"
-            formatted += f"   Data: {news['published_at']}\n"
-            formatted += f"   Descrição: {news['description']}\n"
-            formatted += f"   URL: {news['url']}\n\n"
+            header.append(f"ℹ️ IMPORTANTE: Você já usou {self._used_count()} notícias recentemente.\n")
+            header.append("As notícias abaixo são TODAS NOVAS - escolha livremente.\n\n")
         
+        formatted = build_news_block(news_list, "".join(header), token_budget=token_budget)
+        logger.debug("Bloco de notícias: ~%d tokens (orçamento %d)", estimate_tokens(formatted), token_budget)
         return formatted
     
     def get_cache_stats(self) -> Dict:
         """Retorna estatísticas do cache"""
-        return {
-            'total_used': len(self.used_news['used_urls']),
-            'last_cleanup': self.used_news.get('last_cleanup', 'Nunca')
-        }
+        with self.cache.read() as cache:
+            return {
+                'total_used': len(cache['used_urls']),
+                'last_cleanup': cache.get('last_cleanup') or 'Nunca'
+            }
 
 
 # Instância global
@@ -0,0 +1,159 @@
+"""
+Contrato de saída estruturada da notícia relevante
+
+O Claude responde um envelope JSON em vez de texto livre:
+
+    {"chosen_ids": [1], "title": "🚀 ...", "body": "...", "url": "https://..."}
+
+O envelope é validado localmente contra as notícias candidatas (IDs
+existentes, URL da notícia escolhida, nenhum link fora das candidatas) e a
+postagem final é montada aqui. Geração inválida é rejeitada, sem segunda
+chamada ao modelo.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# Instruções anexadas ao prompt da notícia relevante
+ENVELOPE_INSTRUCTIONS = """FORMATO DA RESPOSTA (OBRIGATÓRIO):
+Responda APENAS com um objeto JSON válido, sem texto antes ou depois e sem ```, com as chaves:
+- "chosen_ids": lista com o número (ID) da notícia usada, ex: [1]
+- "title": a headline com emoji, sem ** (ex: "🚀 Axie levanta US$ 10M para Origins")
+- "body": o restante da postagem (introdução, seções e conclusão), SEM a headline e SEM a seção 📎 Fontes
+- "url": o URL exato da notícia escolhida, copiado da lista
+Não inclua nenhum link que não esteja na lista de notícias."""
+
+MAX_TITLE_LENGTH = 200
+
+_URL_RE = re.compile(r'https?://[^\s)\]>"]+')
+
+
+def _normalize_url(url: str) -> str:
+    return url.strip().rstrip('.,;:!?')
+
+
+def parse_envelope(text: str) -> Optional[Dict]:
+    """
+    Extrai o objeto JSON da resposta (tolera texto ou ``` em volta)
+
+    Returns:
+        Dicionário do envelope ou None se não houver JSON válido
+    """
+    if not text:
+        return None
+    # strict=False: aceita quebras de linha literais dentro das strings
+    decoder = json.JSONDecoder(strict=False)
+    start = text.find('{')
+    while start != -1:
+        try:
+            data, _ = decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            start = text.find('{', start + 1)
+            continue
+        return data if isinstance(data, dict) else None
+    return None
+
+
+def validate_envelope(envelope: Dict, candidates: List[Dict]) -> Tuple[Optional[Dict], List[str]]:
+    """
+    Valida o envelope contra as notícias candidatas
+
+    Args:
+        envelope: Envelope já parseado
+        candidates: Notícias enviadas ao modelo (IDs 1-based, na mesma ordem)
+
+    Returns:
+        (envelope normalizado com a notícia escolhida em 'story', lista de erros).
+        O envelope vem None se houver qualquer erro.
+    """
+    errors = []
+    candidate_urls = {_normalize_url(news['url']) for news in candidates if news.get('url')}
+
+    title = envelope.get('title')
+    body = envelope.get('body')
+    url = envelope.get('url')
+    chosen_ids = envelope.get('chosen_ids')
+
+    if not isinstance(title, str) or not title.strip():
+        errors.append("title ausente")
+    elif len(title) > MAX_TITLE_LENGTH:
+        errors.append("title longo demais")
+    if not isinstance(body, str) or not body.strip():
+        errors.append("body ausente")
+    if not isinstance(url, str) or not url.strip():
+        errors.append("url ausente")
+
+    chosen = []
+    if not isinstance(chosen_ids, list) or not chosen_ids:
+        errors.append("chosen_ids ausente")
+    else:
+        for value in chosen_ids:
+            try:
+                index = int(value) - 1
+            except (TypeError, ValueError):
+                errors.append(f"chosen_id inválido: {value!r}")
+                continue
+            if not 0 <= index < len(candidates):
+                errors.append(f"chosen_id fora da lista: {value!r}")
+            elif candidates[index] not in chosen:
+                chosen.append(candidates[index])
+
+    if errors:
+        return None, errors
+
+    url = _normalize_url(url)
+    story = next((news for news in chosen if _normalize_url(news['url']) == url), None)
+    if story is None:
+        errors.append("url não corresponde à notícia escolhida")
+
+    # Links no texto só podem ser das candidatas (evita URL inventado)
+    for found in _URL_RE.findall(f"{title}\n{body}"):
+        if _normalize_url(found) not in candidate_urls:
+            errors.append(f"link fora das candidatas: {found[:80]}")
+
+    if errors:
+        return None, errors
+
+    return {
+        "chosen_ids": [candidates.index(news) + 1 for news in chosen],
+        "title": title.replace('**', '').strip(),
+        "body": body.strip(),
+        "url": url,
+        "story": story,
+    }, []
+
+
+def render_noticia(envelope: Dict) -> str:
+    """Monta a postagem final (Markdown do Claude) a partir do envelope validado"""
+    return f"**{envelope['title']}**\n\n{envelope['body']}\n\n📎 **Fontes:**\n{envelope['url']}"
+
+
+if __name__ == "__main__":
+    candidates = [
+        {'title': 'A', 'url': 'https://a.com/1'},
+        {'title': 'B', 'url': 'https://b.com/2'},
+    ]
+    good = 'Aqui está:\n```json\n{"chosen_ids": [2], "title": "🚀 **B cresce**", "body": "Texto {com chaves}.\\n- fato", "url": "https://b.com/2."}\n```'
+
+    envelope, errors = validate_envelope(parse_envelope(good), candidates)
+    assert not errors and envelope['url'] == 'https://b.com/2' and envelope['story'] is candidates[1], errors
+    assert envelope['title'] == '🚀 B cresce' and envelope['chosen_ids'] == [2]
+    assert render_noticia(envelope).endswith('📎 **Fontes:**\nhttps://b.com/2')
+
+    bad_cases = [
+        '{"chosen_ids": [3], "title": "x", "body": "y", "url": "https://a.com/1"}',             # ID inexistente
+        '{"chosen_ids": [1], "title": "x", "body": "y", "url": "https://b.com/2"}',             # URL de outra notícia
+        '{"chosen_ids": [1], "title": "x", "body": "ver https://fake.io/z", "url": "https://a.com/1"}',  # link inventado
+        '{"chosen_ids": [1], "title": "", "body": "y", "url": "https://a.com/1"}',              # sem título
+        '{"chosen_ids": "1", "title": "x", "body": "y", "url": "https://a.com/1"}',             # IDs não-lista
+    ]
+    for case in bad_cases:
+        envelope, errors = validate_envelope(parse_envelope(case), candidates)
+        assert envelope is None and errors, case
+
+    assert parse_envelope('{"title": "a\nb"}') == {"title": "a\nb"}
+    assert parse_envelope("sem json") is None
+    assert parse_envelope("[1, 2]") is None
+    print("✅ Envelope da notícia OK")
@@ -0,0 +1,145 @@
+"""
+Montagem do bloco de notícias do prompt com orçamento de tokens
+
+As notícias entram na ordem recebida (a ordem de relevância da seleção).
+Título, metadados e URL de cada uma são obrigatórios; as descrições (HTML
+removido, espaços colapsados) preenchem o que sobra do orçamento, das mais
+para as menos relevantes, cortadas em fim de palavra; depois delas, os
+trechos do texto completo (src/article_enricher.py), se houver. Assim o
+tamanho do prompt fica previsível (PROMPT_NEWS_TOKEN_BUDGET) independente do
+tamanho dos resumos dos feeds.
+"""
+
+import math
+from typing import Dict, List, Optional
+
+from config.config import PROMPT_NEWS_TOKEN_BUDGET, PROMPT_DESCRIPTION_CHARS
+from src.story_ranker import parse_date
+from utils.html_text import html_to_text
+
+
+# Caracteres por token (estimativa conservadora para português/inglês misturados)
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa de tokens sem chamar a API (≈ 3,5 caracteres por token)"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_words(text: str, max_chars: int) -> str:
+    """Corta em fim de palavra, com reticências, se passar de max_chars"""
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 1:
+        return ""
+    cut = text[:max_chars - 1]
+    space = cut.rfind(' ')
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip(' ,;:.-') + '…'
+
+
+def clean_summary(text: Optional[str], max_chars: int = PROMPT_DESCRIPTION_CHARS) -> str:
+    """Resumo em texto puro (utils/html_text.py), cortado em fim de palavra"""
+    return truncate_words(html_to_text(text), max_chars)
+
+
+def _format_date(value: str) -> str:
+    published = parse_date(value)
+    return published.strftime('%Y-%m-%d %H:%M') if published else (value or '?')
+
+
+def build_news_block(news_list: List[Dict], header: str = "",
+                     token_budget: int = PROMPT_NEWS_TOKEN_BUDGET,
+                     description_chars: int = PROMPT_DESCRIPTION_CHARS) -> str:
+    """
+    Monta o bloco de notícias respeitando o orçamento de tokens
+
+    Args:
+        news_list: Notícias, da mais para a menos relevante (numeradas 1..n nessa ordem)
+        header: Texto antes da lista (entra no orçamento)
+        token_budget: Tokens estimados para o bloco inteiro
+        description_chars: Máximo de caracteres por descrição
+
+    Returns:
+        Texto do bloco. Notícias que não cabem nem sem descrição ficam de fora
+        (as últimas do ranking).
+    """
+    budget_chars = int(token_budget * CHARS_PER_TOKEN) - len(header)
+
+    # 1ª passada: partes obrigatórias, por ordem de relevância
+    items = []
+    for i, news in enumerate(news_list, 1):
+        head = (
+            f"{i}. **{truncate_words(html_to_text(news.get('title'), strip_boilerplate=False), 300)}**\n"
+            f"   {news.get('category', 'gamefi').upper()} | {news.get('source', '')} | "
+            f"{_format_date(news.get('published_at', ''))}\n"
+        )
+        tail = f"   URL: {news['url']}\n\n"
+        if len(head) + len(tail) > budget_chars:
+            break
+        budget_chars -= len(head) + len(tail)
+        items.append([head, clean_summary(news.get('description'), description_chars),
+                      news.get('article_excerpt') or "", tail])
+
+    # 2ª passada: descrições com o orçamento que sobrou, também por relevância;
+    # 3ª passada: trechos dos artigos com o que sobrar depois delas
+    for field, prefix in ((1, "   Descrição: "), (2, "   Trecho do artigo: ")):
+        for item in items:
+            text = item[field]
+            room = budget_chars - len(prefix) - 1
+            if not text or room < 40:
+                item[field] = ""
+                continue
+            item[field] = f"{prefix}{truncate_words(text, room)}\n"
+            budget_chars -= len(item[field])
+
+    return header + "".join("".join(item) for item in items)
+
+
+if __name__ == "__main__":
+    long_html = (
+        '<p>Sky Mavis anunciou <b>US$ 10 milhões</b> para o Origins &amp; a expansão mobile.</p>'
+        '<div class="feedflare"><a href="https://feeds.example.com/x"><img src="https://feeds.example.com/y"/></a></div>'
+    ) * 8
+    fixtures = [
+        {'title': f'Notícia {i} sobre GameFi &amp; Web3', 'description': long_html, 'category': 'gamefi',
+         'source': 'Decrypt', 'published_at': 'Mon, 06 Oct 2025 14:30:00 GMT', 'url': f'https://n.com/{i}'}
+        for i in range(1, 11)
+    ]
+    # Corte no meio de uma tag (como o [:200] antigo dos feeds)
+    assert clean_summary('Texto <a href="https://x.com/a') == 'Texto'
+    assert clean_summary('a&nbsp;b <b>c</b>\n\n d') == 'a b c d'
+    assert truncate_words('uma frase bem longa para cortar', 16) == 'uma frase bem…'
+
+    def legacy_format(news_list):
+        formatted = "NOTÍCIAS DISPONÍVEIS (TODAS SÃO NOVAS - NUNCA FORAM USADAS):\n\n"
+        for i, news in enumerate(news_list, 1):
+            formatted += f"{i}. **{news['title']}**\n"
+            formatted += f"   Categoria: {news.get('category', 'gamefi').upper()}\n"
+            formatted += f"   Fonte: {news['source']}\n"
+            formatted += f"   Data: {news['published_at']}\n"
+            formatted += f"   Descrição: {news['description']}\n"
+            formatted += f"   URL: {news['url']}\n\n"
+        return formatted
+
+    header = "NOTÍCIAS DISPONÍVEIS (TODAS SÃO NOVAS - NUNCA FORAM USADAS):\n\n"
+    for count in (1, 5, 10):
+        old = legacy_format(fixtures[:count])
+        new = build_news_block(fixtures[:count], header)
+        assert estimate_tokens(new) <= PROMPT_NEWS_TOKEN_BUDGET
+        assert '<' not in new and '&amp;' not in new
+        assert all(f"https://n.com/{i}" in new for i in range(1, count + 1))
+        print(f"{count:>2} notícias: antigo ~{estimate_tokens(old)} tokens | novo ~{estimate_tokens(new)} tokens")
+
+    # Orçamento pequeno: descrições somem antes das notícias, as últimas do ranking saem primeiro
+    tight = build_news_block(fixtures, header, token_budget=200)
+    assert "1. **" in tight and "10. **" not in tight and estimate_tokens(tight) <= 200
+    # Trecho do artigo entra depois da descrição e só com o orçamento que sobra
+    enriched = dict(fixtures[0], article_excerpt="Texto completo do artigo. " * 100)
+    block = build_news_block([enriched], header)
+    assert block.index("Descrição:") < block.index("Trecho do artigo:") < block.index("URL:")
+    assert estimate_tokens(block) <= PROMPT_NEWS_TOKEN_BUDGET
+    assert "Trecho do artigo" not in build_news_block([enriched] * 10, header)
+    print("✅ Montagem do prompt OK")
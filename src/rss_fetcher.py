@@ -7,6 +7,7 @@ from datetime import datetime, timedelta, timezone
 from typing import List, Dict
 from urllib.parse import quote
 
+from utils.html_text import html_to_text
 from utils.logger import logger
 
 
@@ -71,17 +72,17 @@ class RSSFetcher:
                 encoded_keyword = quote(keyword)
                 url = f"https://news.google.com/rss/search?q={encoded_keyword}&hl=en-US&gl=US&ceid=US:en"
                 
-                logger.debug(f"Buscando Google News: {keyword}")
+                logger.debug("Buscando Google News: %s", keyword)
                 
-                feed = feedparser.parse(url)
+                feed = self._parse_feed(url, "google_news")
                 
                 for entry in feed.entries[:5]:  # Limita 5 por keyword
                     pub_date = self._parse_date(entry.get('published', ''))
 
                     if pub_date >= cutoff_date:
                         news_item = {
-                            'title': entry.get('title', ''),
-                            'description': entry.get('summary', ''),
+                            'title': html_to_text(entry.get('title'), strip_boilerplate=False),
+                            'description': html_to_text(entry.get('summary')),
                             'url': entry.get('link', ''),
                             'published_at': pub_date.isoformat(),
                             'source': 'Google News'
@@ -89,11 +90,21 @@ class RSSFetcher:
                         news_list.append(news_item)
                         
             except Exception as e:
-                logger.debug(f"Erro ao buscar Google News ({keyword}): {str(e)}")
+                logger.debug("Erro ao buscar Google News (%s): %s", keyword, e)
                 continue
         
         return news_list
     
+    def _parse_feed(self, url: str, source: str):
+        """Baixa e interpreta um feed, medindo a latência por fonte"""
+        with logger.stage("rss_feed", source=source) as stage:
+            feed = feedparser.parse(url)
+            stage["entries"] = len(feed.entries)
+            if feed.get('bozo') and not feed.entries:
+                error = feed.get('bozo_exception')
+                stage["error"] = type(error).__name__ if error else "FeedError"
+        return feed
+    
     def fetch_gamefi_rss(self, max_results: int = 10) -> List[Dict]:
         """
         Busca notícias GAMEFI de RSS feeds específicos
@@ -109,10 +120,10 @@ class RSSFetcher:
 
         for feed_name, feed_url in self.gamefi_feeds.items():
             try:
-                logger.debug(f"Buscando {feed_name} GameFi RSS...")
+                logger.debug("Buscando %s GameFi RSS...", feed_name)
 
-                feed = feedparser.parse(feed_url)
-                logger.info(f"{feed_name}: {len(feed.entries)} entries no feed")
+                feed = self._parse_feed(feed_url, feed_name)
+                logger.info("%s: %d entries no feed", feed_name, len(feed.entries))
 
                 for entry in feed.entries[:50]:
                     if len(news_list) >= max_results:
@@ -123,8 +134,8 @@ class RSSFetcher:
                         continue
 
                     news_item = {
-                        'title': entry.get('title', ''),
-                        'description': entry.get('summary', '')[:200] if entry.get('summary') else '',
+                        'title': html_to_text(entry.get('title'), strip_boilerplate=False),
+                        'description': html_to_text(entry.get('summary')),
                         'url': entry.get('link', ''),
                         'published_at': entry.get('published', ''),
                         'source': feed_name.title(),
@@ -133,7 +144,7 @@ class RSSFetcher:
                     news_list.append(news_item)
 
             except Exception as e:
-                logger.debug(f"Erro ao buscar {feed_name}: {str(e)}")
+                logger.debug("Erro ao buscar %s: %s", feed_name, e)
                 continue
 
         logger.info(f"GameFi RSS: {len(news_list)} notícias encontradas")
@@ -161,10 +172,10 @@ class RSSFetcher:
 
         for feed_name, feed_url in self.crypto_feeds.items():
             try:
-                logger.debug(f"Buscando {feed_name} Crypto RSS...")
+                logger.debug("Buscando %s Crypto RSS...", feed_name)
 
-                feed = feedparser.parse(feed_url)
-                logger.info(f"{feed_name}: {len(feed.entries)} entries no feed")
+                feed = self._parse_feed(feed_url, feed_name)
+                logger.info("%s: %d entries no feed", feed_name, len(feed.entries))
 
                 for entry in feed.entries[:100]:
                     if len(news_list) >= max_results:
@@ -174,14 +185,16 @@ class RSSFetcher:
                     if pub_date < cutoff_date:
                         continue
 
-                    title = entry.get('title', '').lower()
-                    description = (entry.get('summary', '') or '').lower()
+                    # Texto visível (sem HTML/atributos) para a classificação e o prompt
+                    title = html_to_text(entry.get('title'), strip_boilerplate=False)
+                    description = html_to_text(entry.get('summary'))
+                    title_lower, description_lower = title.lower(), description.lower()
 
                     # Verifica se é crypto geral (não GameFi)
-                    if any(term in title or term in description for term in crypto_terms):
+                    if any(term in title_lower or term in description_lower for term in crypto_terms):
                         news_item = {
-                            'title': entry.get('title', ''),
-                            'description': entry.get('summary', '')[:200] if entry.get('summary') else '',
+                            'title': title,
+                            'description': description,
                             'url': entry.get('link', ''),
                             'published_at': entry.get('published', ''),
                             'source': feed_name.title(),
@@ -190,7 +203,7 @@ class RSSFetcher:
                         news_list.append(news_item)
 
             except Exception as e:
-                logger.debug(f"Erro ao buscar {feed_name}: {str(e)}")
+                logger.debug("Erro ao buscar %s: %s", feed_name, e)
                 continue
 
         logger.info(f"Crypto Geral RSS: {len(news_list)} notícias encontradas")
@@ -213,7 +226,7 @@ class RSSFetcher:
         # Busca Google News GameFi
         google_news = self.fetch_google_news(hours)
         all_news.extend(google_news)
-        logger.debug(f"Google News: {len(google_news)} notícias")
+        logger.debug("Google News: %d notícias", len(google_news))
 
         # Busca RSS feeds GameFi
         gamefi_news = self.fetch_gamefi_rss(max_results=10)
@@ -249,12 +262,12 @@ class RSSFetcher:
         # Busca notícias GameFi
         gamefi_news = self.fetch_gamefi_rss(max_results=gamefi_count)
         all_news.extend(gamefi_news)
-        logger.debug(f"GameFi: {len(gamefi_news)} notícias")
+        logger.debug("GameFi: %d notícias", len(gamefi_news))
 
         # Busca notícias Crypto Geral
         crypto_news = self.fetch_crypto_general_rss(max_results=crypto_count)
         all_news.extend(crypto_news)
-        logger.debug(f"Crypto Geral: {len(crypto_news)} notícias")
+        logger.debug("Crypto Geral: %d notícias", len(crypto_news))
 
         # Remove duplicatas (mesmo URL)
         seen_urls = set()
@@ -1,10 +1,9 @@
 """
 Sistema de agendamento para postagens automáticas
 """
-import asyncio
 import schedule
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 
 from config.config import (
@@ -12,12 +11,16 @@ from config.config import (
     SCHEDULE_NOTICIA_RELEVANTE_1,
     SCHEDULE_NOTICIA_RELEVANTE_2,
     TIMEZONE,
-    CHANNEL_NAME
+    CHANNEL_NAME,
+    TELEGRAM_WARMUP_MINUTES
 )
 from src.ai_processor import ai
 from src.telegram_bot import telegram
 from utils.logger import logger
 from utils.database import db
+from utils.event_loop import shared_loop
+from utils.state import runtime_state
+from utils.outbox import outbox
 
 
 class BotScheduler:
@@ -30,47 +33,63 @@ class BotScheduler:
     
     def job_resumo_diario(self):
         """Job: Gera e posta o resumo diário"""
+        if runtime_state.paused:
+            logger.warning("⏸️ Bot pausado - resumo diário não será executado")
+            return
+        
         logger.section(f"🕐 EXECUTANDO JOB: RESUMO DIÁRIO ({self._get_current_time()})")
         
-        try:
-            # Gera conteúdo com IA
-            content = ai.generate_resumo_diario()
-            
-            if content:
-                # Posta no Telegram
-                success = asyncio.run(telegram.post_resumo_diario(content))
+        with logger.job("resumo_diario") as job:
+            try:
+                # Gera conteúdo com IA
+                content = ai.generate_resumo_diario()
                 
-                if success:
-                    logger.success("✅ Resumo diário completado com sucesso!")
+                if content:
+                    # Posta no Telegram
+                    success = shared_loop.run(telegram.post_resumo_diario(content))
+                    
+                    if success:
+                        logger.success("✅ Resumo diário completado com sucesso!")
+                    else:
+                        job["error"] = "PostFailed"
+                        logger.failed("❌ Falha ao postar resumo diário")
                 else:
-                    logger.failed("❌ Falha ao postar resumo diário")
-            else:
-                logger.failed("❌ Falha ao gerar conteúdo do resumo diário")
-                
-        except Exception as e:
-            logger.error(f"Erro no job de resumo diário: {str(e)}")
+                    job["error"] = "GenerationFailed"
+                    logger.failed("❌ Falha ao gerar conteúdo do resumo diário")
+                    
+            except Exception as e:
+                job["error"] = type(e).__name__
+                logger.error(f"Erro no job de resumo diário: {str(e)}")
     
     def job_noticia_relevante(self):
         """Job: Gera e posta uma notícia relevante"""
+        if runtime_state.paused:
+            logger.warning("⏸️ Bot pausado - notícia relevante não será executada")
+            return
+        
         logger.section(f"🕐 EXECUTANDO JOB: NOTÍCIA RELEVANTE ({self._get_current_time()})")
         
-        try:
-            # Gera conteúdo com IA
-            content = ai.generate_noticia_relevante()
-            
-            if content:
-                # Posta no Telegram
-                success = asyncio.run(telegram.post_noticia_relevante(content))
+        with logger.job("noticia_relevante") as job:
+            try:
+                # Gera conteúdo com IA
+                post = ai.generate_noticia_relevante()
                 
-                if success:
-                    logger.success("✅ Notícia relevante completada com sucesso!")
+                if post:
+                    # Posta no Telegram
+                    success = shared_loop.run(telegram.post_noticia_relevante(post['content'], title=post['title']))
+                    
+                    if success:
+                        logger.success("✅ Notícia relevante completada com sucesso!")
+                    else:
+                        job["error"] = "PostFailed"
+                        logger.failed("❌ Falha ao postar notícia relevante")
                 else:
-                    logger.failed("❌ Falha ao postar notícia relevante")
-            else:
-                logger.failed("❌ Falha ao gerar conteúdo da notícia relevante")
-                
-        except Exception as e:
-            logger.error(f"Erro no job de notícia relevante: {str(e)}")
+                    job["error"] = "GenerationFailed"
+                    logger.failed("❌ Falha ao gerar conteúdo da notícia relevante")
+                    
+            except Exception as e:
+                job["error"] = type(e).__name__
+                logger.error(f"Erro no job de notícia relevante: {str(e)}")
     
     def _get_current_time(self) -> str:
         """Retorna horário atual formatado"""
@@ -96,16 +115,48 @@ class BotScheduler:
         schedule.every().day.at(SCHEDULE_NOTICIA_RELEVANTE_2).do(self.job_noticia_relevante)
         logger.info(f"✅ Notícia Relevante 2 agendada para {SCHEDULE_NOTICIA_RELEVANTE_2}")
         
+        # Aquecimento do pool do Telegram antes de cada horário de postagem
+        for slot in (SCHEDULE_RESUMO_DIARIO, SCHEDULE_NOTICIA_RELEVANTE_1, SCHEDULE_NOTICIA_RELEVANTE_2):
+            schedule.every().day.at(self._minutes_before(slot, TELEGRAM_WARMUP_MINUTES)).do(self._warmup_job)
+        logger.info(f"✅ Aquecimento de conexões {TELEGRAM_WARMUP_MINUTES} min antes de cada postagem")
+        
         # Limpeza de banco de dados (todo dia às 00:00)
         schedule.every().day.at("00:00").do(self._cleanup_job)
         logger.info(f"✅ Limpeza de banco agendada para 00:00")
         
         logger.success("Todos os agendamentos configurados!")
     
+    @staticmethod
+    def _minutes_before(slot: str, minutes: int) -> str:
+        """Retorna o horário HH:MM que fica N minutos antes de outro"""
+        slot_time = datetime.strptime(slot, "%H:%M")
+        return (slot_time - timedelta(minutes=minutes)).strftime("%H:%M")
+    
+    def _warmup_job(self):
+        """Job de aquecimento: abre/valida conexões antes da postagem"""
+        try:
+            shared_loop.run(telegram.warm_up(), timeout=60)
+        except Exception as e:
+            logger.warning(f"Falha no aquecimento do Telegram: {str(e)}")
+    
     def _cleanup_job(self):
         """Job de limpeza do banco de dados"""
         logger.info("🧹 Executando limpeza do banco de dados...")
         db.clean_old_posts(days=30)
+        outbox.purge(days=7)
+    
+    def _resume_outbox(self):
+        """Retoma entregas pendentes do outbox sem regerar conteúdo"""
+        if telegram.mode != "production":
+            return
+        
+        try:
+            shared_loop.run(telegram.initialize())
+            delivered = shared_loop.run(telegram.deliver_pending())
+            if delivered:
+                logger.success(f"Outbox: {delivered} entrega(s) pendente(s) concluída(s)")
+        except Exception as e:
+            logger.error(f"Erro ao retomar outbox: {str(e)}")
     
     def run_now(self, job_type: str):
         """
@@ -126,6 +177,9 @@ class BotScheduler:
         self.setup_schedule()
         self.is_running = True
         
+        # Conclui entregas interrompidas antes de qualquer novo job
+        self._resume_outbox()
+        
         logger.section(f"BOT INICIADO: {CHANNEL_NAME}")
         logger.info(f"⏰ Horário atual: {self._get_current_time()}")
         logger.info(f"📅 Próximas execuções:")
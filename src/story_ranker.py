@@ -0,0 +1,194 @@
+"""
+Seleção de notícias para as postagens (primeira etapa do pipeline)
+
+A escolha das notícias é separada da redação: um modelo pequeno (ou o
+ranking local abaixo) recebe uma lista compacta com IDs e devolve os IDs
+escolhidos em JSON. Só as notícias escolhidas vão, completas, para o
+modelo principal escrever a postagem.
+
+O ranking local também é o fallback quando o modelo de seleção falha.
+"""
+
+import json
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+from utils.html_text import html_to_text
+
+
+# Termos que indicam notícia de GameFi / Web3 Gaming
+GAMEFI_TERMS = [
+    'gamefi', 'web3 gaming', 'web3 game', 'blockchain game', 'crypto game', 'play-to-earn',
+    'play to earn', 'p2e', 'nft game', 'metaverse', 'axie', 'illuvium', 'gala games',
+    'immutable', 'ronin', 'the sandbox', 'decentraland', 'big time', 'pixels', 'yield guild',
+    'treeverse', 'off the grid', 'shrapnel', 'parallel', 'sky mavis', 'mythical games'
+]
+
+# Termos que indicam impacto (dinheiro, lançamentos, incidentes)
+IMPACT_TERMS = [
+    'raise', 'raises', 'funding', 'million', 'billion', 'launch', 'launches', 'partnership',
+    'acquire', 'acquisition', 'hack', 'exploit', 'airdrop', 'token', 'sec', 'etf',
+    'record', 'investment', 'mainnet', 'listing'
+]
+
+_JSON_RE = re.compile(r'\{.*\}|\[.*\]', re.DOTALL)
+
+
+def parse_date(value: str) -> Optional[datetime]:
+    """Aceita ISO 8601 (NewsAPI) e RFC 822 (RSS)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def score_story(news: Dict, now: Optional[datetime] = None) -> float:
+    """
+    Pontua uma notícia pela relevância para o canal
+
+    Título pesa mais que descrição; notícias recentes e com descrição
+    ganham bônus.
+    """
+    now = now or datetime.now(timezone.utc)
+    title = (news.get('title') or '').lower()
+    description = (news.get('description') or '').lower()
+
+    score = 0.0
+    for term in GAMEFI_TERMS:
+        if term in title:
+            score += 2
+        elif term in description:
+            score += 1
+    for term in IMPACT_TERMS:
+        if re.search(rf'\b{re.escape(term)}\b', title):
+            score += 1
+
+    published = parse_date(news.get('published_at', ''))
+    if published:
+        age_hours = (now - published).total_seconds() / 3600
+        if age_hours <= 24:
+            score += 2
+        elif age_hours <= 48:
+            score += 1
+
+    if description:
+        score += 0.5
+    return score
+
+
+def local_rank(news_list: List[Dict], count: int, quotas: Optional[Dict[str, int]] = None) -> List[int]:
+    """
+    Escolhe notícias pelo ranking local
+
+    Args:
+        news_list: Candidatas
+        count: Quantidade a escolher
+        quotas: Mínimo por categoria (ex: {'gamefi': 3, 'crypto': 2})
+
+    Returns:
+        Índices (0-based) das escolhidas, da mais para a menos relevante
+    """
+    now = datetime.now(timezone.utc)
+    # Empate: mantém a ordem original
+    ranked = sorted(range(len(news_list)), key=lambda i: (-score_story(news_list[i], now), i))
+
+    chosen: List[int] = []
+    for category, quota in (quotas or {}).items():
+        in_category = [i for i in ranked if news_list[i].get('category', 'gamefi') == category]
+        chosen.extend(in_category[:quota])
+
+    for i in ranked:
+        if len(chosen) >= count:
+            break
+        if i not in chosen:
+            chosen.append(i)
+
+    chosen = chosen[:count]
+    return sorted(chosen, key=ranked.index)
+
+
+def compact_candidates(news_list: List[Dict], description_chars: int = 140) -> str:
+    """Lista compacta (uma linha por notícia, com ID) para o modelo de seleção"""
+    lines = []
+    for i, news in enumerate(news_list, 1):
+        description = html_to_text(news.get('description'))[:description_chars]
+        published = parse_date(news.get('published_at', ''))
+        date = published.strftime('%Y-%m-%d') if published else '?'
+        lines.append(
+            f"[{i}] ({news.get('category', 'gamefi')}) {news.get('source', '')} | "
+            f"{date} | {news.get('title', '')} | {description}"
+        )
+    return '\n'.join(lines)
+
+
+def parse_selection(text: str, total: int, count: int) -> List[int]:
+    """
+    Lê a resposta JSON do modelo de seleção
+
+    Aceita {"ids": [3, 1]} ou [3, 1], com ou sem texto em volta. IDs são
+    1-based como na lista compacta; inválidos e repetidos são ignorados.
+
+    Returns:
+        Índices 0-based (no máximo `count`); lista vazia se nada válido
+    """
+    match = _JSON_RE.search(text or '')
+    if not match:
+        return []
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return []
+
+    ids = data.get('ids', []) if isinstance(data, dict) else data
+    if not isinstance(ids, list):
+        return []
+
+    chosen = []
+    for value in ids:
+        try:
+            index = int(value) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < total and index not in chosen:
+            chosen.append(index)
+    return chosen[:count]
+
+
+if __name__ == "__main__":
+    now = datetime.now(timezone.utc).isoformat()
+    fixtures = [
+        {'title': 'Bitcoin price steady', 'description': 'Market calm', 'category': 'crypto',
+         'source': 'Coindesk', 'published_at': now},
+        {'title': 'Axie Infinity raises $10 million for Origins', 'description': 'Sky Mavis funding',
+         'category': 'gamefi', 'source': 'Decrypt', 'published_at': now},
+        {'title': 'Random lifestyle story', 'description': '', 'category': 'gamefi',
+         'source': 'X', 'published_at': 'Mon, 01 Jan 2001 00:00:00 GMT'},
+        {'title': 'SEC approves new ETF', 'description': 'Investment flows', 'category': 'crypto',
+         'source': 'The Block', 'published_at': now},
+        {'title': 'Illuvium launches mainnet', 'description': 'Web3 gaming milestone',
+         'category': 'gamefi', 'source': 'DappRadar', 'published_at': now},
+    ]
+
+    assert local_rank(fixtures, 1) == [1], local_rank(fixtures, 1)
+    assert set(local_rank(fixtures, 2, {'gamefi': 1, 'crypto': 1})) == {1, 3}
+    assert len(local_rank(fixtures, 10)) == len(fixtures)
+    assert local_rank([], 3) == []
+
+    assert parse_selection('{"ids": [2, 5]}', 5, 2) == [1, 4]
+    assert parse_selection('Claro! ```json\n{"ids": [5, 5, 9, "2"]}\n```', 5, 3) == [4, 1]
+    assert parse_selection('[1]', 5, 1) == [0]
+    assert parse_selection('sem json', 5, 1) == []
+    assert parse_selection('{"ids": "1"}', 5, 1) == []
+
+    print(compact_candidates(fixtures))
+    print("✅ Ranking e parser de seleção OK")
@@ -3,9 +3,13 @@ Bot do Telegram para postar notícias no canal
 """
 
 import asyncio
+from typing import Dict, Optional
+
+import httpx
 from telegram import Bot
 from telegram.constants import ParseMode
 from telegram.error import TelegramError
+from telegram.request import HTTPXRequest
 
 from config.config import (
     TELEGRAM_BOT_TOKEN,
@@ -21,8 +25,37 @@ from config.config import (
     TELEGRAM_POOL_TIMEOUT,
     TELEGRAM_READ_TIMEOUT,
     TELEGRAM_CONNECT_TIMEOUT,
+    TELEGRAM_KEEPALIVE_EXPIRY,
 )
 from utils.database import db
+from utils.event_loop import shared_loop
+from utils.message_splitter import split_html_message
+from utils.telegram_html import markdown_to_html
+from utils.outbox import outbox, STATUS_PENDING, STATUS_SENT, STATUS_DONE, STATUS_EXPIRED
+from src.channels import Channel, channel_registry
+
+
+# Rótulos usados nos logs de entrega
+POST_LABELS = {
+    "resumo_diario": "Resumo diário",
+    "noticia_relevante": "Notícia relevante",
+}
+
+
+class _KeepAliveRequest(HTTPXRequest):
+    """HTTPXRequest cujo pool mantém conexões ociosas vivas por keepalive_expiry segundos"""
+
+    def __init__(self, keepalive_expiry: float, **kwargs):
+        # Antes do super(): o __init__ do HTTPXRequest já chama _build_client()
+        self._limits = httpx.Limits(
+            max_connections=kwargs.get("connection_pool_size", 1),
+            max_keepalive_connections=kwargs.get("connection_pool_size", 1),
+            keepalive_expiry=keepalive_expiry,
+        )
+        super().__init__(**kwargs)
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(**{**self._client_kwargs, "limits": self._limits})
 
 
 class TelegramPoster:
@@ -32,30 +65,84 @@ class TelegramPoster:
         if not TELEGRAM_BOT_TOKEN:
             raise ValueError("TELEGRAM_BOT_TOKEN não configurado!")
         
-        self.bot = Bot(token=TELEGRAM_BOT_TOKEN)
-        self.channel_id = TELEGRAM_CHANNEL_ID
+        self.channel_id = channel_registry.primary.chat_id
         self.mode = MODE
+        self._initialized = False
+        
+        # Um único cliente HTTP (pool de conexões) para toda a vida do processo
+        self.bot = self._build_bot()
         
         logger.info(f"Telegram Bot inicializado (Canal: {CHANNEL_NAME})")
+        if len(channel_registry.channels) > 1:
+            logger.info(f"Canais espelhados: {', '.join(c.chat_id for c in channel_registry.channels)}")
         logger.info(f"Modo: {self.mode.upper()}")
+    
+    def _build_bot(self) -> Bot:
+        """Cria o Bot com cliente HTTP de pool/timeout ajustáveis"""
+        # Mantém conexões ociosas vivas entre o aquecimento e o envio
+        request = _KeepAliveRequest(
+            keepalive_expiry=TELEGRAM_KEEPALIVE_EXPIRY,
+            connection_pool_size=TELEGRAM_POOL_SIZE,
+            pool_timeout=TELEGRAM_POOL_TIMEOUT,
+            read_timeout=TELEGRAM_READ_TIMEOUT,
+            connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
+        )
+        return Bot(token=TELEGRAM_BOT_TOKEN, request=request)
+    
+    async def initialize(self) -> bool:
+        """
+        Abre o pool de conexões e valida o token (uma vez por processo)
         
-        # Reconfigura cliente HTTP do Telegram com pool/timeout ajustáveis
+        Returns:
+            True se inicializado
+        """
+        if self._initialized:
+            return True
         try:
-            from telegram.request import HTTPXRequest
-            request = HTTPXRequest(
-                connection_pool_size=TELEGRAM_POOL_SIZE,
-                pool_timeout=TELEGRAM_POOL_TIMEOUT,
-                read_timeout=TELEGRAM_READ_TIMEOUT,
-                connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
-            )
-            # Substitui o bot por uma instância com request configurado
-            self.bot = Bot(token=TELEGRAM_BOT_TOKEN, request=request)
-        except Exception as _e:
-            logger.warning("Não foi possível aplicar configuração avançada do cliente HTTP do Telegram. Usando padrão.")
+            await self.bot.initialize()
+            self._initialized = True
+            logger.debug("Cliente HTTP do Telegram inicializado")
+        except TelegramError as e:
+            logger.error(f"Erro ao inicializar cliente do Telegram: {str(e)}")
+        return self._initialized
+    
+    async def shutdown(self):
+        """Fecha o pool de conexões"""
+        if not self._initialized:
+            return
+        try:
+            await self.bot.shutdown()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar cliente do Telegram: {str(e)}")
+        self._initialized = False
+        logger.debug("Cliente HTTP do Telegram finalizado")
+    
+    async def health_check(self) -> bool:
+        """
+        Verifica se a API do Telegram responde pelo pool atual
+        
+        Returns:
+            True se saudável
+        """
+        if not await self.initialize():
+            return False
+        try:
+            await self.bot.get_me(read_timeout=TELEGRAM_CONNECT_TIMEOUT)
+            return True
+        except TelegramError as e:
+            logger.warning(f"Health check do Telegram falhou: {str(e)}")
+            return False
+    
+    async def warm_up(self):
+        """Aquece o pool (TLS + keep-alive) pouco antes de um horário agendado"""
+        if self.mode != "production":
+            return
+        if await self.health_check():
+            logger.debug("Pool de conexões do Telegram aquecido")
     
     def _convert_markdown_to_html(self, text: str) -> str:
         """
-        Converte formatação Markdown para HTML (Telegram)
+        Converte formatação Markdown para HTML (Telegram), escapando <, > e &
         
         Args:
             text: Texto com markdown
@@ -63,57 +150,189 @@ class TelegramPoster:
         Returns:
             Texto com tags HTML
         """
-        # Converte ** para negrito <b>
-        import re
-        
-        # Negrito: **texto** -> <b>texto</b>
-        text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-        
-        # Itálico: *texto* -> <i>texto</i> (apenas asterisco único)
-        text = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'<i>\1</i>', text)
-        
-        # Links: [texto](url) -> <a href="url">texto</a>
-        text = re.sub(r'\[(.+?)\]\((.+?)\)', r'<a href="\2">\1</a>', text)
-        
-        return text
+        return markdown_to_html(text)
     
-    async def _send_message(self, text: str) -> bool:
+    async def _send_message(self, text_html: str, chat_id: Optional[str] = None) -> Optional[int]:
         """
-        Envia mensagem para o canal
+        Envia uma mensagem (já em HTML) para um canal
         
         Args:
-            text: Texto a ser enviado
+            text_html: Texto HTML com no máximo 4096 caracteres
+            chat_id: Canal de destino (padrão: canal principal)
         
         Returns:
-            True se enviado com sucesso, False caso contrário
+            message_id da mensagem enviada, ou None em caso de falha
         """
+        chat_id = chat_id or self.channel_id
         try:
-            # Converte markdown para HTML
-            text_html = self._convert_markdown_to_html(text)
-            
-            await self.bot.send_message(
-                chat_id=self.channel_id,
+            message = await self.bot.send_message(
+                chat_id=chat_id,
                 text=text_html,
                 parse_mode=ParseMode.HTML,
                 disable_web_page_preview=False
             )
-            return True
+            return message.message_id
         except TelegramError as e:
-            logger.error(f"Erro ao enviar mensagem: {str(e)}")
-            return False
+            logger.error(f"Erro ao enviar mensagem para {chat_id}: {str(e)}")
+            return None
     
-    async def post_resumo_diario(self, content: str) -> bool:
+    async def _send_to_channel(self, item: Dict, channel: Channel) -> bool:
         """
-        Posta resumo diário no canal
+        Envia o conteúdo de um item do outbox para um canal
+        
+        Aplica o formatador do canal e divide em pedaços se preciso. Os
+        pedaços já enviados ficam registrados no outbox, então uma nova
+        tentativa continua do pedaço que falhou em vez de repetir os anteriores.
         
         Args:
-            content: Conteúdo do resumo
+            item: Item do outbox
+            channel: Canal de destino
         
         Returns:
-            True se postado com sucesso
+            True se todos os pedaços foram enviados
         """
-        logger.section("POSTANDO RESUMO DIÁRIO")
+        delivery = (item.get('deliveries') or {}).get(channel.chat_id, {})
+        if delivery.get('status') == STATUS_SENT:
+            return True
+        
+        # Formata para o canal, converte markdown para HTML e divide no limite do Telegram
+        content = channel_registry.format_for(channel, item['content'])
+        chunks = split_html_message(self._convert_markdown_to_html(content))
+        sent = list(delivery.get('message_ids') or [])
+        
+        if len(chunks) > 1 and not sent:
+            logger.info(f"Mensagem longa: dividida em {len(chunks)} partes ({channel.chat_id})")
+        
+        for chunk in chunks[len(sent):]:
+            message_id = await self._send_message(chunk, channel.chat_id)
+            if message_id is None:
+                return False
+            sent.append(message_id)
+            outbox.record_channel_progress(item['key'], channel.chat_id, sent)
+        
+        outbox.record_channel_progress(item['key'], channel.chat_id, sent, STATUS_SENT)
+        return True
+    
+    async def _deliver(self, item: Dict) -> bool:
+        """
+        Entrega um item do outbox em todos os canais e grava o histórico
+        
+        Os canais recebem a postagem em paralelo. Itens já enviados (status
+        'sent') não são reenviados - apenas o histórico é concluído. Isso evita
+        postagem dupla após um crash.
+        
+        Args:
+            item: Item do outbox
+        
+        Returns:
+            True se a entrega foi concluída
+        """
+        label = POST_LABELS.get(item['type'], item['type'])
+        # O item recebido pode estar desatualizado (outro processo gravou o outbox):
+        # toda decisão usa o estado relido do outbox
+        key = item['key']
+        item = outbox.get(key) or item
         
+        if item['status'] in (STATUS_DONE, STATUS_EXPIRED):
+            logger.info(f"Postagem ({label}) já concluída no outbox ({item['status']}). Nada a fazer.")
+            return True
+        
+        if item['status'] == STATUS_PENDING:
+            remaining = list(channel_registry.channels)
+            with logger.stage("telegram", post_type=item['type'], channels=len(remaining)) as stage:
+                await self.initialize()
+                for i in range(max(1, TELEGRAM_RETRIES)):
+                    stage["attempts"] = i + 1
+                    results = await asyncio.gather(
+                        *(self._send_to_channel(item, channel) for channel in remaining)
+                    )
+                    item = outbox.get(key) or item
+                    remaining = [channel for channel, ok in zip(remaining, results) if not ok]
+                    if not remaining:
+                        break
+                    outbox.record_failure(item['key'], f"tentativa {i + 1} falhou em {len(remaining)} canal(is)")
+                    # Nova tentativa pelo mesmo pool, após backoff (sem esperar após a última)
+                    if i < max(1, TELEGRAM_RETRIES) - 1:
+                        await asyncio.sleep(TELEGRAM_RETRY_BACKOFF * (i + 1))
+                
+                deliveries = item.get('deliveries') or {}
+                sent_channels = [c for c in channel_registry.channels
+                                 if deliveries.get(c.chat_id, {}).get('status') == STATUS_SENT]
+                stage["sent_channels"] = len(sent_channels)
+                if not sent_channels:
+                    stage["error"] = "DeliveryFailed"
+            
+            if not sent_channels:
+                logger.failed(f"Falha ao postar {label.lower()} (continua pendente no outbox)")
+                return False
+            
+            for channel in remaining:
+                logger.warning(f"Falha ao postar {label.lower()} em {channel.chat_id} após {TELEGRAM_RETRIES} tentativas")
+            
+            # Registra o envio ANTES de qualquer outra coisa
+            message_id = deliveries[sent_channels[0].chat_id]['message_ids'][0]
+            outbox.record_sent(item['key'], message_id)
+            logger.success(
+                f"Postagem enviada ({label}) em {CHANNEL_NAME}! "
+                f"({len(sent_channels)}/{len(channel_registry.channels)} canal(is), message_id: {message_id})"
+            )
+        else:
+            logger.info(f"Postagem ({label}) já enviada (message_id: {item['message_id']}). Concluindo registro...")
+        
+        # Com a chave, repetir este passo (crash antes do mark_done) não duplica o histórico
+        db.add_post(item['type'], item['content'], item['title'],
+                    channels=self._channel_status(item), key=key)
+        outbox.mark_done(item['key'])
+        return True
+    
+    def _channel_status(self, item: Dict) -> Dict:
+        """Resumo do status de entrega por canal para o histórico"""
+        deliveries = item.get('deliveries') or {}
+        status = {}
+        for chat_id, delivery in deliveries.items():
+            sent = delivery.get('status') == STATUS_SENT
+            status[chat_id] = {
+                "status": "sent" if sent else "failed",
+                "message_ids": delivery.get('message_ids', [])
+            }
+        for channel in channel_registry.channels:
+            status.setdefault(channel.chat_id, {"status": "failed", "message_ids": []})
+        return status
+    
+    async def deliver_pending(self) -> int:
+        """
+        Retoma entregas pendentes do outbox (ex: após reinício do processo)
+        
+        Returns:
+            Número de itens entregues
+        """
+        items = outbox.pending()
+        if not items:
+            return 0
+        
+        logger.info(f"📬 Outbox: {len(items)} entrega(s) pendente(s). Retomando...")
+        delivered = 0
+        for item in items:
+            try:
+                if await self._deliver(item):
+                    delivered += 1
+            except Exception as e:
+                logger.error(f"Erro ao retomar entrega do outbox: {str(e)}")
+        
+        return delivered
+    
+    async def _post(self, post_type: str, content: str, title: str) -> bool:
+        """
+        Fluxo comum de postagem: valida, enfileira no outbox e entrega
+        
+        Args:
+            post_type: 'resumo_diario' ou 'noticia_relevante'
+            content: Conteúdo da postagem
+            title: Título registrado no histórico
+        
+        Returns:
+            True se postado com sucesso
+        """
         if not content:
             logger.failed("Conteúdo vazio! Nada para postar.")
             return False
@@ -132,108 +351,76 @@ class TelegramPoster:
             logger.info("✅ Em modo produção, seria postado no canal agora.")
             return True
         
-        # Modo produção: posta no canal
+        # Modo produção: grava no outbox e entrega
         try:
-            success = False
-            for i in range(max(1, TELEGRAM_RETRIES)):
-                success = await self._send_message(content)
-                if success:
-                    break
-                # Pool pode estar saturado: recria cliente e aguarda backoff
-                try:
-                    from telegram.request import HTTPXRequest
-                    request = HTTPXRequest(
-                        connection_pool_size=TELEGRAM_POOL_SIZE,
-                        pool_timeout=TELEGRAM_POOL_TIMEOUT,
-                        read_timeout=TELEGRAM_READ_TIMEOUT,
-                        connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
-                    )
-                    self.bot = Bot(token=TELEGRAM_BOT_TOKEN, request=request)
-                except Exception:
-                    pass
-                await asyncio.sleep(TELEGRAM_RETRY_BACKOFF * (i + 1))
+            item = outbox.enqueue(post_type, content, title)
             
-            if success:
-                logger.success(f"Resumo diário postado em {CHANNEL_NAME}!")
-                db.add_post("resumo_diario", content, "Resumo Diário")
-                return True
-            else:
-                logger.failed("Falha ao postar resumo diário")
+            if item['status'] in (STATUS_DONE, STATUS_EXPIRED):
+                logger.warning("Postagem já processada anteriormente (outbox). Pulando.")
                 return False
+            
+            return await self._deliver(item)
                 
         except Exception as e:
             logger.error(f"Erro ao postar: {str(e)}")
             return False
     
-    async def post_noticia_relevante(self, content: str) -> bool:
+    async def post_resumo_diario(self, content: str) -> bool:
+        """
+        Posta resumo diário no canal
+        
+        Args:
+            content: Conteúdo do resumo
+        
+        Returns:
+            True se postado com sucesso
+        """
+        logger.section("POSTANDO RESUMO DIÁRIO")
+        return await self._post("resumo_diario", content, "Resumo Diário")
+    
+    async def post_noticia_relevante(self, content: str, title: Optional[str] = None) -> bool:
         """
         Posta notícia relevante no canal
         
         Args:
             content: Conteúdo da notícia
+            title: Headline do envelope validado (sem ela, usa a primeira linha)
         
         Returns:
             True se postado com sucesso
         """
         logger.section("POSTANDO NOTÍCIA RELEVANTE")
         
-        if not content:
-            logger.failed("Conteúdo vazio! Nada para postar.")
-            return False
-        
-        # Verifica duplicação
-        if db.is_duplicate(content):
-            logger.warning("Conteúdo duplicado detectado. Pulando postagem.")
-            return False
-        
-        # Modo teste: apenas mostra no console
-        if self.mode == "test":
-            logger.info("🧪 MODO TESTE - Conteúdo que seria postado:")
-            print("\n" + "="*60)
-            print(content)
-            print("="*60 + "\n")
-            logger.info("✅ Em modo produção, seria postado no canal agora.")
-            return True
-        
-        # Modo produção: posta no canal
+        if title is None:
+            title = content.split('\n')[0].replace('**', '').strip() if content else ""
+        return await self._post("noticia_relevante", content, title)
+    
+    async def _check_channel(self, bot_id: int, chat_id: str) -> bool:
+        """Verifica se o canal existe e se o bot pode postar nele"""
         try:
-            success = False
-            for i in range(max(1, TELEGRAM_RETRIES)):
-                success = await self._send_message(content)
-                if success:
-                    break
-                # Pool pode estar saturado: recria cliente e aguarda backoff
-                try:
-                    from telegram.request import HTTPXRequest
-                    request = HTTPXRequest(
-                        connection_pool_size=TELEGRAM_POOL_SIZE,
-                        pool_timeout=TELEGRAM_POOL_TIMEOUT,
-                        read_timeout=TELEGRAM_READ_TIMEOUT,
-                        connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
-                    )
-                    self.bot = Bot(token=TELEGRAM_BOT_TOKEN, request=request)
-                except Exception:
-                    pass
-                await asyncio.sleep(TELEGRAM_RETRY_BACKOFF * (i + 1))
+            chat = await self.bot.get_chat(chat_id)
+            logger.success(f"Canal encontrado: {chat.title}")
             
-            if success:
-                logger.success(f"Notícia relevante postada em {CHANNEL_NAME}!")
-                
-                # Extrai título da notícia (primeira linha em negrito)
-                title = content.split('\n')[0].replace('**', '').strip()
-                db.add_post("noticia_relevante", content, title)
+            # Verifica permissões
+            bot_member = await self.bot.get_chat_member(chat_id, bot_id)
+            
+            if bot_member.can_post_messages or bot_member.status == 'administrator':
+                logger.success(f"Bot tem permissão para postar no canal {chat_id}!")
                 return True
             else:
-                logger.failed("Falha ao postar notícia relevante")
+                logger.warning(f"Bot não tem permissão para postar no canal {chat_id}!")
+                logger.info("👉 Adicione o bot como administrador do canal")
                 return False
                 
-        except Exception as e:
-            logger.error(f"Erro ao postar: {str(e)}")
+        except TelegramError as e:
+            logger.warning(f"Não foi possível verificar o canal: {str(e)}")
+            logger.info(f"👉 Certifique-se que o bot foi adicionado ao canal: {chat_id}")
+            logger.info("👉 O bot precisa ser administrador do canal")
             return False
     
     async def test_connection(self) -> bool:
         """
-        Testa conexão com o bot e permissões no canal
+        Testa conexão com o bot e permissões em todos os canais
         
         Returns:
             True se conectado, False caso contrário
@@ -245,30 +432,12 @@ class TelegramPoster:
             bot_info = await self.bot.get_me()
             logger.success(f"Bot conectado: @{bot_info.username}")
             
-            # Tenta obter info do canal
-            try:
-                chat = await self.bot.get_chat(self.channel_id)
-                logger.success(f"Canal encontrado: {chat.title}")
-                
-                # Verifica permissões
-                bot_member = await self.bot.get_chat_member(
-                    self.channel_id,
-                    bot_info.id
-                )
-                
-                if bot_member.can_post_messages or bot_member.status == 'administrator':
-                    logger.success("Bot tem permissão para postar no canal!")
-                    return True
-                else:
-                    logger.warning("Bot não tem permissão para postar no canal!")
-                    logger.info("👉 Adicione o bot como administrador do canal")
-                    return False
-                    
-            except TelegramError as e:
-                logger.warning(f"Não foi possível verificar o canal: {str(e)}")
-                logger.info(f"👉 Certifique-se que o bot foi adicionado ao canal: {self.channel_id}")
-                logger.info("👉 O bot precisa ser administrador do canal")
-                return False
+            # Verifica cada canal configurado
+            results = [
+                await self._check_channel(bot_info.id, channel.chat_id)
+                for channel in channel_registry.channels
+            ]
+            return all(results)
                 
         except TelegramError as e:
             logger.failed(f"Erro na conexão com Telegram: {str(e)}")
@@ -285,7 +454,7 @@ if __name__ == "__main__":
     logger.section("TESTE DO TELEGRAM BOT")
     
     # Testa conexão
-    connected = asyncio.run(telegram.test_connection())
+    connected = shared_loop.run(telegram.test_connection())
     
     if connected:
         print("\n✅ Telegram Bot está funcionando!")
@@ -5,7 +5,6 @@ Use este script para testar o bot antes de colocar em produção
 """
 
 import sys
-import asyncio
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
@@ -15,6 +14,7 @@ from src.ai_processor import ai
 from src.telegram_bot import telegram
 from src.scheduler import scheduler
 from utils.logger import logger
+from utils.event_loop import shared_loop
 
 
 def test_all():
@@ -40,7 +40,7 @@ def test_all():
     
     # 3. Testa Telegram Bot
     logger.section("3. TESTANDO TELEGRAM BOT")
-    if not asyncio.run(telegram.test_connection()):
+    if not shared_loop.run(telegram.test_connection()):
         logger.critical("❌ Telegram Bot não está funcionando!")
         return False
     logger.success("Telegram Bot OK!")
@@ -72,7 +72,7 @@ def test_resumo_diario():
         
         resposta = input("Deseja postar este conteúdo? (s/N): ").lower()
         if resposta == 's':
-            success = telegram.post_resumo_diario(content)
+            success = shared_loop.run(telegram.post_resumo_diario(content))
             if success:
                 logger.success("✅ Resumo diário postado com sucesso!")
             else:
@@ -89,18 +89,18 @@ def test_noticia_relevante():
     logger.section("🧪 TESTE: NOTÍCIA RELEVANTE")
     
     logger.info("Gerando notícia relevante...")
-    content = ai.generate_noticia_relevante()
+    post = ai.generate_noticia_relevante()
     
-    if content:
+    if post:
         print("\n" + "="*60)
         print("CONTEÚDO GERADO:")
         print("="*60)
-        print(content)
+        print(post['content'])
         print("="*60 + "\n")
         
         resposta = input("Deseja postar este conteúdo? (s/N): ").lower()
         if resposta == 's':
-            success = telegram.post_noticia_relevante(content)
+            success = shared_loop.run(telegram.post_noticia_relevante(post['content'], title=post['title']))
             if success:
                 logger.success("✅ Notícia relevante postada com sucesso!")
             else:
@@ -143,7 +143,7 @@ def menu():
                 
         elif opcao == "3":
             logger.section("TESTANDO TELEGRAM BOT")
-            if asyncio.run(telegram.test_connection()):
+            if shared_loop.run(telegram.test_connection()):
                 logger.success("✅ Telegram Bot funcionando!")
             else:
                 logger.failed("❌ Problema no Telegram Bot")
@@ -1,46 +1,280 @@
 """
 Sistema de banco de dados simples (JSON) para evitar duplicação de notícias
+
+O histórico fica em dois arquivos:
+- posted_news.json: snapshot compactado (reescrito só na compactação)
+- posted_news.jsonl: journal append-only com uma operação por linha
+
+Cada postagem custa um append + fsync, independente do tamanho do histórico.
+Na carga o snapshot é lido e o journal é reaplicado por cima.
+
+main.py e admin_panel.py podem usar o mesmo diretório: toda operação roda
+sob um lock de arquivo, e as linhas que outro processo acrescentou ao
+journal são lidas incrementalmente (a partir do último offset conhecido).
 """
 
+import functools
 import json
+import os
+import re
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict
 import hashlib
 
 from config.config import POSTED_NEWS_FILE
+from utils.file_lock import FileLock
 from utils.logger import logger
+from utils.state import atomic_write_json, file_signature
+
+
+# Primeiro link do conteúdo - o domínio vira a "fonte" da postagem
+_URL_RE = re.compile(r'https?://(?:www\.)?([^/\s)\]]+)')
+
+
+def _locked(method):
+    """Executa o método com o lock do banco, sincronizando antes com o disco"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            self._refresh_if_changed()
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class NewsDatabase:
-    """Gerencia histórico de notícias postadas"""
+    """Gerencia histórico de notícias postadas (seguro entre threads e processos)"""
     
     def __init__(self, db_file: Path = POSTED_NEWS_FILE):
         self.db_file = db_file
+        self.journal_file = db_file.with_suffix('.jsonl')
+        self._lock = FileLock(db_file)
+        self._journal_offset = 0
+        with self._lock:
+            self._reload()
+    
+    def _disk_signature(self):
+        """Assinatura (inode/mtime/tamanho) do snapshot e do journal"""
+        return (file_signature(self.db_file), file_signature(self.journal_file))
+    
+    def _reload(self):
+        """Carrega histórico e contadores do disco"""
         self.data = self._load_db()
+        self.stats = self._build_stats()
+        self._signature = self._disk_signature()
+    
+    def _refresh_if_changed(self):
+        """
+        Sincroniza com o que outro processo gravou
+        
+        Se só o journal cresceu (mesmo snapshot, mesmo arquivo), lê apenas as
+        linhas novas. Qualquer outra mudança (compactação, clear) recarrega tudo.
+        """
+        current = self._disk_signature()
+        if current == self._signature:
+            return
+        
+        db_sig, journal_sig = current
+        old_db_sig, old_journal_sig = self._signature
+        appended = (
+            db_sig == old_db_sig and journal_sig is not None and old_journal_sig is not None
+            and journal_sig[0] == old_journal_sig[0] and journal_sig[2] > self._journal_offset
+        )
+        
+        if appended:
+            for entry in self._replay_journal(self.data, self._journal_offset):
+                self._count_entry(entry)
+            logger.debug("Histórico: novas operações de outro processo aplicadas")
+        else:
+            logger.debug("Histórico alterado externamente. Recarregando.")
+            self._reload()
+        self._signature = self._disk_signature()
     
     def _load_db(self) -> Dict:
-        """Carrega banco de dados do arquivo JSON"""
+        """Carrega o snapshot e reaplica o journal"""
+        data = {"posted_news": [], "last_seq": 0}
+        
         if self.db_file.exists():
             try:
                 with open(self.db_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    data.update(json.load(f))
             except json.JSONDecodeError:
-                logger.warning("Arquivo de banco corrompido. Criando novo.")
-                return {"posted_news": []}
-        return {"posted_news": []}
+                # Preserva o arquivo para recuperação manual em vez de sobrescrevê-lo
+                backup = self.db_file.with_name(
+                    f"{self.db_file.stem}.corrupt-{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+                )
+                os.replace(self.db_file, backup)
+                logger.error(f"Snapshot do banco corrompido. Movido para {backup.name}; usando apenas o journal.")
+        
+        self._replay_journal(data)
+        return data
+    
+    def _replay_journal(self, data: Dict, offset: int = 0) -> List[Dict]:
+        """
+        Reaplica as operações do journal posteriores ao snapshot
+        
+        Args:
+            data: Dados onde aplicar as operações
+            offset: Posição (bytes) a partir da qual ler - 0 lê o journal inteiro
+        
+        Returns:
+            Operações aplicadas
+        """
+        if not self.journal_file.exists():
+            self._journal_offset = 0
+            return []
+        
+        applied = []
+        with open(self.journal_file, 'rb') as f:
+            f.seek(offset)
+            raw = f.read()
+        
+        # Linha final sem '\n' = gravação interrompida por crash: descarta e
+        # corta do arquivo, senão o próximo append seria colado nela
+        if raw and not raw.endswith(b'\n'):
+            cut = raw.rfind(b'\n') + 1
+            logger.warning("Journal: última linha truncada (crash durante gravação). Descartando.")
+            raw = raw[:cut]
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(offset + cut)
+        self._journal_offset = offset + len(raw)
+        
+        for line_number, line in enumerate(raw.decode('utf-8').splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Journal: linha {line_number} inválida. Ignorando.")
+                continue
+            
+            # Operações já incluídas no snapshot
+            if entry.get("seq", 0) <= data["last_seq"]:
+                continue
+            
+            self._apply(data, entry)
+            applied.append(entry)
+        
+        if applied:
+            logger.debug(f"Journal: {len(applied)} operações reaplicadas")
+        return applied
+    
+    @staticmethod
+    def _apply(data: Dict, entry: Dict):
+        """Aplica uma operação do journal aos dados em memória"""
+        if entry["op"] == "add":
+            data["posted_news"].append(entry["post"])
+        elif entry["op"] == "clear":
+            data["posted_news"] = []
+        data["last_seq"] = entry["seq"]
+    
+    @staticmethod
+    def _empty_stats() -> Dict:
+        """Estrutura vazia dos contadores (e das chaves de outbox já registradas)"""
+        return {"by_type": {}, "by_source": {}, "by_day": {}, "first": None, "last": None,
+                "keys": set()}
+    
+    def _build_stats(self) -> Dict:
+        """Monta os contadores a partir do histórico (uma vez, na carga)"""
+        self.stats = self._empty_stats()
+        for post in self.data["posted_news"]:
+            self._count(post)
+        return self.stats
+    
+    @staticmethod
+    def _bump(counter: Dict, key: str, delta: int):
+        """Incrementa/decrementa um contador, removendo chaves zeradas"""
+        value = counter.get(key, 0) + delta
+        if value > 0:
+            counter[key] = value
+        else:
+            counter.pop(key, None)
+    
+    def _count(self, post: Dict, delta: int = 1):
+        """Atualiza os contadores incrementais com uma postagem (+1 ou -1)"""
+        stats = self.stats
+        source = post.get("source") or ""
+        
+        self._bump(stats["by_type"], post["type"], delta)
+        if source:
+            self._bump(stats["by_source"], source, delta)
+        
+        day = stats["by_day"].setdefault(post["date"], {"total": 0, "types": {}, "sources": {}})
+        day["total"] += delta
+        self._bump(day["types"], post["type"], delta)
+        if source:
+            self._bump(day["sources"], source, delta)
+        if day["total"] <= 0:
+            del stats["by_day"][post["date"]]
+        
+        if post.get("key"):
+            if delta > 0:
+                stats["keys"].add(post["key"])
+            else:
+                stats["keys"].discard(post["key"])
+        
+        if delta > 0:
+            timestamp = post["timestamp"]
+            if stats["first"] is None or timestamp < stats["first"]:
+                stats["first"] = timestamp
+            if stats["last"] is None or timestamp > stats["last"]:
+                stats["last"] = timestamp
+    
+    def _append(self, op: str, **fields):
+        """Grava uma operação no journal (append + fsync) e aplica em memória"""
+        entry = {"seq": self.data["last_seq"] + 1, "op": op, **fields}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        
+        self.journal_file.parent.mkdir(exist_ok=True)
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        self._apply(self.data, entry)
+        self._count_entry(entry)
+        self._journal_offset += len(line.encode('utf-8'))
+        self._signature = self._disk_signature()
+    
+    def _count_entry(self, entry: Dict):
+        """Mantém os contadores em dia com uma operação do journal, sem varrer o histórico"""
+        if entry["op"] == "add":
+            self._count(entry["post"])
+        elif entry["op"] == "clear":
+            self.stats = self._empty_stats()
     
     def _save_db(self):
-        """Salva banco de dados no arquivo JSON"""
-        self.db_file.parent.mkdir(exist_ok=True)
-        with open(self.db_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        """Salva o snapshot de forma atômica (arquivo temporário + fsync + rename)"""
+        atomic_write_json(self.db_file, self.data)
+    
+    @_locked
+    def compact(self):
+        """
+        Compacta o histórico: grava o snapshot e esvazia o journal
+        
+        Se o processo morrer entre os dois passos, as operações do journal
+        já cobertas pelo snapshot são puladas na carga (pelo número de sequência).
+        """
+        self._save_db()
+        with open(self.journal_file, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_offset = 0
+        self._signature = self._disk_signature()
+        logger.debug("Histórico compactado")
     
     def _generate_hash(self, content: str) -> str:
         """Gera hash único para o conteúdo"""
         return hashlib.md5(content.encode('utf-8')).hexdigest()
     
-    def add_post(self, post_type: str, content: str, title: str = ""):
+    def _source_of(self, content: str) -> str:
+        """Fonte da postagem: domínio do primeiro link do conteúdo"""
+        match = _URL_RE.search(content)
+        return match.group(1).lower() if match else ""
+    
+    @_locked
+    def add_post(self, post_type: str, content: str, title: str = "", channels: Dict = None,
+                 source: str = None, key: str = None):
         """
         Adiciona uma postagem ao histórico
         
@@ -48,20 +282,34 @@ class NewsDatabase:
             post_type: 'resumo_diario' ou 'noticia_relevante'
             content: Conteúdo completo da postagem
             title: Título da notícia (opcional)
+            channels: Status de entrega por canal (opcional)
+            source: Fonte da notícia (padrão: domínio do primeiro link do conteúdo)
+            key: Chave do item no outbox - uma chave já registrada é ignorada,
+                 então concluir a mesma entrega duas vezes não duplica o histórico
         """
+        if key and key in self.stats["keys"]:
+            logger.debug(f"Postagem {key} já está no histórico. Ignorando.")
+            return
+        
         post_data = {
             "type": post_type,
             "title": title,
             "content_hash": self._generate_hash(content),
             "timestamp": datetime.now().isoformat(),
-            "date": datetime.now().strftime("%Y-%m-%d")
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "source": source if source is not None else self._source_of(content)
         }
         
-        self.data["posted_news"].append(post_data)
-        self._save_db()
+        if channels:
+            post_data["channels"] = channels
+        if key:
+            post_data["key"] = key
+        
+        self._append("add", post=post_data)
         
         logger.debug(f"Postagem adicionada ao histórico: {post_type}")
     
+    @_locked
     def is_duplicate(self, content: str, days: int = 7) -> bool:
         """
         Verifica se o conteúdo já foi postado nos últimos N dias
@@ -86,6 +334,7 @@ class NewsDatabase:
         
         return False
     
+    @_locked
     def get_recent_posts(self, days: int = 7) -> List[Dict]:
         """Retorna postagens dos últimos N dias"""
         cutoff_date = datetime.now() - timedelta(days=days)
@@ -98,48 +347,83 @@ class NewsDatabase:
         
         return recent
     
+    @_locked
     def clean_old_posts(self, days: int = 30):
         """Remove postagens mais antigas que N dias"""
         cutoff_date = datetime.now() - timedelta(days=days)
         
         before_count = len(self.data["posted_news"])
         
-        self.data["posted_news"] = [
-            post for post in self.data["posted_news"]
-            if datetime.fromisoformat(post["timestamp"]) >= cutoff_date
-        ]
+        kept = []
+        first = last = None
+        for post in self.data["posted_news"]:
+            if datetime.fromisoformat(post["timestamp"]) >= cutoff_date:
+                kept.append(post)
+                if first is None or post["timestamp"] < first:
+                    first = post["timestamp"]
+                if last is None or post["timestamp"] > last:
+                    last = post["timestamp"]
+            else:
+                self._count(post, -1)
+        
+        self.data["posted_news"] = kept
+        self.stats["first"] = first
+        self.stats["last"] = last
         
         after_count = len(self.data["posted_news"])
         removed = before_count - after_count
         
+        # Compactação periódica: o snapshot absorve o journal
+        self.compact()
+        
         if removed > 0:
-            self._save_db()
             logger.info(f"Limpeza: {removed} posts antigos removidos")
     
-    def get_stats(self) -> Dict:
-        """Retorna estatísticas do banco de dados"""
-        total_posts = len(self.data["posted_news"])
+    @_locked
+    def clear(self):
+        """Remove todo o histórico de postagens"""
+        self._append("clear")
+        self.compact()
+    
+    def _window(self, days: int) -> Dict:
+        """Totais dos últimos N dias (inclui hoje) a partir dos contadores diários"""
+        cutoff = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        types: Dict[str, int] = {}
+        sources: Dict[str, int] = {}
+        total = 0
         
-        if total_posts == 0:
-            return {
-                "total_posts": 0,
-                "resumos": 0,
-                "noticias": 0,
-                "first_post": None,
-                "last_post": None
-            }
+        for date, day in self.stats["by_day"].items():
+            if date < cutoff:
+                continue
+            total += day["total"]
+            for key, value in day["types"].items():
+                types[key] = types.get(key, 0) + value
+            for key, value in day["sources"].items():
+                sources[key] = sources.get(key, 0) + value
         
-        resumos = sum(1 for p in self.data["posted_news"] if p["type"] == "resumo_diario")
-        noticias = sum(1 for p in self.data["posted_news"] if p["type"] == "noticia_relevante")
+        return {
+            "total_posts": total,
+            "resumos": types.get("resumo_diario", 0),
+            "noticias": types.get("noticia_relevante", 0),
+            "top_sources": sorted(sources.items(), key=lambda item: item[1], reverse=True)[:5]
+        }
+    
+    @_locked
+    def get_stats(self) -> Dict:
+        """Retorna estatísticas do banco de dados (contadores incrementais)"""
+        stats = self.stats
         
-        timestamps = [datetime.fromisoformat(p["timestamp"]) for p in self.data["posted_news"]]
+        def _fmt(timestamp):
+            return datetime.fromisoformat(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp else None
         
         return {
-            "total_posts": total_posts,
-            "resumos": resumos,
-            "noticias": noticias,
-            "first_post": min(timestamps).strftime("%Y-%m-%d %H:%M"),
-            "last_post": max(timestamps).strftime("%Y-%m-%d %H:%M")
+            "total_posts": len(self.data["posted_news"]),
+            "resumos": stats["by_type"].get("resumo_diario", 0),
+            "noticias": stats["by_type"].get("noticia_relevante", 0),
+            "first_post": _fmt(stats["first"]),
+            "last_post": _fmt(stats["last"]),
+            "last_7_days": self._window(7),
+            "last_30_days": self._window(30)
         }
 
 
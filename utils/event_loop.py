@@ -0,0 +1,102 @@
+"""
+Event loop compartilhado em uma thread dedicada
+
+Clientes assíncronos de longa duração (pool HTTP do Telegram) ficam presos
+ao loop onde abriram suas conexões. Em vez de criar um loop novo a cada job
+com asyncio.run(), todo código assíncrono compartilhado roda neste loop.
+
+As coroutines enviadas levam junto as context vars de quem chamou (ex: o
+job_id dos logs estruturados), como acontece com asyncio.to_thread.
+"""
+
+import asyncio
+import contextvars
+import threading
+from typing import Any, Awaitable, Optional
+
+from utils.logger import logger
+
+
+class BackgroundLoop:
+    """Event loop rodando para sempre em uma thread daemon"""
+
+    def __init__(self, name: str = "shared-event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Retorna o loop, iniciando a thread na primeira chamada"""
+        return self._ensure_started()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Inicia a thread do loop se ainda não estiver rodando e retorna o loop"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run_forever, args=(self._loop, ready),
+                    name=self.name, daemon=True
+                )
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    @staticmethod
+    def _run_forever(loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    @staticmethod
+    async def _in_context(coro: Awaitable, context: contextvars.Context) -> Any:
+        """Restaura as context vars do chamador dentro da task do loop compartilhado"""
+        for var, value in context.items():
+            var.set(value)
+        return await coro
+
+    def _schedule(self, coro: Awaitable):
+        return asyncio.run_coroutine_threadsafe(
+            self._in_context(coro, contextvars.copy_context()), self._ensure_started()
+        )
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        Executa uma coroutine no loop compartilhado e espera o resultado
+
+        Para código síncrono (scheduler, scripts). Não pode ser chamado de
+        dentro do próprio loop compartilhado.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("run() chamado de dentro do loop compartilhado; use await")
+        return self._schedule(coro).result(timeout)
+
+    async def run_async(self, coro: Awaitable) -> Any:
+        """Executa uma coroutine no loop compartilhado a partir de outro event loop"""
+        # Se o loop ainda não foi iniciado, não é o loop atual: _schedule o inicia
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(self._schedule(coro))
+
+    def submit(self, coro: Awaitable):
+        """Agenda uma coroutine sem esperar (fire-and-forget)"""
+        return self._schedule(coro)
+
+    def stop(self):
+        """Para o loop compartilhado"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if self._thread:
+                self._thread.join(timeout=5)
+            self._loop.close()
+            self._loop = None
+            logger.debug("Event loop compartilhado finalizado")
+
+
+# Instância global do loop compartilhado
+shared_loop = BackgroundLoop()
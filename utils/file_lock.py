@@ -0,0 +1,60 @@
+"""
+Lock de arquivo entre processos (flock) e entre threads
+
+main.py e admin_panel.py rodam em processos separados sobre o mesmo
+diretório data/. Cada store JSON protege suas leituras e gravações com
+um FileLock no arquivo '<store>.lock' ao lado dele, então dois processos
+nunca fazem ler-modificar-gravar ao mesmo tempo.
+
+Onde fcntl não existe (Windows) o lock vale apenas entre threads.
+"""
+
+import os
+import sys
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class FileLock:
+    """Lock exclusivo e reentrante: RLock entre threads + flock entre processos"""
+
+    def __init__(self, path: Path):
+        self.lock_file = path.with_name(path.name + '.lock')
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._warned = False
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                if self._fd is None:
+                    self.lock_file.parent.mkdir(exist_ok=True)
+                    self._fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except OSError as e:
+                # Sem logger aqui: o próprio handler de logs (utils/log_rotation.py) usa
+                # este lock, então avisar por ele entraria em recursão. Avisa uma vez só.
+                if not self._warned:
+                    self._warned = True
+                    sys.stderr.write(f"Não foi possível travar {self.lock_file.name}: {e}\n")
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
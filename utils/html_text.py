@@ -0,0 +1,368 @@
+"""
+Normalização de HTML para texto puro (resumos de feeds RSS)
+
+Os campos 'summary' dos feeds (dappradar, nftplazas, beincrypto, coindesk...)
+vêm em HTML com imagens, estilos inline e pixels de rastreamento. Aqui o
+HTML vira texto com o html.parser da biblioteca padrão, em streaming:
+- só o texto visível é guardado (script/style/noscript/iframe/svg somem)
+- entidades são decodificadas pelo próprio parser
+- tags de bloco (p, br, li, div...) viram separação entre palavras
+- espaços são colapsados
+- frases de rodapé ("The post ... appeared first on ...", "Read more") saem
+
+Um parser por thread é reaproveitado (reset) em vez de criar um a cada
+resumo.
+
+extract_article() faz o mesmo para a página inteira de um artigo, no estilo
+do Readability: os parágrafos pontuam o elemento que os contém (e metade
+para o avô), e só os parágrafos do melhor contêiner viram o texto principal.
+Menus, rodapés, barras laterais e blocos de compartilhamento/relacionados
+são ignorados.
+"""
+
+import re
+import threading
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+# Conteúdo dessas tags nunca é texto visível
+SKIP_TAGS = {"script", "style", "noscript", "iframe", "svg", "template", "head"}
+
+# Tags que separam blocos de texto
+BLOCK_TAGS = {
+    "p", "br", "div", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+    "blockquote", "figure", "figcaption", "tr", "td", "th", "table", "section", "article", "hr"
+}
+
+# Rodapés automáticos dos feeds (WordPress e afins)
+BOILERPLATE_RE = re.compile(
+    # Só no fim do texto (podem vir vários em sequência): no meio de uma frase
+    # ("Gamers can read more about...") é conteúdo
+    r"(?:\s*(?:"
+    r"\bThe post .{1,300}? appeared first on .{1,120}?\.?"
+    r"|\b(?:Continue reading|Read more|Read the full (?:story|article))\b(?: at [^.]{1,80})?\s*(?:»|…|\.\.\.)?\.?"
+    r"|\[(?:…|\.\.\.)\]"
+    r"))+\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Página de artigo: subárvores que nunca são o texto principal
+ARTICLE_SKIP_TAGS = SKIP_TAGS | {"nav", "header", "footer", "aside", "form", "button", "select", "figure"}
+
+# class/id de blocos que não são o corpo do artigo
+NEGATIVE_RE = re.compile(
+    r"comment|share|social|related|promo|sidebar|newsletter|subscribe|advert|sponsor|"
+    r"cookie|consent|footer|\bnav|menu|breadcrumb|author-bio|\bad\b|\bads\b|popup|modal",
+    re.IGNORECASE
+)
+
+# Tags sem fechamento (não entram na pilha de elementos)
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Parágrafos candidatos ao texto principal
+PARAGRAPH_TAGS = {"p", "pre"}
+
+# Parágrafos menores que isso (ex: "Publicidade", legendas) não pontuam
+MIN_PARAGRAPH_CHARS = 25
+
+# Texto principal menor que isso não é um artigo (redirect, consentimento, paywall)
+MIN_ARTICLE_CHARS = 200
+
+
+class _TextExtractor(HTMLParser):
+    """Coleta o texto visível de um documento HTML"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def reset(self):
+        super().reset()
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/>, <img/>: nada de texto, só separação nos de bloco
+        if tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+    def finish(self) -> str:
+        """Fecha o documento e devolve o texto (tag cortada no fim é descartada)"""
+        if self.rawdata.startswith("<"):
+            self.rawdata = ""
+        self.close()
+        return "".join(self.parts)
+
+
+_local = threading.local()
+
+
+def _extractor() -> _TextExtractor:
+    extractor = getattr(_local, "extractor", None)
+    if extractor is None:
+        extractor = _local.extractor = _TextExtractor()
+    return extractor
+
+
+class _ArticleExtractor(HTMLParser):
+    """Parágrafos e URL canônica de uma página de artigo"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.canonical: Optional[str] = None
+        # Pilha de (tag, id do nó, subárvore ignorada)
+        self._stack: List[Tuple[str, int, bool]] = []
+        self._next_id = 0
+        self._skip_depth = 0
+        # Parágrafo aberto: nó, pai, avô, partes do texto, caracteres em links
+        self._paragraph: Optional[Dict] = None
+        self._link_depth = 0
+        self.paragraphs: List[Dict] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("link", "meta"):
+            self._canonical_from(tag, dict(attrs))
+            return
+        if tag in VOID_TAGS:
+            if tag == "br" and self._paragraph is not None:
+                self._paragraph["parts"].append(" ")
+            return
+        if tag == "p" and self._paragraph is not None and self._paragraph["tag"] == "p":
+            # <p> sem fechamento: o próximo fecha o anterior
+            self.handle_endtag("p")
+
+        attrs = dict(attrs)
+        marker = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+        skip = tag in ARTICLE_SKIP_TAGS or (tag not in ("html", "body") and bool(NEGATIVE_RE.search(marker)))
+        node = self._next_id
+        self._next_id += 1
+        self._stack.append((tag, node, skip))
+        if skip:
+            self._skip_depth += 1
+
+        if self._skip_depth:
+            return
+        if tag in PARAGRAPH_TAGS and self._paragraph is None:
+            parent = self._stack[-2][1] if len(self._stack) > 1 else -1
+            grandparent = self._stack[-3][1] if len(self._stack) > 2 else -1
+            self._paragraph = {"tag": tag, "node": node, "parent": parent, "grandparent": grandparent,
+                               "parts": [], "link_chars": 0}
+        elif tag == "a" and self._paragraph is not None:
+            self._link_depth += 1
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _, _ in self._stack):
+            return  # fechamento sem abertura: ignorado
+        while self._stack:
+            open_tag, node, skip = self._stack.pop()
+            if skip:
+                self._skip_depth -= 1
+            if self._paragraph is not None and node == self._paragraph["node"]:
+                self._close_paragraph()
+            elif open_tag == "a" and self._link_depth:
+                self._link_depth -= 1
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._paragraph is None or self._skip_depth:
+            return
+        self._paragraph["parts"].append(data)
+        if self._link_depth:
+            self._paragraph["link_chars"] += len(data.strip())
+
+    def _canonical_from(self, tag: str, attrs: Dict):
+        if self.canonical:
+            return
+        if tag == "link" and "canonical" in (attrs.get("rel") or "").lower().split():
+            self.canonical = (attrs.get("href") or "").strip() or None
+        elif tag == "meta" and (attrs.get("property") or "").lower() == "og:url":
+            self.canonical = (attrs.get("content") or "").strip() or None
+
+    def _close_paragraph(self):
+        paragraph, self._paragraph = self._paragraph, None
+        self._link_depth = 0
+        text = " ".join("".join(paragraph.pop("parts")).split())
+        # Parágrafos curtos ou feitos quase só de links (listas de "leia também") não contam
+        if len(text) >= MIN_PARAGRAPH_CHARS and paragraph["link_chars"] <= len(text) / 2:
+            paragraph["text"] = text
+            self.paragraphs.append(paragraph)
+
+    def finish(self) -> str:
+        """Fecha o documento e devolve o texto principal ("" se não parece um artigo)"""
+        self.close()
+        if self._paragraph is not None:
+            self._close_paragraph()
+
+        scores: Dict[int, float] = {}
+        for paragraph in self.paragraphs:
+            text = paragraph["text"]
+            score = 1 + text.count(",") + min(len(text) // 100, 3)
+            scores[paragraph["parent"]] = scores.get(paragraph["parent"], 0) + score
+            scores[paragraph["grandparent"]] = scores.get(paragraph["grandparent"], 0) + score / 2
+        if not scores:
+            return ""
+
+        best = max(scores, key=scores.get)
+        text = "\n\n".join(p["text"] for p in self.paragraphs if best in (p["parent"], p["grandparent"]))
+        return text if len(text) >= MIN_ARTICLE_CHARS else ""
+
+
+def extract_article(page: str) -> Tuple[str, Optional[str]]:
+    """
+    Texto principal de uma página de artigo
+
+    Args:
+        page: HTML da página inteira
+
+    Returns:
+        (texto com parágrafos separados por linha em branco ou "",
+         URL canônica declarada pela página ou None)
+    """
+    extractor = _ArticleExtractor()
+    extractor.feed(page or "")
+    text = extractor.finish()
+    return text, extractor.canonical
+
+
+def html_to_text(value: Optional[str], strip_boilerplate: bool = True) -> str:
+    """
+    Converte HTML (ou texto com entidades) em texto puro de uma linha
+
+    Args:
+        value: HTML do feed (None/vazio vira "")
+        strip_boilerplate: Remove rodapés automáticos dos feeds
+
+    Returns:
+        Texto com espaços colapsados
+    """
+    if not value:
+        return ""
+    if "<" in value or "&" in value:
+        extractor = _extractor()
+        extractor.reset()
+        try:
+            extractor.feed(value)
+            value = extractor.finish()
+        finally:
+            extractor.parts = []
+    text = " ".join(value.split())
+    if strip_boilerplate:
+        text = BOILERPLATE_RE.sub("", text).strip()
+    return text
+
+
+if __name__ == "__main__":
+    import time
+
+    # Resumos no formato dos feeds (WordPress com imagem, pixel e rodapé; Google News; CoinDesk)
+    fixtures = [
+        '<img width="1200" height="675" src="https://dappradar.com/wp-content/uploads/cover.png" '
+        'class="attachment-full size-full wp-post-image" style="float:left;margin:0 15px 15px 0" />'
+        '<p>The <strong>Pixels</strong> team launched Chapter 3 with 1.2M daily players &#8211; '
+        'a 40% jump &amp; new staking.</p><p>The post <a href="https://dappradar.com/blog/pixels">Pixels '
+        'Chapter 3 goes live</a> appeared first on <a href="https://dappradar.com">DappRadar</a>.</p>',
+
+        '<p>Off The Grid tops the Epic Games Store charts&hellip;</p>'
+        '<img src="https://nftplazas.com/pixel.gif" width="1" height="1" alt="" style="display:none"/>'
+        '<p><a href="https://nftplazas.com/off-the-grid" rel="nofollow">Continue reading</a></p>',
+
+        '<ol><li><a href="https://news.google.com/rss/articles/abc" target="_blank">Axie Infinity raises '
+        '$10 million</a>&nbsp;&nbsp;<font color="#6f6f6f">Decrypt</font></li></ol>',
+
+        '<script>window.track("x")</script><style>.a{color:red}</style>Bitcoin ETF inflows hit '
+        '<b>$1.1B</b> this week [&#8230;]',
+
+        'Texto puro já limpo, sem HTML.',
+    ]
+    expected = [
+        "The Pixels team launched Chapter 3 with 1.2M daily players – a 40% jump & new staking.",
+        "Off The Grid tops the Epic Games Store charts…",
+        "Axie Infinity raises $10 million Decrypt",
+        "Bitcoin ETF inflows hit $1.1B this week",
+        "Texto puro já limpo, sem HTML.",
+    ]
+    for raw, want in zip(fixtures, expected):
+        got = html_to_text(raw)
+        assert got == want, (got, want)
+
+    # Frases de rodapé no meio do texto são conteúdo
+    for sentence in ("Gamers can read more about the staking rewards in the new whitepaper, released today.",
+                     "Continue reading to learn why Axie is up 30%."):
+        assert html_to_text(sentence) == sentence, html_to_text(sentence)
+
+    # Resumo cortado no meio de uma tag (o [:200] antigo dos feeds) não vaza HTML
+    assert "<" not in html_to_text(fixtures[0][:150])
+    # Classificação por palavra-chave: o atributo class="wp-post-image" não conta mais como texto
+    assert "post" not in html_to_text(fixtures[0]).lower()
+
+    # Página de artigo: menu, compartilhamento, relacionados e rodapé ficam de fora
+    body = (
+        "<p>Sky Mavis announced on Tuesday a $10 million fund for Axie Infinity: Origins, "
+        "with grants for guilds, tournaments and mobile onboarding in Southeast Asia.</p>"
+        "<p>The fund will be distributed over 18 months, according to the company, "
+        "and builders can apply through the Ronin forum starting next week.<p>Unclosed paragraph "
+        "about the Ronin validator set, which grew to 22 nodes after the upgrade.</p>"
+        "<blockquote><p>We want players, not farmers, said Jeff Zirlin, co-founder of Sky Mavis.</p></blockquote>"
+    )
+    page = (
+        '<html><head><title>Axie</title><link rel="canonical" href="https://site.com/axie-fund">'
+        '<meta property="og:url" content="https://site.com/og"><script>var a = "<p>x</p>";</script></head>'
+        '<body><header><nav><p>Home, News, Markets, Gaming, Newsletter, Podcasts, Events</p></nav></header>'
+        f'<main><article><h1>Axie fund</h1><div class="entry-content">{body}'
+        '<div class="share-buttons"><p>Share this article on Twitter, Facebook, Telegram and more</p></div>'
+        '</div></article>'
+        '<aside><p>Related: Bitcoin, Ethereum, Solana, XRP, Dogecoin prices today and more</p></aside></main>'
+        '<footer><p>© 2025 Site Media, all rights reserved, terms, privacy, cookies</p></footer></body></html>'
+    )
+    text, canonical = extract_article(page)
+    assert canonical == "https://site.com/axie-fund", canonical
+    paragraphs = text.split("\n\n")
+    assert len(paragraphs) == 4 and paragraphs[0].startswith("Sky Mavis") and "Zirlin" in paragraphs[3], paragraphs
+    assert not any(word in text for word in ("Home", "Share", "Related", "©", "var a")), text
+    # Página sem artigo (redirect/consentimento) não vira texto
+    assert extract_article('<html><body><p>Before you continue to Google, accept cookies.</p></body></html>') == ("", None)
+    assert extract_article("") == ("", None)
+
+    start = time.perf_counter()
+    big_page = page.replace(body, body * 40)
+    for _ in range(50):
+        extract_article(big_page)
+    page_ms = (time.perf_counter() - start) / 50 * 1000
+    print(f"Artigo de {len(big_page) / 1024:.0f} KB extraído em {page_ms:.1f}ms")
+
+    # Throughput: os fixtures repetidos como um feed de 100 itens
+    corpus = fixtures * 20
+    total_bytes = sum(len(item.encode("utf-8")) for item in corpus)
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        for item in corpus:
+            html_to_text(item)
+    elapsed = time.perf_counter() - start
+    raw_chars = sum(len(item) for item in fixtures)
+    clean_chars = sum(len(html_to_text(item)) for item in fixtures)
+    print(f"{runs * len(corpus) / elapsed:,.0f} resumos/s | {runs * total_bytes / elapsed / 1e6:.1f} MB/s | "
+          f"texto = {clean_chars / raw_chars:.0%} do HTML")
+    print("✅ Normalização de HTML OK")
@@ -0,0 +1,137 @@
+"""
+Handler de arquivo com rotação por tamanho e por tempo
+
+O segmento rotacionado é renomeado na hora (barato) e comprimido com gzip
+em uma thread separada. Ficam no máximo backup_count segmentos .gz, então
+o uso de disco no volume do Fly é limitado.
+
+main.py e admin_panel.py escrevem nos mesmos arquivos, então:
+- cada gravação e cada rotação acontecem com o FileLock do arquivo
+  ('bot.log.lock'); quem escreve depois de outro processo rotacionar reabre
+  o arquivo novo em vez de continuar no segmento renomeado
+- os segmentos levam data/hora e pid no nome ('bot.log.20251006-143000-512034-87.gz'),
+  sem deslocar .1/.2/..., então duas rotações nunca disputam o mesmo nome
+- o início do segmento atual é o mtime do arquivo de lock (atualizado a cada
+  rotação), então a rotação por tempo sobrevive a restarts da máquina
+"""
+
+import glob
+import gzip
+import logging.handlers
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from utils.file_lock import FileLock
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """Handler que rotaciona por tamanho ou a cada N horas e comprime os backups"""
+
+    def __init__(self, filename, max_bytes: int, rotate_hours: int, backup_count: int,
+                 encoding: str = 'utf-8'):
+        super().__init__(filename, 'a', encoding=encoding)
+        self.max_bytes = max_bytes
+        self.interval = rotate_hours * 3600
+        self.backup_count = backup_count
+        self._file_lock = FileLock(Path(self.baseFilename))
+        self.rollover_at = self._segment_started() + self.interval
+        self._compressor: Optional[threading.Thread] = None
+
+    def _segment_started(self) -> float:
+        """Quando o segmento atual começou (mtime do arquivo de lock, compartilhado entre processos)"""
+        marker = self._file_lock.lock_file
+        try:
+            return os.stat(marker).st_mtime
+        except FileNotFoundError:
+            os.close(os.open(marker, os.O_WRONLY | os.O_CREAT, 0o644))
+            return time.time()
+
+    def emit(self, record):
+        # Ninguém rotaciona enquanto outro processo escreve (e vice-versa)
+        with self._file_lock:
+            self._reopen_if_rotated()
+            super().emit(record)
+
+    def _reopen_if_rotated(self):
+        """Reabre o arquivo se outro processo o rotacionou (mesma ideia do WatchedFileHandler)"""
+        if self.stream is None:
+            return
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            current = None
+        opened = os.fstat(self.stream.fileno())
+        if current is None or (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+            self.stream.close()
+            self.stream = self._open()
+
+    def shouldRollover(self, record) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        # Tamanho real do arquivo (inclui o que os outros processos escreveram)
+        size = os.fstat(self.stream.fileno()).st_size
+        if size == 0:
+            return False  # Arquivo vazio não vale um segmento
+        if self.max_bytes > 0 and size + len(self.format(record)) + 1 >= self.max_bytes:
+            return True
+        if self.interval > 0 and time.time() >= self.rollover_at:
+            # Outro processo pode ter rotacionado antes: confere o início do segmento
+            self.rollover_at = self._segment_started() + self.interval
+            return time.time() >= self.rollover_at
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        # Data/hora (µs) + pid: nome único e em ordem cronológica
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        plain = f"{self.baseFilename}.{stamp}-{int(now % 1 * 1e6):06d}-{os.getpid()}"
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, plain)
+        os.utime(self._file_lock.lock_file, (now, now))
+        self.rollover_at = now + self.interval
+        self.stream = self._open()
+
+        # Uma compressão por vez neste processo (a anterior já está quase sempre pronta)
+        self.wait_compression()
+        if os.path.exists(plain):
+            self._compressor = threading.Thread(
+                target=self._compress, args=(plain,), name="log-gzip", daemon=True
+            )
+            self._compressor.start()
+
+    def _compress(self, plain: str):
+        """Comprime o segmento e apaga os .gz mais antigos que backup_count"""
+        try:
+            with open(plain, 'rb') as src, gzip.open(plain + ".gz.tmp", 'wb') as gz:
+                shutil.copyfileobj(src, gz)
+            os.replace(plain + ".gz.tmp", plain + ".gz")
+            os.remove(plain)
+
+            backups = sorted(glob.glob(glob.escape(self.baseFilename) + ".*.gz"))
+            for old in backups[:max(0, len(backups) - self.backup_count)]:
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    pass  # O outro processo apagou primeiro
+        except OSError as e:
+            # Sem logger aqui: estamos dentro do próprio pipeline de logs
+            sys.stderr.write(f"Falha ao comprimir {plain}: {e}\n")
+
+    def wait_compression(self, timeout: Optional[float] = None):
+        """Espera a compressão em andamento (se houver)"""
+        if self._compressor is not None:
+            self._compressor.join(timeout)
+            self._compressor = None
+
+    def close(self):
+        self.wait_compression(timeout=30)
+        super().close()
@@ -0,0 +1,131 @@
+"""
+Leitura das últimas linhas de um arquivo de log sem carregá-lo inteiro
+
+Lê blocos de tamanho fixo a partir do fim do arquivo até juntar as linhas
+pedidas. Custo proporcional às linhas retornadas (com filtro, ao trecho
+percorrido até achá-las, limitado por max_scan_bytes).
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Callable, List, Optional
+
+BLOCK_SIZE = 8192
+
+# Nível no formato do arquivo: "2024-01-01 12:00:00 [ERROR] mensagem"
+_LEVEL_RE = re.compile(r'^\S+ \S+ \[(DEBUG|INFO|WARNING|ERROR|CRITICAL)\]')
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40, "critical": 50}
+
+
+def tail_lines(path: Path, count: int, predicate: Optional[Callable[[str], bool]] = None,
+               block_size: int = BLOCK_SIZE, max_scan_bytes: int = 8 * 1024 * 1024) -> List[str]:
+    """
+    Retorna as últimas `count` linhas do arquivo (que passam no filtro)
+
+    Args:
+        path: Arquivo de log
+        count: Quantidade de linhas
+        predicate: Filtro opcional por linha
+        block_size: Tamanho do bloco lido por vez
+        max_scan_bytes: Limite de bytes percorridos (protege filtros sem resultado)
+
+    Returns:
+        Linhas (sem '\\n') em ordem cronológica
+    """
+    if count <= 0:
+        return []
+
+    found: List[str] = []
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        scanned = 0
+        remainder = b''
+
+        while position > 0 and scanned < max_scan_bytes:
+            size = min(block_size, position)
+            position -= size
+            scanned += size
+            f.seek(position)
+            chunk = f.read(size) + remainder
+
+            # A primeira linha do bloco pode estar incompleta: fica para o próximo
+            lines = chunk.split(b'\n')
+            remainder = lines.pop(0) if position > 0 else b''
+
+            for raw in reversed(lines):
+                if not raw:
+                    continue
+                line = raw.decode('utf-8', errors='replace')
+                if predicate is None or predicate(line):
+                    found.append(line)
+                    if len(found) >= count:
+                        return found[::-1]
+
+    return found[::-1]
+
+
+def make_filter(level: Optional[str] = None, pattern: Optional[str] = None) -> Optional[Callable[[str], bool]]:
+    """
+    Monta o filtro de linhas do /logs
+
+    Args:
+        level: Nível mínimo (debug, info, warning, error, critical)
+        pattern: Expressão regular (ou texto literal, se inválida), sem diferenciar maiúsculas
+    """
+    if not level and not pattern:
+        return None
+
+    min_level = LEVELS[level] if level else None
+    regex = None
+    if pattern:
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            regex = re.compile(re.escape(pattern), re.IGNORECASE)
+
+    def predicate(line: str) -> bool:
+        if min_level is not None:
+            match = _LEVEL_RE.match(line)
+            if not match or LEVELS[match.group(1).lower()] < min_level:
+                return False
+        return regex is None or regex.search(line) is not None
+
+    return predicate
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    # Confere com a leitura ingênua em vários tamanhos de bloco
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bot.log"
+        levels = ["DEBUG", "INFO", "WARNING", "ERROR"]
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in range(200000):
+                f.write(f"2024-01-01 12:00:00 [{levels[i % 4]}] mensagem {i} çãé\n")
+        all_lines = path.read_text(encoding='utf-8').splitlines()
+
+        for block in (7, 64, 8192):
+            assert tail_lines(path, 20, block_size=block) == all_lines[-20:], block
+            errors = [line for line in all_lines if "[ERROR]" in line][-5:]
+            assert tail_lines(path, 5, make_filter("error"), block_size=block) == errors, block
+        assert tail_lines(path, 3, make_filter(pattern="mensagem 19999[7-9] ")) == all_lines[-3:]
+        assert tail_lines(path, 10, make_filter(pattern="nunca aparece")) == []
+
+        small = Path(tmp) / "small.log"
+        small.write_text("a\nb", encoding='utf-8')
+        assert tail_lines(small, 5, block_size=1) == ["a", "b"]
+
+        start = time.perf_counter()
+        tail_lines(path, 20)
+        tail_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(path, 'r', encoding='utf-8') as f:
+            f.readlines()[-20:]
+        readlines_time = time.perf_counter() - start
+
+        size_mb = path.stat().st_size / 1024 / 1024
+        print(f"✅ tail OK | arquivo {size_mb:.1f}MB: tail {tail_time * 1000:.2f}ms x readlines {readlines_time * 1000:.1f}ms")
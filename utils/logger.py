@@ -1,14 +1,60 @@
 """
 Sistema de logs personalizado para o GameFi RADAR BR Bot
+
+As chamadas de log só colocam o registro em uma fila (QueueHandler). Console
+e arquivo são escritos por uma thread em segundo plano (QueueListener), então
+stdout lento não trava o scheduler nem o event loop do admin bot. A fila é
+esvaziada em shutdown() (também registrado no atexit).
+
+Além das mensagens para humanos, o logger grava eventos estruturados em
+logs/events.jsonl (uma linha JSON por evento, com job_id, estágio, duração e
+contagens). Eventos não aparecem no console nem no bot.log.
 """
 
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+import time
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
+from typing import Callable, Dict, Iterator, List
 import colorlog
 
-from config.config import LOG_LEVEL, LOG_FILE, LOGS_DIR
+from config.config import (
+    LOG_LEVEL, LOG_FILE, LOGS_DIR, LOG_MAX_BYTES, LOG_ROTATE_HOURS, LOG_BACKUP_COUNT,
+    LOG_EVENTS, LOG_EVENTS_FILE
+)
+from utils.log_rotation import SizeAndTimeRotatingFileHandler
+
+
+# Job em execução (propaga para threads via to_thread e para o loop compartilhado)
+current_job_id: contextvars.ContextVar = contextvars.ContextVar("job_id", default=None)
+
+
+def _is_event(record: logging.LogRecord) -> bool:
+    return hasattr(record, "event")
+
+
+def _is_message(record: logging.LogRecord) -> bool:
+    return not hasattr(record, "event")
+
+
+class JsonEventFormatter(logging.Formatter):
+    """Formata um evento estruturado como uma linha JSON"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "event": record.getMessage(),
+        }
+        data.update(record.event)
+        return json.dumps(data, ensure_ascii=False, default=str)
 
 
 class BotLogger:
@@ -18,16 +64,45 @@ class BotLogger:
         self.logger = logging.getLogger(name)
         self.logger.setLevel(getattr(logging, LOG_LEVEL))
         
-        # Remove handlers existentes
-        self.logger.handlers = []
+        # Handlers de saída (rodam na thread do listener)
+        self.handlers = [
+            self._setup_console_handler(),  # Console (com cores)
+            self._setup_file_handler(),     # Arquivo
+        ]
+        for handler in self.handlers:
+            handler.addFilter(_is_message)
+        if LOG_EVENTS:
+            self.handlers.append(self._setup_events_handler())  # Eventos JSON
+        
+        # Eventos sempre são emitidos, independente de LOG_LEVEL
+        self.events = logging.getLogger(f"{name}.events")
+        self.events.setLevel(logging.INFO)
+        self._observers: List[Callable[[str, Dict], None]] = []
         
-        # Handler para console (com cores)
-        self._setup_console_handler()
+        # O logger só enfileira; a I/O fica com o listener
+        self._queue = queue.SimpleQueue()
+        self.logger.handlers = [logging.handlers.QueueHandler(self._queue)]
+        self._listener = logging.handlers.QueueListener(
+            self._queue, *self.handlers, respect_handler_level=True
+        )
+        self._listener.start()
+        atexit.register(self.shutdown)
+    
+    def shutdown(self):
+        """Esvazia a fila e para a thread de escrita (idempotente)"""
+        if self._listener is None:
+            return
+        self._listener.stop()
+        self._listener = None
         
-        # Handler para arquivo
-        self._setup_file_handler()
+        # Logs depois do shutdown são escritos direto, em vez de perdidos
+        self.logger.handlers = list(self.handlers)
+        for handler in self.handlers:
+            handler.flush()
+            if isinstance(handler, SizeAndTimeRotatingFileHandler):
+                handler.wait_compression(timeout=30)
     
-    def _setup_console_handler(self):
+    def _setup_console_handler(self) -> logging.Handler:
         """Configura handler colorido para o console"""
         console_handler = colorlog.StreamHandler(sys.stdout)
         console_handler.setLevel(getattr(logging, LOG_LEVEL))
@@ -46,16 +121,19 @@ class BotLogger:
         )
         
         console_handler.setFormatter(console_format)
-        self.logger.addHandler(console_handler)
+        return console_handler
     
-    def _setup_file_handler(self):
-        """Configura handler para arquivo de log"""
+    def _setup_file_handler(self) -> logging.Handler:
+        """Configura handler para arquivo de log (com rotação)"""
         # Garante que o diretório existe
         LOGS_DIR.mkdir(exist_ok=True)
         
-        file_handler = logging.FileHandler(
+        # Rotação por tamanho/tempo com backups .gz (disco limitado)
+        file_handler = SizeAndTimeRotatingFileHandler(
             LOG_FILE,
-            encoding='utf-8'
+            max_bytes=LOG_MAX_BYTES,
+            rotate_hours=LOG_ROTATE_HOURS,
+            backup_count=LOG_BACKUP_COUNT
         )
         file_handler.setLevel(logging.DEBUG)  # Arquivo sempre grava tudo
         
@@ -66,50 +144,138 @@ class BotLogger:
         )
         
         file_handler.setFormatter(file_format)
-        self.logger.addHandler(file_handler)
+        return file_handler
+    
+    def _log(self, level: int, message, args, prefix: str = ""):
+        """
+        Emite o log só se o nível estiver ativo
+        
+        A mensagem pode ter argumentos no estilo % (formatados só se o
+        registro for emitido) ou ser um callable sem argumentos que retorna
+        o texto, para mensagens caras de montar.
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        if callable(message):
+            message = message()
+        if prefix:
+            message = prefix + message
+        # stacklevel aponta o registro para quem chamou o BotLogger
+        self.logger.log(level, message, *args, stacklevel=3)
+    
+    def _setup_events_handler(self) -> logging.Handler:
+        """Configura handler dos eventos estruturados (JSON lines)"""
+        events_handler = SizeAndTimeRotatingFileHandler(
+            LOG_EVENTS_FILE,
+            max_bytes=LOG_MAX_BYTES,
+            rotate_hours=LOG_ROTATE_HOURS,
+            backup_count=LOG_BACKUP_COUNT
+        )
+        events_handler.addFilter(_is_event)
+        events_handler.setFormatter(JsonEventFormatter())
+        return events_handler
     
-    def info(self, message):
+    def event(self, name: str, **fields):
+        """
+        Grava um evento estruturado (não aparece no console)
+        
+        Args:
+            name: Nome do evento (ex: 'stage')
+            **fields: Campos extras (contagens, duração, erro...)
+        """
+        payload = {"job_id": current_job_id.get()}
+        payload.update(fields)
+        for observer in self._observers:
+            try:
+                observer(name, payload)
+            except Exception as e:
+                self.debug("Observer de eventos falhou: %s", e)
+        if LOG_EVENTS:
+            self.events.info(name, extra={"event": payload})
+    
+    def add_observer(self, observer: Callable[[str, Dict], None]):
+        """
+        Registra uma função chamada a cada evento (ex: métricas)
+        
+        Args:
+            observer: Recebe (nome do evento, campos); roda na thread de quem emitiu
+        """
+        self._observers.append(observer)
+    
+    @contextmanager
+    def stage(self, stage: str, **fields) -> Iterator[Dict]:
+        """
+        Mede um estágio do job e grava o evento 'stage' ao final
+        
+        O bloco recebe o dicionário de campos para preencher contagens. Exceção
+        que escapa do bloco vira status 'error' com a classe do erro; erros
+        tratados dentro do bloco podem ser marcados com fields['error'].
+        
+        Exemplo:
+            with logger.stage("fetch", source="newsapi") as ev:
+                ev["news"] = len(news)
+        """
+        start = time.perf_counter()
+        try:
+            yield fields
+        except Exception as e:
+            fields.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            duration_ms = round((time.perf_counter() - start) * 1000, 1)
+            status = "error" if fields.get("error") else "ok"
+            self.event("stage", stage=stage, duration_ms=duration_ms, status=status, **fields)
+    
+    @contextmanager
+    def job(self, name: str) -> Iterator[Dict]:
+        """Executa um job com job_id próprio; o job inteiro vira o estágio 'job'"""
+        token = current_job_id.set(f"{name}-{uuid.uuid4().hex[:8]}")
+        try:
+            with self.stage("job", job=name) as fields:
+                yield fields
+        finally:
+            current_job_id.reset(token)
+    
+    def info(self, message, *args):
         """Log de informação"""
-        self.logger.info(message)
+        self._log(logging.INFO, message, args)
     
-    def debug(self, message):
+    def debug(self, message, *args):
         """Log de debug"""
-        self.logger.debug(message)
+        self._log(logging.DEBUG, message, args)
     
-    def warning(self, message):
+    def warning(self, message, *args):
         """Log de aviso"""
-        self.logger.warning(message)
+        self._log(logging.WARNING, message, args)
     
-    def error(self, message):
+    def error(self, message, *args):
         """Log de erro"""
-        self.logger.error(message)
+        self._log(logging.ERROR, message, args)
     
-    def critical(self, message):
+    def critical(self, message, *args):
         """Log crítico"""
-        self.logger.critical(message)
+        self._log(logging.CRITICAL, message, args)
     
     def section(self, title):
         """Cria uma seção visual no log"""
         separator = "=" * 60
-        self.logger.info(f"\n{separator}")
-        self.logger.info(f"  {title}")
-        self.logger.info(f"{separator}\n")
+        self._log(logging.INFO, "\n%s\n  %s\n%s\n", (separator, title, separator))
     
-    def success(self, message):
+    def success(self, message, *args):
         """Log de sucesso (info com emoji)"""
-        self.logger.info(f"✅ {message}")
+        self._log(logging.INFO, message, args, "✅ ")
     
-    def failed(self, message):
+    def failed(self, message, *args):
         """Log de falha (error com emoji)"""
-        self.logger.error(f"❌ {message}")
+        self._log(logging.ERROR, message, args, "❌ ")
     
-    def processing(self, message):
+    def processing(self, message, *args):
         """Log de processamento (info com emoji)"""
-        self.logger.info(f"⚙️  {message}")
+        self._log(logging.INFO, message, args, "⚙️  ")
     
-    def posting(self, message):
+    def posting(self, message, *args):
         """Log de postagem (info com emoji)"""
-        self.logger.info(f"📤 {message}")
+        self._log(logging.INFO, message, args, "📤 ")
 
 
 # Instância global do logger
@@ -141,4 +307,31 @@ if __name__ == "__main__":
     logger.failed("Operação falhou!")
     logger.processing("Processando dados...")
     logger.posting("Postando no canal...")
-    print(f"\n📁 Logs salvos em: {LOG_FILE}")
\ No newline at end of file
+    
+    # Latência de uma chamada de log (só enfileira)
+    import time
+    logger.logger.setLevel(logging.DEBUG)
+    start = time.perf_counter()
+    for i in range(1000):
+        logger.debug("Mensagem de benchmark %d", i)
+    elapsed = time.perf_counter() - start
+    
+    # Custo por entrada com o nível desligado: f-string antiga x % preguiçoso
+    article = {"title": "Axie Infinity anuncia nova temporada de Origins com prêmios em AXS" * 2}
+    logger.logger.setLevel(logging.INFO)
+    runs = 100000
+    
+    start = time.perf_counter()
+    for _ in range(runs):
+        logger.debug(f"Notícia já usada, pulando: {article.get('title', '')[:50]}...")
+    eager = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for _ in range(runs):
+        logger.debug("Notícia já usada, pulando: %.50s...", article.get('title', ''))
+    lazy = time.perf_counter() - start
+    
+    logger.shutdown()
+    print(f"\n⏱️  1.000 logs enfileirados em {elapsed * 1000:.1f}ms ({elapsed * 1000:.2f}µs por chamada)")
+    print(f"⏱️  DEBUG desligado, por entrada: f-string {eager / runs * 1e9:.0f}ns | lazy {lazy / runs * 1e9:.0f}ns")
+    print(f"📁 Logs salvos em: {LOG_FILE}")
\ No newline at end of file
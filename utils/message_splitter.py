@@ -0,0 +1,232 @@
+"""
+Divisão de mensagens HTML longas respeitando o limite do Telegram (4096 caracteres)
+
+Quebra preferencialmente em parágrafos, depois em linhas (itens de lista) e por
+último em espaços. Tags abertas (<b>, <i>, <a>, ...) no ponto de corte são
+fechadas no fim do pedaço e reabertas no início do próximo, então cada pedaço
+é HTML válido por si só.
+"""
+
+import re
+from collections import deque
+from typing import List, Optional, Tuple
+
+
+# Limite de caracteres de uma mensagem do Telegram
+TELEGRAM_MAX_LENGTH = 4096
+
+# Tokens: tag HTML | quebra de parágrafo | quebra de linha | espaços | entidade | palavra
+_TOKEN_RE = re.compile(
+    r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>'
+    r'|\n[ \t]*\n\s*'
+    r'|\n'
+    r'|[ \t]+'
+    r'|&#?\w+;'
+    r'|[^\s<&]+'
+    r'|[<&]'
+)
+
+# Tipos de ponto de quebra, do mais desejável para o menos
+_BREAK_PARAGRAPH = 0
+_BREAK_LINE = 1
+_BREAK_SPACE = 2
+
+# Ponto de quebra: (índice em parts, tamanho acumulado, pilha de tags abertas)
+_Break = Tuple[int, int, Tuple[Tuple[str, str], ...]]
+
+
+def _tokenize(text: str, max_token: int):
+    """Gera tokens, fatiando palavras maiores que max_token"""
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group(0)
+        if match.group(2) is None and len(token) > max_token and not token.isspace():
+            for i in range(0, len(token), max_token):
+                yield token[i:i + max_token], None, None
+        else:
+            yield token, match.group(1), match.group(2)
+
+
+def _closers(stack) -> str:
+    """Tags de fechamento para uma pilha de tags abertas"""
+    return ''.join(f"</{name}>" for name, _ in reversed(stack))
+
+
+def split_html_message(text: str, limit: int = TELEGRAM_MAX_LENGTH) -> List[str]:
+    """
+    Divide texto HTML do Telegram em pedaços de no máximo `limit` caracteres
+
+    Args:
+        text: Texto já convertido para HTML
+        limit: Tamanho máximo de cada pedaço
+
+    Returns:
+        Lista de pedaços, na ordem de envio
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks = []
+    threshold = limit // 2
+    tokens = deque(_tokenize(text, max(1, limit // 4)))
+
+    parts: List[str] = []
+    size = 0
+    stack: List[Tuple[str, str]] = []
+    closing_len = 0
+    breaks: List[Optional[_Break]] = [None, None, None]
+    free_space: Optional[_Break] = None  # Espaço fora de qualquer tag
+
+    while tokens:
+        token, closing, name = tokens.popleft()
+
+        # Custo de fechamento das tags após este token
+        new_closing = closing_len
+        if name is not None:
+            if closing:
+                if stack and stack[-1][0] == name.lower():
+                    new_closing -= len(name) + 3
+            else:
+                new_closing += len(name) + 3
+
+        if parts and size + len(token) + new_closing > limit:
+            # Escolhe o melhor ponto de quebra disponível
+            paragraph, line, space = breaks
+            if paragraph and paragraph[1] >= threshold:
+                cut = paragraph
+            elif line and line[1] >= threshold:
+                cut = line
+            elif free_space and free_space[1] >= threshold:
+                cut = free_space
+            else:
+                cut = space or line or paragraph or (len(parts), size, tuple(stack))
+
+            index, _, open_tags = cut
+            chunk = (''.join(parts[:index]).rstrip() + _closers(open_tags)).strip()
+            if chunk:
+                chunks.append(chunk)
+
+            # Reprocessa o restante reabrindo as tags que estavam abertas
+            tokens.appendleft((token, closing, name))
+            for part in reversed(parts[index:]):
+                tokens.appendleft(_retokenize(part))
+            for tag_name, open_tag in reversed(open_tags):
+                tokens.appendleft((open_tag, '', tag_name))
+
+            parts = []
+            size = 0
+            stack = []
+            closing_len = 0
+            breaks = [None, None, None]
+            free_space = None
+            continue
+
+        # Não começa pedaço com espaço em branco
+        if not parts and token.isspace():
+            continue
+
+        parts.append(token)
+        size += len(token)
+        closing_len = new_closing
+
+        if name is not None:
+            tag = name.lower()
+            if closing:
+                if stack and stack[-1][0] == tag:
+                    stack.pop()
+            else:
+                stack.append((tag, token))
+        elif token.isspace():
+            point = (len(parts), size, tuple(stack))
+            if '\n' in token:
+                breaks[_BREAK_PARAGRAPH if token.count('\n') > 1 else _BREAK_LINE] = point
+            else:
+                breaks[_BREAK_SPACE] = point
+                if not stack:
+                    free_space = point
+
+    tail = (''.join(parts) + _closers(stack)).strip()
+    if tail:
+        chunks.append(tail)
+
+    return chunks
+
+
+def _retokenize(part: str):
+    """Reconstrói a tupla de token a partir do texto já tokenizado"""
+    match = _TOKEN_RE.match(part)
+    if match and match.end() == len(part):
+        return part, match.group(1), match.group(2)
+    return part, None, None
+
+
+if __name__ == "__main__":
+    # Testes de fuzz + benchmark de throughput
+    import random
+    import time
+    from html.parser import HTMLParser
+
+    class _Checker(HTMLParser):
+        """Valida balanceamento de tags e extrai o texto"""
+
+        def __init__(self):
+            super().__init__(convert_charrefs=False)
+            self.stack = []
+            self.text = []
+
+        def handle_starttag(self, tag, attrs):
+            self.stack.append(tag)
+
+        def handle_endtag(self, tag):
+            assert self.stack and self.stack[-1] == tag, f"Tag </{tag}> desbalanceada"
+            self.stack.pop()
+
+        def handle_data(self, data):
+            self.text.append(data)
+
+        def handle_entityref(self, name):
+            self.text.append(f"&{name};")
+
+    def _text_of(html: str) -> str:
+        checker = _Checker()
+        checker.feed(html)
+        checker.close()
+        assert not checker.stack, f"Tags não fechadas: {checker.stack}"
+        return ''.join(''.join(checker.text).split())
+
+    def _random_post(rng: random.Random) -> str:
+        words = ["GameFi", "token", "Axie", "&amp;", "US$", "10M", "jogadores", "Web3", "x" * rng.randint(1, 40)]
+        paragraphs = []
+        for _ in range(rng.randint(1, 60)):
+            lines = []
+            for _ in range(rng.randint(1, 6)):
+                line = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 60)))
+                kind = rng.random()
+                if kind < 0.2:
+                    line = f"<b>{line}</b>"
+                elif kind < 0.3:
+                    line = f'<a href="https://example.com/{rng.randint(0, 999)}">{line}</a>'
+                elif kind < 0.4:
+                    line = f"- <i>{line}</i> fim"
+                lines.append(line)
+            paragraphs.append('\n'.join(lines))
+        return '\n\n'.join(paragraphs)
+
+    rng = random.Random(1234)
+    for case in range(500):
+        post = _random_post(rng)
+        limit = rng.choice([64, 200, 1000, TELEGRAM_MAX_LENGTH])
+        chunks = split_html_message(post, limit)
+        for chunk in chunks:
+            assert len(chunk) <= limit, f"caso {case}: pedaço com {len(chunk)} > {limit}"
+        joined = ''.join(_text_of(chunk) for chunk in chunks)
+        assert joined == _text_of(post), f"caso {case}: texto alterado"
+    print("✅ Fuzz: 500 casos OK")
+
+    big = _random_post(random.Random(42)) * 20
+    start = time.perf_counter()
+    rounds = 5
+    for _ in range(rounds):
+        split_html_message(big)
+    elapsed = time.perf_counter() - start
+    mb = len(big) * rounds / 1_000_000
+    print(f"⏱️  Benchmark: {mb / elapsed:.1f} MB/s ({len(big)} caracteres, {rounds} rodadas)")
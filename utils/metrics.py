@@ -0,0 +1,253 @@
+"""
+Métricas de latência por estágio (fetch, feeds RSS, Claude, Telegram, job)
+
+Os spans são os próprios logger.stage(...): este módulo se registra como
+observer dos eventos 'stage' e alimenta histogramas em memória por
+(estágio, fonte). Os incrementos são somados ao data/metrics.json
+(com lock de arquivo, então main.py e admin_panel.py somam no mesmo arquivo)
+ao fim de cada job e na saída do processo.
+
+Expostos em /metrics no admin bot e, se METRICS_PORT > 0, em texto no
+formato Prometheus via HTTP.
+"""
+
+import atexit
+import bisect
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.config import METRICS_FILE, METRICS_PORT
+from utils.logger import logger
+from utils.state import JsonStateFile
+
+
+# Limites superiores dos buckets (ms); o último bucket é +Inf
+BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, 300000]
+
+
+class Histogram:
+    """Histograma de durações com buckets fixos"""
+
+    def __init__(self, data: Optional[Dict] = None):
+        data = data or {}
+        self.counts: List[int] = list(data.get("counts") or [0] * (len(BUCKETS_MS) + 1))
+        self.total_ms: float = data.get("sum_ms", 0.0)
+        self.max_ms: float = data.get("max_ms", 0.0)
+        self.errors: int = data.get("errors", 0)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, duration_ms: float, error: bool = False):
+        self.counts[bisect.bisect_left(BUCKETS_MS, duration_ms)] += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        if error:
+            self.errors += 1
+
+    def merge(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.errors += other.errors
+
+    def percentile(self, pct: float) -> float:
+        """Estimativa do percentil (interpolação linear dentro do bucket)"""
+        total = self.count
+        if not total:
+            return 0.0
+        rank = pct / 100 * total
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = BUCKETS_MS[i - 1] if i > 0 else 0
+                upper = BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+                estimate = lower + (upper - lower) * (rank - cumulative) / bucket_count
+                return min(estimate, self.max_ms)
+            cumulative += bucket_count
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        return {"counts": self.counts, "sum_ms": round(self.total_ms, 1),
+                "max_ms": self.max_ms, "errors": self.errors}
+
+
+class MetricsRegistry:
+    """Histogramas por (estágio, fonte), persistidos incrementalmente em disco"""
+
+    def __init__(self, store_file: Path = METRICS_FILE):
+        self.store_file = Path(store_file)
+        self._store: Optional[JsonStateFile] = None
+        self._pending: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def store(self) -> JsonStateFile:
+        """Arquivo de métricas (aberto só quando há algo para ler ou gravar)"""
+        if self._store is None:
+            self._store = JsonStateFile(
+                self.store_file, lambda: {"histograms": {}, "since": datetime.now().isoformat()}
+            )
+        return self._store
+
+    @staticmethod
+    def key(stage: str, source: Optional[str] = None) -> str:
+        return f"{stage}|{source}" if source else stage
+
+    def observe(self, stage: str, duration_ms: float, source: Optional[str] = None, error: bool = False):
+        """Registra uma duração (em memória até o próximo flush)"""
+        with self._lock:
+            key = self.key(stage, source)
+            histogram = self._pending.get(key)
+            if histogram is None:
+                histogram = self._pending[key] = Histogram()
+            histogram.observe(duration_ms, error)
+
+    def _on_event(self, name: str, fields: Dict):
+        """Observer do logger: cada evento 'stage' vira uma observação"""
+        if name != "stage":
+            return
+        self.observe(fields["stage"], fields["duration_ms"],
+                     source=fields.get("source") or fields.get("job"),
+                     error=fields.get("status") == "error")
+        # Fim de job: bom momento para persistir
+        if fields["stage"] == "job":
+            self.flush()
+
+    def flush(self):
+        """Soma os incrementos pendentes ao arquivo de métricas"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            with self.store.update() as data:
+                for key, delta in pending.items():
+                    histogram = Histogram(data["histograms"].get(key))
+                    histogram.merge(delta)
+                    data["histograms"][key] = histogram.to_dict()
+        except OSError as e:
+            logger.warning(f"Não foi possível salvar métricas: {str(e)}")
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        """Histogramas acumulados (disco + pendentes deste processo)"""
+        self.flush()
+        with self.store.read() as data:
+            return {key: Histogram(value) for key, value in data["histograms"].items()}
+
+    def since(self) -> str:
+        with self.store.read() as data:
+            return data.get("since", "")
+
+    def reset(self):
+        """Zera todas as métricas"""
+        with self._lock:
+            self._pending = {}
+        self.store.reset()
+
+    def render_prometheus(self) -> str:
+        """Métricas no formato texto do Prometheus"""
+        lines = [
+            "# HELP gamefibot_stage_duration_seconds Duração dos estágios dos jobs",
+            "# TYPE gamefibot_stage_duration_seconds histogram",
+        ]
+        errors = []
+        for key, histogram in sorted(self.snapshot().items()):
+            stage, _, source = key.partition("|")
+            labels = f'stage="{stage}",source="{source}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS_MS + [None], histogram.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound is None else f"{bound / 1000:g}"
+                lines.append(f'gamefibot_stage_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"gamefibot_stage_duration_seconds_sum{{{labels}}} {histogram.total_ms / 1000:.3f}")
+            lines.append(f"gamefibot_stage_duration_seconds_count{{{labels}}} {histogram.count}")
+            errors.append(f"gamefibot_stage_errors_total{{{labels}}} {histogram.errors}")
+
+        lines.append("# HELP gamefibot_stage_errors_total Estágios que terminaram com erro")
+        lines.append("# TYPE gamefibot_stage_errors_total counter")
+        lines.extend(errors)
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int = METRICS_PORT):
+        """Sobe o endpoint Prometheus (GET /metrics) em uma thread daemon"""
+        if port <= 0 or self._server is not None:
+            return
+
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("metrics http: " + format, *args)
+
+        try:
+            self._server = ThreadingHTTPServer(("0.0.0.0", port), _Handler)
+        except OSError as e:
+            logger.warning(f"Endpoint de métricas não iniciado na porta {port}: {str(e)}")
+            return
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"📈 Métricas Prometheus em http://0.0.0.0:{port}/metrics")
+
+    def stop_http_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+# Instância global das métricas
+metrics = MetricsRegistry()
+logger.add_observer(metrics._on_event)
+atexit.register(metrics.flush)
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+
+    # Percentis do histograma x percentis exatos (erro limitado ao bucket)
+    samples = [random.lognormvariate(7, 1) for _ in range(20000)]
+    histogram = Histogram()
+    for value in samples:
+        histogram.observe(value)
+    samples.sort()
+    for pct in (50, 95, 99):
+        exact = samples[int(pct / 100 * len(samples)) - 1]
+        index = bisect.bisect_left(BUCKETS_MS, exact)
+        lower = BUCKETS_MS[index - 1] if index > 0 else 0
+        upper = BUCKETS_MS[index] if index < len(BUCKETS_MS) else histogram.max_ms
+        estimate = histogram.percentile(pct)
+        assert lower <= estimate <= upper, (pct, exact, estimate)
+        print(f"p{pct}: exato {exact:.0f}ms | estimado {estimate:.0f}ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Duas instâncias (dois processos) somam no mesmo arquivo
+        a, b = MetricsRegistry(Path(tmp) / "metrics.json"), MetricsRegistry(Path(tmp) / "metrics.json")
+        for registry in (a, b):
+            registry.observe("claude", 1200)
+            registry.flush()
+        assert a.snapshot()["claude"].count == 2
+
+        start = time.perf_counter()
+        registry = MetricsRegistry(Path(tmp) / "bench.json")
+        for _ in range(100000):
+            registry.observe("fetch", 321.0, source="newsapi")
+        elapsed = time.perf_counter() - start
+        registry.flush()
+    print(f"✅ Métricas OK | observe: {elapsed / 100000 * 1e9:.0f}ns por chamada")
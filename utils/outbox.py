@@ -0,0 +1,224 @@
+"""
+Outbox persistente (write-ahead) para entregas no Telegram
+
+Todo conteúdo gerado é gravado aqui ANTES de ser enviado. O worker de entrega
+registra o message_id do Telegram assim que o envio é confirmado e só então
+grava o histórico e marca o item como concluído. Se o processo morrer no meio,
+o próximo start retoma os itens pendentes sem chamar o Claude de novo.
+
+O arquivo é protegido por lock de arquivo (main.py e admin_panel.py podem
+postar ao mesmo tempo) e recarregado quando outro processo o altera.
+"""
+
+import copy
+import json
+import functools
+import hashlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from config.config import OUTBOX_FILE, OUTBOX_MAX_AGE_HOURS
+from utils.file_lock import FileLock
+from utils.logger import logger
+from utils.state import atomic_write_json, file_signature
+
+
+# Estados de um item do outbox
+STATUS_PENDING = "pending"    # Enfileirado, ainda não enviado
+STATUS_SENT = "sent"          # Enviado ao Telegram (message_id registrado)
+STATUS_DONE = "done"          # Registrado no histórico - entrega concluída
+STATUS_EXPIRED = "expired"    # Ficou velho demais para ser postado
+
+
+def _locked(method):
+    """Executa o método com o lock do outbox, recarregando se outro processo o alterou"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            if file_signature(self.outbox_file) != self._signature:
+                self.data = self._load()
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class PostOutbox:
+    """Fila persistente de postagens com chave de idempotência"""
+
+    def __init__(self, outbox_file: Path = OUTBOX_FILE):
+        self.outbox_file = outbox_file
+        self._lock = FileLock(outbox_file)
+        with self._lock:
+            self.data = self._load()
+
+    def _load(self) -> Dict:
+        """Carrega o outbox do arquivo JSON"""
+        self._signature = file_signature(self.outbox_file)
+        if self.outbox_file.exists():
+            try:
+                with open(self.outbox_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                logger.error("Arquivo do outbox corrompido. Itens pendentes podem ter sido perdidos.")
+        return {"items": []}
+
+    def _save(self):
+        """Salva o outbox de forma atômica (arquivo temporário + fsync + rename)"""
+        atomic_write_json(self.outbox_file, self.data)
+        self._signature = file_signature(self.outbox_file)
+
+    @staticmethod
+    def make_key(post_type: str, content: str) -> str:
+        """Gera a chave de idempotência de uma postagem"""
+        return hashlib.sha256(f"{post_type}\0{content}".encode('utf-8')).hexdigest()
+
+    def _find(self, key: str) -> Optional[Dict]:
+        """Busca um item pela chave de idempotência"""
+        for item in self.data["items"]:
+            if item["key"] == key:
+                return item
+        return None
+
+    @_locked
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Estado atual de um item (relido do arquivo se outro processo o alterou)
+
+        Retorna uma cópia: quem decide algo sobre a entrega deve chamar get()
+        de novo em vez de confiar em um item obtido antes.
+        """
+        item = self._find(key)
+        return copy.deepcopy(item) if item else None
+
+    @_locked
+    def enqueue(self, post_type: str, content: str, title: str = "") -> Dict:
+        """
+        Enfileira uma postagem (ou retorna o item existente com a mesma chave)
+
+        Args:
+            post_type: 'resumo_diario' ou 'noticia_relevante'
+            content: Conteúdo completo da postagem
+            title: Título da postagem
+
+        Returns:
+            Item do outbox
+        """
+        key = self.make_key(post_type, content)
+        existing = self._find(key)
+        if existing:
+            logger.debug(f"Item já presente no outbox ({existing['status']}): {key[:12]}")
+            return existing
+
+        item = {
+            "key": key,
+            "type": post_type,
+            "title": title,
+            "content": content,
+            "status": STATUS_PENDING,
+            "message_id": None,
+            "deliveries": {},
+            "attempts": 0,
+            "last_error": None,
+            "created_at": datetime.now().isoformat(),
+            "updated_at": datetime.now().isoformat()
+        }
+
+        self.data["items"].append(item)
+        self._save()
+
+        logger.debug(f"Postagem enfileirada no outbox: {post_type} ({key[:12]})")
+        return item
+
+    @_locked
+    def _update(self, key: str, **fields):
+        """Atualiza campos de um item e persiste"""
+        item = self._find(key)
+        if not item:
+            return
+        item.update(fields)
+        item["updated_at"] = datetime.now().isoformat()
+        self._save()
+
+    @_locked
+    def record_channel_progress(self, key: str, chat_id: str, message_ids: List[int], status: str = STATUS_PENDING):
+        """
+        Registra o progresso da entrega em um canal
+
+        Args:
+            key: Chave de idempotência do item
+            chat_id: Canal de destino
+            message_ids: IDs dos pedaços já enviados neste canal
+            status: STATUS_PENDING enquanto faltar pedaço, STATUS_SENT ao concluir
+        """
+        item = self._find(key)
+        if not item:
+            return
+        deliveries = dict(item.get("deliveries") or {})
+        deliveries[chat_id] = {"status": status, "message_ids": list(message_ids)}
+        self._update(key, deliveries=deliveries)
+
+    def record_sent(self, key: str, message_id: int):
+        """Registra o message_id do canal principal quando a entrega termina"""
+        self._update(key, status=STATUS_SENT, message_id=message_id, last_error=None)
+
+    @_locked
+    def record_failure(self, key: str, error: str):
+        """Registra uma tentativa de entrega que falhou (item continua pendente)"""
+        item = self._find(key)
+        if item:
+            self._update(key, attempts=item.get("attempts", 0) + 1, last_error=error)
+
+    def mark_done(self, key: str):
+        """Marca item como concluído (histórico já registrado)"""
+        self._update(key, status=STATUS_DONE)
+
+    @_locked
+    def pending(self) -> List[Dict]:
+        """
+        Retorna itens que ainda precisam de entrega, em ordem de criação
+
+        Itens pendentes mais velhos que OUTBOX_MAX_AGE_HOURS são expirados em vez
+        de postados. Itens já enviados (total ou parcialmente) sempre são concluídos.
+        """
+        cutoff = datetime.now() - timedelta(hours=OUTBOX_MAX_AGE_HOURS)
+        result = []
+        expired = 0
+
+        for item in self.data["items"]:
+            if item["status"] == STATUS_SENT:
+                result.append(item)
+            elif item["status"] == STATUS_PENDING:
+                # Postagem já parcialmente enviada (algum canal/pedaço) é sempre concluída
+                started = any(d.get("message_ids") for d in (item.get("deliveries") or {}).values())
+                if not started and datetime.fromisoformat(item["created_at"]) < cutoff:
+                    item["status"] = STATUS_EXPIRED
+                    expired += 1
+                else:
+                    result.append(item)
+
+        if expired:
+            self._save()
+            logger.warning(f"Outbox: {expired} item(ns) pendente(s) expirado(s) sem entrega")
+
+        return result
+
+    @_locked
+    def purge(self, days: int = 7):
+        """Remove itens concluídos/expirados mais antigos que N dias"""
+        cutoff = datetime.now() - timedelta(days=days)
+        before_count = len(self.data["items"])
+
+        self.data["items"] = [
+            item for item in self.data["items"]
+            if item["status"] in (STATUS_PENDING, STATUS_SENT)
+            or datetime.fromisoformat(item["updated_at"]) >= cutoff
+        ]
+
+        removed = before_count - len(self.data["items"])
+        if removed > 0:
+            self._save()
+            logger.info(f"Outbox: {removed} itens antigos removidos")
+
+
+# Instância global do outbox
+outbox = PostOutbox()
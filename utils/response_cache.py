@@ -0,0 +1,175 @@
+"""
+Cache de respostas do Claude endereçado pelo conteúdo do pedido
+
+A chave é o SHA-256 de (modelo, system prompt, prompt, temperatura,
+max_tokens, variante). Cada resposta fica em um arquivo .json.gz próprio em
+data/claude_cache/; um índice guarda o último uso de cada chave para o
+despejo LRU (CLAUDE_CACHE_MAX_ENTRIES) e o TTL (CLAUDE_CACHE_TTL_HOURS).
+
+Desligado em produção: por padrão (CLAUDE_CACHE=auto) só vale com
+MODE=test. CLAUDE_CACHE=true liga em qualquer modo (benchmarks de replay).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from config.config import CLAUDE_CACHE_ENABLED, CLAUDE_CACHE_DIR, CLAUDE_CACHE_MAX_ENTRIES, CLAUDE_CACHE_TTL_HOURS
+from utils.logger import logger
+from utils.state import JsonStateFile
+
+
+class ResponseCache:
+    """Respostas do Claude em disco, com LRU e TTL"""
+
+    def __init__(self, directory: Path = CLAUDE_CACHE_DIR, enabled: bool = CLAUDE_CACHE_ENABLED,
+                 max_entries: int = CLAUDE_CACHE_MAX_ENTRIES, ttl_hours: float = CLAUDE_CACHE_TTL_HOURS):
+        self.directory = Path(directory)
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_hours * 3600
+        self._index: Optional[JsonStateFile] = None
+
+    @property
+    def index(self) -> JsonStateFile:
+        """Índice {chave: {created, used}} (criado só quando o cache é usado)"""
+        if self._index is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._index = JsonStateFile(self.directory / "index.json", lambda: {"entries": {}})
+        return self._index
+
+    @staticmethod
+    def key(model: str, request: Dict, variant: Optional[int] = None) -> str:
+        """
+        Impressão digital do pedido
+
+        Args:
+            model: Modelo pedido
+            request: Parâmetros de messages.create (system, messages, temperature, max_tokens)
+            variant: Distingue chamadas idênticas feitas de propósito (rascunhos do best-of-N)
+        """
+        payload = json.dumps(
+            [model, request.get("system"), request.get("messages"), request.get("temperature"),
+             request.get("max_tokens"), variant],
+            ensure_ascii=False, sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json.gz"
+
+    def _expired(self, entry: Dict, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry["created"] > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """Resposta guardada para a chave, ou None (desligado, ausente ou vencida)"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self.index.read() as data:
+            entry = data["entries"].get(key)
+        if entry is None:
+            return None
+
+        text = None
+        if not self._expired(entry, now):
+            try:
+                with gzip.open(self._path(key), "rt", encoding="utf-8") as f:
+                    text = json.load(f)["text"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+        with self.index.update() as data:
+            if text is None:
+                self._drop(data, key)
+            elif key in data["entries"]:
+                data["entries"][key]["used"] = now
+        return text
+
+    def put(self, key: str, text: str, model: str):
+        """Guarda a resposta e despeja as entradas vencidas e as menos usadas"""
+        if not self.enabled or not text:
+            return
+        now = time.time()
+        path = self._path(key)
+        tmp_file = path.with_suffix(".tmp")
+        try:
+            with self.index.update() as data:
+                with gzip.open(tmp_file, "wt", encoding="utf-8") as f:
+                    json.dump({"model": model, "text": text}, f, ensure_ascii=False)
+                os.replace(tmp_file, path)
+                data["entries"][key] = {"created": now, "used": now}
+
+                entries = data["entries"]
+                for old_key in [k for k, e in entries.items() if self._expired(e, now)]:
+                    self._drop(data, old_key)
+                excess = len(entries) - max(1, self.max_entries)
+                if excess > 0:
+                    for old_key in sorted(entries, key=lambda k: entries[k]["used"])[:excess]:
+                        self._drop(data, old_key)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar no cache de respostas: {str(e)}")
+
+    def _drop(self, data: Dict, key: str):
+        data["entries"].pop(key, None)
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> int:
+        """Apaga o cache inteiro; retorna quantas respostas foram removidas"""
+        if not self.directory.exists():
+            return 0
+        with self.index.update() as data:
+            keys = list(data["entries"])
+            for key in keys:
+                self._drop(data, key)
+        return len(keys)
+
+
+# Instância global do cache de respostas
+response_cache = ResponseCache()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    request = {"system": "s", "messages": [{"role": "user", "content": "p"}], "temperature": 0.7, "max_tokens": 10}
+    key = ResponseCache.key("sonnet", request)
+    assert key == ResponseCache.key("sonnet", dict(reversed(list(request.items()))))
+    assert key != ResponseCache.key("haiku", request)
+    assert key != ResponseCache.key("sonnet", dict(request, temperature=0.2))
+    assert key != ResponseCache.key("sonnet", request, variant=2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(Path(tmp), enabled=True, max_entries=3, ttl_hours=1)
+        cache.put(key, "resposta ção", "sonnet")
+        assert cache.get(key) == "resposta ção"
+        assert ResponseCache(Path(tmp), enabled=False).get(key) is None
+
+        # LRU: a entrada usada há mais tempo é despejada
+        keys = [ResponseCache.key("sonnet", request, variant=i) for i in range(1, 4)]
+        for i, k in enumerate(keys):
+            cache.put(k, f"r{i}", "sonnet")
+            time.sleep(0.01)
+        assert cache.get(key) is None and len(list(Path(tmp).glob("*.json.gz"))) == 3
+
+        # TTL
+        cache.ttl_seconds = 0.001
+        time.sleep(0.01)
+        assert cache.get(keys[0]) is None
+
+        start = time.perf_counter()
+        cache = ResponseCache(Path(tmp), enabled=True, max_entries=200, ttl_hours=24)
+        cache.put(key, "x" * 4000, "sonnet")
+        for _ in range(200):
+            cache.get(key)
+        elapsed = (time.perf_counter() - start) / 200
+        assert cache.clear() >= 1 and cache.get(key) is None
+
+    print(f"✅ Cache de respostas OK | get: {elapsed * 1000:.2f}ms")
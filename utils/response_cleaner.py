@@ -0,0 +1,124 @@
+"""
+Limpeza das respostas do Claude em uma única passada
+
+Remove os blocos de tags internas (<search>, <thinking>...) e reduz
+sequências de 3+ quebras de linha a uma linha em branco com um único
+re.sub de uma regex pré-compilada (alternação das tags e das quebras de
+linha).
+
+O resultado é o mesmo da limpeza antiga (um re.sub por tag e depois o das
+quebras de linha) para tags bem aninhadas: as quebras de linha que se juntam
+quando um bloco some são somadas antes de decidir se viram linha em branco.
+
+As tags vêm de CLAUDE_STRIP_TAGS (lista separada por vírgula).
+"""
+
+import re
+from typing import Iterable
+
+from config.config import CLAUDE_STRIP_TAGS
+
+
+class ResponseCleaner:
+    """Remove blocos de tags internas e linhas em branco repetidas"""
+
+    def __init__(self, tags: Iterable[str] = CLAUDE_STRIP_TAGS):
+        self.tags = tuple(tag.strip() for tag in tags if tag.strip())
+        # '\n\n\n+' (e não '\n{3,}') tem prefixo literal: o motor de regex pula
+        # direto para as ocorrências, o que domina o custo em respostas sem tags
+        alternatives = ['\n\n\n+']
+        if self.tags:
+            names = '|'.join(re.escape(tag) for tag in self.tags)
+            # Bloco + quebras de linha logo depois dele
+            alternatives.append(rf'<({names})>.*?</\1>\n*')
+        self._pattern = re.compile('|'.join(alternatives), re.DOTALL)
+
+    def clean(self, response: str) -> str:
+        """Resposta sem tags internas, sem 3+ quebras de linha seguidas e sem espaços nas pontas"""
+        # Sequência atual de quebras de linha (blocos removidos no meio juntam as
+        # quebras de antes e de depois): onde termina, quantas tem no original e
+        # quantas já foram emitidas
+        run_end = -1
+        total = emitted = 0
+
+        def replace(match: re.Match) -> str:
+            nonlocal run_end, total, emitted
+            start, end = match.span()
+            if start != run_end:
+                # Nova sequência: até 2 quebras de linha antes do match já saíram como estão
+                before = 0
+                while before < 2 and start > before and response[start - before - 1] == '\n':
+                    before += 1
+                total = emitted = before
+            text = match.group()
+            total += len(text) - len(text.rstrip('\n')) if match.lastindex else len(text)
+            target = 2 if total >= 3 else total
+            output = '\n' * (target - emitted)
+            emitted = target
+            run_end = end
+            return output
+
+        return self._pattern.sub(replace, response).strip()
+
+
+# Instância global do limpador de respostas
+response_cleaner = ResponseCleaner()
+
+
+if __name__ == "__main__":
+    import random
+    import timeit
+
+    def legacy_clean(response: str) -> str:
+        """Implementação antiga de AIProcessor._clean_response (referência)"""
+        response = re.sub(r'<search>.*?</search>', '', response, flags=re.DOTALL)
+        response = re.sub(r'<searchqualitycheck>.*?</searchqualitycheck>', '', response, flags=re.DOTALL)
+        response = re.sub(r'<searchqualityscore>.*?</searchqualityscore>', '', response, flags=re.DOTALL)
+        response = re.sub(r'<thinking>.*?</thinking>', '', response, flags=re.DOTALL)
+        response = re.sub(r'<analysis>.*?</analysis>', '', response, flags=re.DOTALL)
+        response = re.sub(r'\n{3,}', '\n\n', response)
+        return response.strip()
+
+    cleaner = ResponseCleaner(["search", "searchqualitycheck", "searchqualityscore", "thinking", "analysis"])
+    pieces = ["texto", "**negrito**", " ", "\n", "\n\n", "\n\n\n", "<b>", "</b>", "<searchx>", "a<b", "🎮 ção"]
+
+    def random_block(rng: random.Random, depth: int = 0) -> str:
+        tag = rng.choice(cleaner.tags)
+        inner = "".join(random_fragment(rng, depth + 1) for _ in range(rng.randint(0, 3)))
+        return f"<{tag}>{inner}</{tag}>"
+
+    def random_fragment(rng: random.Random, depth: int = 0) -> str:
+        if depth < 2 and rng.random() < 0.3:
+            return random_block(rng, depth)
+        return rng.choice(pieces)
+
+    # Propriedade: mesma saída da implementação antiga em textos com tags bem aninhadas
+    rng = random.Random(42)
+    for _ in range(20000):
+        text = "".join(random_fragment(rng) for _ in range(rng.randint(0, 12)))
+        assert cleaner.clean(text) == legacy_clean(text), repr(text)
+
+    # Propriedades: idempotente e sem resíduos
+    for _ in range(2000):
+        text = "".join(random_fragment(rng) for _ in range(rng.randint(0, 12)))
+        cleaned = cleaner.clean(text)
+        assert cleaner.clean(cleaned) == cleaned, repr(text)
+        assert "\n\n\n" not in cleaned
+        assert not any(f"<{tag}>" in cleaned and f"</{tag}>" in cleaned.split(f"<{tag}>", 1)[1]
+                       for tag in cleaner.tags), repr(text)
+
+    # Lista de tags configurável
+    assert ResponseCleaner(["extra"]).clean("a<extra>x</extra>b<search>y</search>") == "ab<search>y</search>"
+    assert ResponseCleaner([]).clean("a\n\n\n\nb ") == "a\n\nb"
+
+    # Benchmark: resposta comum (sem tags) e resposta com blocos de busca
+    paragraph = "🎮 **Notícia.** Texto da notícia com dados, números e contexto.\n\n"
+    block = "<search>consulta</search>\n<searchqualityscore>4</searchqualityscore>\n<thinking>análise\n</thinking>\n\n\n"
+    samples = {"sem tags": paragraph * 20, "com tags": (block + paragraph * 3) * 5}
+    runs = 5000
+    for label, sample in samples.items():
+        assert cleaner.clean(sample) == legacy_clean(sample)
+        old = timeit.timeit(lambda: legacy_clean(sample), number=runs) / runs
+        new = timeit.timeit(lambda: cleaner.clean(sample), number=runs) / runs
+        print(f"{label}: antiga {old * 1e6:.1f}µs | única passada {new * 1e6:.1f}µs ({old / new:.1f}x)")
+    print("✅ Limpeza de respostas OK")
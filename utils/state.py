@@ -0,0 +1,132 @@
+"""
+Camada de estado compartilhado entre a thread do scheduler e a do admin bot
+
+- JsonStateFile: arquivo JSON com lock (entre threads e processos), gravação
+  atômica e recarga apenas quando o arquivo muda por fora (inode/mtime/tamanho)
+- RuntimeState: flags de execução (ex: pausa) visíveis para todas as threads
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from utils.file_lock import FileLock
+from utils.logger import logger
+
+
+# Assinatura de um arquivo em disco: (inode, mtime em ns, tamanho)
+FileSignature = Optional[Tuple[int, int, int]]
+
+
+def file_signature(path: Path) -> FileSignature:
+    """Retorna a assinatura atual do arquivo (None se não existir)"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def atomic_write_json(path: Path, data: Dict, indent: Optional[int] = 2):
+    """Grava JSON de forma atômica (arquivo temporário + fsync + rename)"""
+    path.parent.mkdir(exist_ok=True)
+    tmp_file = path.with_suffix('.tmp')
+
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_file, path)
+
+
+class JsonStateFile:
+    """Estado JSON protegido por lock e sincronizado com o arquivo em disco"""
+
+    def __init__(self, path: Path, default_factory: Callable[[], Dict]):
+        self.path = path
+        self.default_factory = default_factory
+        self._lock = FileLock(path)
+        self._signature: FileSignature = None
+        self._data: Dict = default_factory()
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        """Carrega do disco e registra a assinatura do arquivo"""
+        signature = file_signature(self.path)
+        data = self.default_factory()
+
+        if signature is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data.update(json.load(f))
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"Não foi possível ler {self.path.name}: {str(e)}. Usando estado vazio.")
+
+        self._data = data
+        self._signature = signature
+
+    def refresh(self) -> bool:
+        """
+        Recarrega o arquivo se ele foi alterado/removido por fora
+
+        Returns:
+            True se houve recarga
+        """
+        with self._lock:
+            if file_signature(self.path) == self._signature:
+                return False
+            self._load()
+            logger.debug(f"{self.path.name} alterado externamente. Recarregado.")
+            return True
+
+    def _save(self):
+        """Persiste e atualiza a assinatura conhecida"""
+        atomic_write_json(self.path, self._data)
+        self._signature = file_signature(self.path)
+
+    @contextmanager
+    def read(self) -> Iterator[Dict]:
+        """Acesso de leitura consistente (não modifique os dados)"""
+        with self._lock:
+            self.refresh()
+            yield self._data
+
+    @contextmanager
+    def update(self) -> Iterator[Dict]:
+        """Acesso de escrita: as alterações são gravadas ao sair do bloco"""
+        with self._lock:
+            self.refresh()
+            yield self._data
+            self._save()
+
+    def reset(self):
+        """Volta ao estado padrão e grava"""
+        with self._lock:
+            self._data = self.default_factory()
+            self._save()
+
+
+class RuntimeState:
+    """Flags de execução compartilhadas entre threads"""
+
+    def __init__(self):
+        self._paused = threading.Event()
+
+    @property
+    def paused(self) -> bool:
+        return self._paused.is_set()
+
+    def pause(self):
+        self._paused.set()
+
+    def resume(self):
+        self._paused.clear()
+
+
+# Instância global das flags de execução
+runtime_state = RuntimeState()
@@ -0,0 +1,151 @@
+"""
+Renderizador Markdown -> HTML do Telegram (passada única, com escape)
+
+Suporta o subconjunto de Markdown que o Claude usa nas postagens:
+**negrito**, *itálico*, [texto](url) e listas com "-" ou "*".
+Todo o resto é texto e tem <, > e & escapados, então a mensagem
+sempre é HTML válido para o parse_mode=HTML do Telegram.
+"""
+
+import re
+
+
+# Um único scan: link | negrito | itálico | marcador de lista | quebra de linha | caractere especial
+_TOKEN_RE = re.compile(
+    r'\[(?P<text>[^\]\n]+)\]\((?P<url>[^()\s]+)\)'
+    r'|(?P<bold>\*\*)'
+    r'|(?P<italic>\*)'
+    r'|(?P<nl>\n)'
+    r'|(?P<esc>[&<>])'
+)
+
+# "* item" no início da linha é lista, não itálico
+_LIST_MARKER_RE = re.compile(r'[ \t]*\* ')
+
+_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;'}
+_TAGS = {'bold': 'b', 'italic': 'i'}
+
+
+def escape_html(text: str) -> str:
+    """Escapa <, > e & para uso em mensagens HTML do Telegram"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _escape_attr(value: str) -> str:
+    """Escapa valor de atributo (href)"""
+    return escape_html(value).replace('"', '&quot;')
+
+
+def markdown_to_html(text: str) -> str:
+    """
+    Converte Markdown do Claude para HTML do Telegram
+
+    Marcadores sem par na mesma linha ficam como texto literal e tags
+    sempre fecham na ordem certa.
+
+    Args:
+        text: Texto com markdown
+
+    Returns:
+        Texto com tags HTML e caracteres especiais escapados
+    """
+    out = []
+    stack = []  # (tipo, índice em out) dos marcadores abertos na linha atual
+    pos = 0
+    line_start = True
+    length = len(text)
+
+    while True:
+        if line_start:
+            line_start = False
+            marker = _LIST_MARKER_RE.match(text, pos)
+            if marker:
+                out.append(marker.group(0)[:-2] + '• ')
+                pos = marker.end()
+
+        match = _TOKEN_RE.search(text, pos)
+        if not match:
+            out.append(text[pos:])
+            break
+
+        start = match.start()
+        if start > pos:
+            out.append(text[pos:start])
+        pos = match.end()
+        kind = match.lastgroup
+
+        if kind == 'esc':
+            out.append(_ESCAPES[match.group(0)])
+
+        elif kind == 'nl':
+            # Marcadores ainda abertos ficam literais
+            stack.clear()
+            out.append('\n')
+            line_start = True
+
+        elif kind == 'url' or kind == 'text':
+            out.append(
+                f'<a href="{_escape_attr(match.group("url"))}">{escape_html(match.group("text"))}</a>'
+            )
+
+        else:
+            prev_char = text[start - 1] if start > 0 else ' '
+            if (kind == 'bold' and pos < length and text[pos] == '*'
+                    and stack and stack[-1][0] == 'italic'
+                    and not prev_char.isspace() and any(k == 'bold' for k, _ in stack)):
+                # "***" fechando itálico dentro de negrito: consome só um "*" agora
+                kind = 'italic'
+                pos = start + 1
+
+            marker = text[start:pos]
+            next_char = text[pos] if pos < length else ' '
+            open_index = next((i for i in range(len(stack) - 1, -1, -1) if stack[i][0] == kind), None)
+
+            if open_index is not None and not prev_char.isspace():
+                # Fecha; marcadores abertos depois deste viram literais
+                _, out_index = stack[open_index]
+                del stack[open_index:]
+                out[out_index] = f'<{_TAGS[kind]}>'
+                out.append(f'</{_TAGS[kind]}>')
+            elif not next_char.isspace():
+                stack.append((kind, len(out)))
+                out.append(marker)
+            else:
+                out.append(marker)
+
+    return ''.join(out)
+
+
+if __name__ == "__main__":
+    # Casos golden: (markdown, HTML esperado)
+    GOLDEN = [
+        ("**Título.** Texto", "<b>Título.</b> Texto"),
+        ("Um *destaque* aqui", "Um <i>destaque</i> aqui"),
+        ("[CoinDesk](https://coindesk.com/a?x=1&y=2)",
+         '<a href="https://coindesk.com/a?x=1&amp;y=2">CoinDesk</a>'),
+        ("**[link](https://a.b)**", '<b><a href="https://a.b">link</a></b>'),
+        ("Preço < US$ 1 & volume > 2", "Preço &lt; US$ 1 &amp; volume &gt; 2"),
+        ("<script>alert(1)</script>", "&lt;script&gt;alert(1)&lt;/script&gt;"),
+        ("**aberto sem fechar\nlinha 2**", "**aberto sem fechar\nlinha 2**"),
+        ("* item 1\n* item 2", "• item 1\n• item 2"),
+        ("- item *com ênfase*", "- item <i>com ênfase</i>"),
+        ("5 * 3 = 15", "5 * 3 = 15"),
+        ("**negrito *misto** fim*", "<b>negrito *misto</b> fim*"),
+        ("***forte***", "<b><i>forte</i></b>"),
+        ("💰 **Axie levanta US$ 10M.** Rodada liderada pela a16z.",
+         "💰 <b>Axie levanta US$ 10M.</b> Rodada liderada pela a16z."),
+        ("📎 **Fontes:**\nhttps://site.com/n?a=1&b=2",
+         "📎 <b>Fontes:</b>\nhttps://site.com/n?a=1&amp;b=2"),
+        ("", ""),
+    ]
+
+    failures = 0
+    for source, expected in GOLDEN:
+        result = markdown_to_html(source)
+        if result != expected:
+            failures += 1
+            print(f"❌ {source!r}\n   esperado: {expected!r}\n   obtido:   {result!r}")
+
+    if failures:
+        raise SystemExit(f"{failures} caso(s) golden falharam")
+    print(f"✅ {len(GOLDEN)} casos golden OK")
@@ -0,0 +1,150 @@
+"""
+Contabilidade de tokens e custo do Claude, com orçamento diário
+
+Cada chamada registra os tokens de message.usage (entrada, saída e cache)
+agregados por dia, tipo de job e modelo em data/usage.json. O orçamento
+diário (CLAUDE_DAILY_BUDGET_USD) degrada a geração em vez de bloqueá-la:
+- a partir de 80% do orçamento: menos notícias candidatas no prompt
+- orçamento estourado: também troca para CLAUDE_BUDGET_MODEL
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict
+
+from config.config import USAGE_FILE, CLAUDE_DAILY_BUDGET_USD, CLAUDE_BUDGET_MODEL
+from utils.logger import logger
+from utils.state import JsonStateFile
+
+
+# Preço em USD por milhão de tokens: (entrada, saída, escrita de cache, leitura de cache)
+PRICES_PER_MTOK = {
+    "opus": (15.0, 75.0, 18.75, 1.50),
+    "sonnet": (3.0, 15.0, 3.75, 0.30),
+    "haiku": (0.80, 4.0, 1.0, 0.08),
+}
+DEFAULT_FAMILY = "sonnet"
+
+# Estados do orçamento
+BUDGET_OK = "ok"
+BUDGET_TIGHT = "tight"    # >= 80%: reduz candidatas
+BUDGET_OVER = "over"      # >= 100%: reduz candidatas e usa modelo barato
+TIGHT_RATIO = 0.8
+
+# Dias de histórico mantidos no arquivo
+KEEP_DAYS = 60
+
+_TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+def _family(model: str) -> str:
+    for family in PRICES_PER_MTOK:
+        if family in model:
+            return family
+    return DEFAULT_FAMILY
+
+
+def estimate_cost(model: str, tokens: Dict[str, int]) -> float:
+    """Custo em USD de uma chamada"""
+    prices = PRICES_PER_MTOK[_family(model)]
+    return sum(tokens.get(field, 0) * price for field, price in zip(_TOKEN_FIELDS, prices)) / 1_000_000
+
+
+class UsageTracker:
+    """Agrega uso do Claude por dia/job/modelo e aplica o orçamento diário"""
+
+    def __init__(self, daily_budget: float = CLAUDE_DAILY_BUDGET_USD):
+        self.daily_budget = daily_budget
+        self.store = JsonStateFile(USAGE_FILE, lambda: {"days": {}})
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def record(self, model: str, job_type: str, usage) -> Dict:
+        """
+        Registra o uso de uma chamada
+
+        Args:
+            model: Modelo usado
+            job_type: Tipo de geração (resumo_diario, noticia_relevante...)
+            usage: message.usage da resposta (ou dict com os mesmos campos)
+
+        Returns:
+            Tokens da chamada e custo (cost_usd)
+        """
+        tokens = {}
+        for field in _TOKEN_FIELDS:
+            value = usage.get(field) if isinstance(usage, dict) else getattr(usage, field, None)
+            tokens[field] = int(value or 0)
+        cost = estimate_cost(model, tokens)
+
+        with self.store.update() as data:
+            day = data["days"].setdefault(self._today(), {})
+            entry = day.setdefault(job_type, {}).setdefault(model, {"calls": 0, "cost_usd": 0.0})
+            entry["calls"] += 1
+            entry["cost_usd"] = round(entry["cost_usd"] + cost, 6)
+            for field, value in tokens.items():
+                entry[field] = entry.get(field, 0) + value
+
+            # Descarta dias antigos
+            cutoff = (datetime.now() - timedelta(days=KEEP_DAYS)).strftime("%Y-%m-%d")
+            for old_day in [d for d in data["days"] if d < cutoff]:
+                del data["days"][old_day]
+
+        result = dict(tokens, cost_usd=round(cost, 6))
+        logger.event("claude_usage", model=model, job_type=job_type, **result)
+        return result
+
+    def totals(self, days: int = 1) -> Dict:
+        """
+        Soma tokens e custo dos últimos N dias (1 = hoje)
+
+        Returns:
+            {calls, input_tokens, output_tokens, cache_*, cost_usd, by_job: {job: cost}}
+        """
+        cutoff = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        result = {"calls": 0, "cost_usd": 0.0, "by_job": {}}
+        result.update({field: 0 for field in _TOKEN_FIELDS})
+
+        with self.store.read() as data:
+            for day, jobs in data["days"].items():
+                if day < cutoff:
+                    continue
+                for job_type, models in jobs.items():
+                    for entry in models.values():
+                        result["calls"] += entry["calls"]
+                        result["cost_usd"] += entry["cost_usd"]
+                        result["by_job"][job_type] = result["by_job"].get(job_type, 0.0) + entry["cost_usd"]
+                        for field in _TOKEN_FIELDS:
+                            result[field] += entry.get(field, 0)
+        return result
+
+    def budget_state(self) -> str:
+        """Estado do orçamento de hoje"""
+        if self.daily_budget <= 0:
+            return BUDGET_OK
+        spent = self.totals(days=1)["cost_usd"]
+        if spent >= self.daily_budget:
+            return BUDGET_OVER
+        if spent >= self.daily_budget * TIGHT_RATIO:
+            return BUDGET_TIGHT
+        return BUDGET_OK
+
+    def candidate_limit(self, default: int) -> int:
+        """Quantidade de notícias candidatas no prompt, conforme o orçamento"""
+        if self.budget_state() == BUDGET_OK:
+            return default
+        limit = max(3, default // 2)
+        logger.warning(f"💸 Orçamento diário do Claude perto do limite: usando {limit} candidatas em vez de {default}")
+        return limit
+
+    def model_for(self, model: str) -> str:
+        """Modelo a usar: o mais barato se o orçamento de hoje estourou"""
+        if self.budget_state() != BUDGET_OVER or model == CLAUDE_BUDGET_MODEL:
+            return model
+        logger.warning(f"💸 Orçamento diário do Claude estourado: usando {CLAUDE_BUDGET_MODEL}")
+        return CLAUDE_BUDGET_MODEL
+
+
+# Instância global do contador de uso
+usage_tracker = UsageTracker()